@@ -0,0 +1,65 @@
+"""On-disk cache of the signed session token and Playwright storage state.
+
+Entries are keyed by user ID and a fingerprint of the JWT secret, so a
+rotated secret never reuses a stale token. An entry is reused until its
+token is within `refresh_margin` seconds of expiry.
+"""
+
+import hashlib
+import json
+import os
+import time
+
+import jwt
+
+TOKEN_LIFETIME = 60 * 60 * 24 * 7  # 7 days
+
+
+def _cache_path(cache_dir: str, user_id: str, secret: str) -> str:
+    fingerprint = hashlib.sha256(secret.encode()).hexdigest()[:16]
+    safe_user = "".join(c if c.isalnum() or c in "-_" else "_" for c in user_id)
+    return os.path.join(cache_dir, f"{safe_user}-{fingerprint}.json")
+
+
+def mint_token(user_id: str, user_name: str, secret: str) -> tuple[str, int]:
+    """Sign a session JWT; returns the token and its expiry timestamp."""
+    now = int(time.time())
+    exp = now + TOKEN_LIFETIME
+    payload = {
+        "sub": user_id,
+        "name": user_name,
+        "exp": exp,
+        "iat": now,
+    }
+    return jwt.encode(payload, secret, algorithm="HS256"), exp
+
+
+def load(cache_dir: str, user_id: str, secret: str, refresh_margin: int) -> dict | None:
+    """Return the cached {token, exp, storage_state} entry if it is still fresh."""
+    path = _cache_path(cache_dir, user_id, secret)
+    try:
+        with open(path) as f:
+            entry = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if entry.get("exp", 0) - time.time() <= refresh_margin:
+        return None
+    return entry
+
+
+def save(cache_dir: str, user_id: str, secret: str, token: str, exp: int, storage_state: dict):
+    os.makedirs(cache_dir, exist_ok=True)
+    path = _cache_path(cache_dir, user_id, secret)
+    tmp = f"{path}.tmp"
+    # Storage state holds a live session cookie; keep it private to this user
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as f:
+        json.dump({"token": token, "exp": exp, "storage_state": storage_state}, f)
+    os.replace(tmp, path)
+
+
+def invalidate(cache_dir: str, user_id: str, secret: str):
+    try:
+        os.remove(_cache_path(cache_dir, user_id, secret))
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Compare the "js" and "cdp" extraction engines on generated large pages.
+
+Usage (from the repo root):
+    python -m benchmarks.extraction_bench --sizes 1000,10000,50000 --repeats 5
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from playwright.async_api import async_playwright
+
+from extraction import ENGINES, extract_elements
+
+
+def build_page(rows: int) -> str:
+    """A dashboard-like page: nav, a form and a long table of interactive rows."""
+    body = [
+        '<nav id="nav">' + "".join(f'<a href="/section/{i}">Section {i}</a>' for i in range(20)) + "</nav>",
+        '<form id="filters"><label>Search <input name="q" placeholder="Search bikes"></label>'
+        '<select name="sort"><option>Newest</option><option>Oldest</option></select>'
+        "<button>Apply</button></form>",
+        "<h1>Maintenance log</h1>",
+        '<table class="table table-striped"><tbody>',
+    ]
+    for i in range(rows):
+        body.append(
+            f'<tr class="row"><td><a class="link" href="/bikes/{i}">Bike {i}</a></td>'
+            f"<td>Chain replaced at {i * 37 % 9000} km</td>"
+            f'<td><button class="btn btn-sm" onclick="void 0">Edit</button></td>'
+            f'<td><input type="checkbox" name="sel-{i}"></td></tr>'
+        )
+    body.append("</tbody></table>")
+    return "<!doctype html><html><head><title>Bench</title></head><body>" + "".join(body) + "</body></html>"
+
+
+async def run(sizes: list[int], repeats: int) -> list[dict]:
+    results = []
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        page = await browser.new_page()
+        for rows in sizes:
+            await page.set_content(build_page(rows))
+            entry = {"rows": rows}
+            for engine in ENGINES:
+                timings = []
+                for _ in range(repeats):
+                    start = time.perf_counter()
+                    elements = await extract_elements(page, engine)
+                    timings.append((time.perf_counter() - start) * 1000)
+                entry[engine] = {
+                    "elements": len(elements),
+                    "median_ms": round(statistics.median(timings), 1),
+                    "min_ms": round(min(timings), 1),
+                }
+            entry["speedup"] = round(entry["js"]["median_ms"] / max(entry["cdp"]["median_ms"], 0.1), 2)
+            results.append(entry)
+            print(json.dumps(entry))
+        await browser.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,50000", help="Comma-separated table row counts")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    results = asyncio.run(run(sizes, args.repeats))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
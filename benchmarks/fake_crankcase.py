@@ -0,0 +1,141 @@
+"""Local stand-in for the CrankCase site, for offline benchmarks.
+
+Serves a generated single-page dashboard behind the same JWT `session`
+cookie that `BrowserController.login()` injects. Unauthenticated requests
+get a "Sign in with Strava" page. The dashboard polls /api/status in the
+background like the real SPA, and its "Refresh" button fetches and renders
+data, so settle detection has real work to wait for.
+
+    /?elements=N     dashboard with roughly N extractable elements
+    /api/status      polled every POLL_INTERVAL_MS
+    /api/refresh     JSON fetched by the Refresh button
+"""
+
+import json
+import threading
+import time
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import jwt
+
+POLL_INTERVAL_MS = 1000
+ELEMENTS_PER_ROW = 4  # link, text cell, button, checkbox
+DEFAULT_ELEMENTS = 1000
+
+LOGIN_PAGE = """<!doctype html><html><head><title>CrankCase</title></head><body>
+<h1>CrankCase</h1><a class="btn" href="/auth/strava">Sign in with Strava</a>
+</body></html>"""
+
+APP_SCRIPT = """
+const status = document.getElementById('sync-status');
+setInterval(async () => {
+    const data = await (await fetch('/api/status')).json();
+    status.textContent = 'Synced ' + data.ts;
+}, %d);
+document.getElementById('refresh').addEventListener('click', async () => {
+    const data = await (await fetch('/api/refresh')).json();
+    const toast = document.getElementById('toast');
+    toast.textContent = data.message;
+    toast.hidden = false;
+});
+""" % POLL_INTERVAL_MS
+
+
+def build_dashboard(user_name: str, elements: int) -> str:
+    rows = max(1, elements // ELEMENTS_PER_ROW)
+    body = [
+        '<nav id="nav"><a href="/">Dashboard</a><a href="/bikes">Bikes</a><a href="/parts">Parts</a>'
+        f'<span class="user">{user_name}</span><a href="/logout">Log out</a></nav>',
+        '<main><h1>Maintenance log</h1><span id="sync-status">Not synced</span>',
+        '<button id="refresh" class="btn btn-primary">Refresh</button><div id="toast" hidden></div>',
+        '<form id="filters"><label>Search <input name="q" placeholder="Search bikes"></label>'
+        '<select name="sort"><option>Newest</option><option>Oldest</option></select>'
+        "<button>Apply</button></form>",
+        '<table class="table table-striped"><tbody>',
+    ]
+    for i in range(rows):
+        body.append(
+            f'<tr class="row"><td><a class="link" href="/bikes/{i}">Bike {i}</a></td>'
+            f"<td>Chain replaced at {i * 37 % 9000} km</td>"
+            f'<td><button class="btn btn-sm">Edit</button></td>'
+            f'<td><input type="checkbox" name="sel-{i}"></td></tr>'
+        )
+    body.append("</tbody></table></main>")
+    return (
+        "<!doctype html><html><head><title>CrankCase - Dashboard</title></head><body>"
+        + "".join(body)
+        + f"<script>{APP_SCRIPT}</script></body></html>"
+    )
+
+
+class FakeCrankCase:
+    """Runs the stand-in site on a background thread; use as a context manager."""
+
+    def __init__(self, secret: str, host: str = "127.0.0.1", port: int = 0):
+        self.secret = secret
+        self.requests = 0
+        self._dashboards: dict[tuple[str, int], bytes] = {}
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "FakeCrankCase":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _user(self, cookie_header: str | None) -> str | None:
+        cookie = SimpleCookie(cookie_header or "").get("session")
+        if cookie is None:
+            return None
+        try:
+            return jwt.decode(cookie.value, self.secret, algorithms=["HS256"])["name"]
+        except jwt.InvalidTokenError:
+            return None
+
+    def _dashboard(self, user_name: str, elements: int) -> bytes:
+        key = (user_name, elements)
+        if key not in self._dashboards:
+            self._dashboards[key] = build_dashboard(user_name, elements).encode()
+        return self._dashboards[key]
+
+    def _handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: bytes, content_type: str):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                site.requests += 1
+                parsed = urlparse(self.path)
+                user = site._user(self.headers.get("Cookie"))
+                if parsed.path.startswith("/api/"):
+                    if user is None:
+                        return self._send(401, b'{"error": "unauthenticated"}', "application/json")
+                    message = "Data refreshed" if parsed.path == "/api/refresh" else "ok"
+                    body = json.dumps({"ts": round(time.time(), 3), "message": message}).encode()
+                    return self._send(200, body, "application/json")
+                if user is None:
+                    return self._send(200, LOGIN_PAGE.encode(), "text/html")
+                elements = int(parse_qs(parsed.query).get("elements", [DEFAULT_ELEMENTS])[0])
+                self._send(200, site._dashboard(user, elements), "text/html")
+
+        return Handler
@@ -0,0 +1,212 @@
+"""In-memory fake of the GitHub REST/GraphQL endpoints GitHubClient uses.
+
+Point GITHUB_API_URL at `FakeGitHub.url`. Supports issue listing with
+`state`/`since`/`per_page`/`page`, Link pagination and ETags (304 on
+If-None-Match), issue creation, single issues and comments, pull
+request listing and the open-issue-titles GraphQL query. `latency_ms`
+adds a fixed delay per request to approximate a real round-trip.
+Timestamps come from a logical clock, so runs are reproducible.
+"""
+
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+ISSUES_PATH_RE = re.compile(r"^/repos/([^/]+/[^/]+)/issues(?:/(\d+))?(/comments)?$")
+PULLS_PATH_RE = re.compile(r"^/repos/([^/]+/[^/]+)/pulls$")
+
+AREAS = ["dashboard", "bike list", "parts page", "settings", "login", "maintenance log", "ride import", "search"]
+SYMPTOMS = [
+    "button does not respond", "table overflows on mobile", "wrong total shown", "spinner never stops",
+    "error toast after save", "sort order ignored", "missing empty state", "date shown in UTC",
+]
+
+
+def generate_issues(count: int, seed: int = 0) -> list[tuple[str, str]]:
+    """Deterministic (title, body) pairs that look like filed QA issues."""
+    rng = random.Random(seed)
+    issues = []
+    for i in range(count):
+        area, symptom = rng.choice(AREAS), rng.choice(SYMPTOMS)
+        title = f"{area.capitalize()}: {symptom} ({i})"
+        body = f"On the {area}, the {symptom}. Seen while testing flow {rng.randint(1, 500)}."
+        issues.append((title, body))
+    return issues
+
+
+class FakeGitHub:
+    """Runs the fake API on a background thread; use as a context manager."""
+
+    def __init__(self, repo: str, latency_ms: float = 0, host: str = "127.0.0.1", port: int = 0):
+        self.repo = repo
+        self.latency_ms = latency_ms
+        self.requests = 0
+        self.issues: dict[int, dict] = {}
+        self.comments: dict[int, list[dict]] = {}
+        self._clock = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "FakeGitHub":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _now(self) -> str:
+        self._clock += 1
+        return (EPOCH + timedelta(seconds=self._clock)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    def add_issue(self, title: str, body: str = "", labels: list[str] | None = None, state: str = "open") -> dict:
+        with self._lock:
+            number = len(self.issues) + 1
+            issue = {
+                "number": number,
+                "title": title,
+                "body": body,
+                "state": state,
+                "labels": [{"name": name} for name in labels or []],
+                "updated_at": self._now(),
+                "html_url": f"https://github.com/{self.repo}/issues/{number}",
+                "user": {"login": "qa-bot"},
+            }
+            self.issues[number] = issue
+            self.comments[number] = []
+            return issue
+
+    def seed(self, count: int, seed: int = 0):
+        for title, body in generate_issues(count, seed):
+            self.add_issue(title, body, ["bug"])
+
+    # -------------------------------------------------------------------------
+    # Endpoints
+    # -------------------------------------------------------------------------
+
+    def _list_issues(self, query: dict) -> tuple[list[dict], dict]:
+        state = query.get("state", "open")
+        since = query.get("since")
+        per_page = int(query.get("per_page", 30))
+        page = int(query.get("page", 1))
+        with self._lock:
+            issues = [
+                issue for issue in self.issues.values()
+                if (state == "all" or issue["state"] == state) and (since is None or issue["updated_at"] >= since)
+            ]
+        if query.get("sort") == "updated":
+            issues.sort(key=lambda issue: issue["updated_at"], reverse=query.get("direction") != "asc")
+        else:
+            issues.sort(key=lambda issue: issue["number"], reverse=True)
+        items = issues[(page - 1) * per_page: page * per_page]
+        headers = {}
+        if page * per_page < len(issues):
+            next_query = {**query, "page": str(page + 1)}
+            link = "&".join(f"{k}={v}" for k, v in next_query.items())
+            headers["Link"] = f'<{self.url}/repos/{self.repo}/issues?{link}>; rel="next"'
+        return items, headers
+
+    def _graphql(self, payload: dict) -> dict:
+        cursor = int(payload["variables"].get("cursor") or 0)
+        with self._lock:
+            open_issues = sorted(
+                (issue for issue in self.issues.values() if issue["state"] == "open"),
+                key=lambda issue: issue["number"],
+            )
+        nodes = [{"number": issue["number"], "title": issue["title"]} for issue in open_issues[cursor:cursor + 100]]
+        end = cursor + len(nodes)
+        return {"data": {"repository": {"issues": {
+            "nodes": nodes,
+            "pageInfo": {"hasNextPage": end < len(open_issues), "endCursor": str(end)},
+        }}}}
+
+    def _handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, data, headers: dict | None = None):
+                body = json.dumps(data).encode()
+                etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+                if self.command == "GET" and status == 200 and self.headers.get("If-None-Match") == etag:
+                    status, body = 304, b""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _read_json(self) -> dict:
+                length = int(self.headers.get("Content-Length", 0))
+                return json.loads(self.rfile.read(length) or b"{}")
+
+            def _begin(self):
+                api.requests += 1
+                if api.latency_ms:
+                    time.sleep(api.latency_ms / 1000)
+                parsed = urlparse(self.path)
+                return parsed.path, {k: v[0] for k, v in parse_qs(parsed.query).items()}
+
+            def do_GET(self):
+                path, query = self._begin()
+                if PULLS_PATH_RE.match(path):
+                    return self._send(200, [])
+                match = ISSUES_PATH_RE.match(path)
+                if not match or match.group(1) != api.repo:
+                    return self._send(404, {"message": "Not Found"})
+                if match.group(2) is None:
+                    items, headers = api._list_issues(query)
+                    return self._send(200, items, headers)
+                number = int(match.group(2))
+                if number not in api.issues:
+                    return self._send(404, {"message": "Not Found"})
+                if match.group(3):
+                    return self._send(200, api.comments[number])
+                self._send(200, api.issues[number])
+
+            def do_POST(self):
+                path, _ = self._begin()
+                payload = self._read_json()
+                if path == "/graphql":
+                    return self._send(200, api._graphql(payload))
+                match = ISSUES_PATH_RE.match(path)
+                if not match or match.group(1) != api.repo:
+                    return self._send(404, {"message": "Not Found"})
+                if match.group(2) is None:
+                    if not payload.get("title"):
+                        return self._send(422, {"message": "Validation Failed"})
+                    issue = api.add_issue(payload["title"], payload.get("body", ""), payload.get("labels"))
+                    return self._send(201, issue)
+                number = int(match.group(2))
+                if not match.group(3) or number not in api.issues:
+                    return self._send(404, {"message": "Not Found"})
+                with api._lock:
+                    comment = {
+                        "id": sum(len(c) for c in api.comments.values()) + 1,
+                        "user": {"login": "qa-bot"},
+                        "body": payload.get("body", ""),
+                        "created_at": api._now(),
+                    }
+                    api.comments[number].append(comment)
+                self._send(201, comment)
+
+        return Handler
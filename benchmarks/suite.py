@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""Offline benchmarks for BrowserController and GitHubReporter.
+
+Runs against a local stand-in CrankCase site and a fake GitHub API, so no
+credentials or network access are needed. Results are written as JSON;
+pass a previous results file as --baseline to flag regressions.
+
+With --snapshot, browser benchmarks go through the response cache: add
+--capture to record the stand-in site into the snapshot, then later runs
+are served entirely from it without starting the site.
+
+Usage (from the repo root):
+    python -m benchmarks.suite --output bench.json
+    python -m benchmarks.suite --sizes 100,1000 --repeats 3 --baseline bench.json
+    python -m benchmarks.suite --snapshot site.sqlite3 --capture
+    python -m benchmarks.suite --snapshot site.sqlite3 --only browser
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.fake_crankcase import FakeCrankCase
+from benchmarks.fake_github import FakeGitHub, generate_issues
+
+BENCH_SECRET = "benchmark-secret"
+BENCH_REPO = "bench/crankcase"
+BENCH_USER = "Bench Rider"
+SEED = 1234
+# Snapshots are keyed by URL, so capture and offline runs must agree on the site's address
+SNAPSHOT_PORT = 18765
+
+
+def summarize(timings: list[float], **extra) -> dict:
+    ordered = sorted(timings)
+    return {
+        "n": len(ordered),
+        "median_ms": round(statistics.median(ordered), 2),
+        "min_ms": round(ordered[0], 2),
+        "p95_ms": round(ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)], 2),
+        **extra,
+    }
+
+
+async def timed(coro) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = await coro
+    return (time.perf_counter() - start) * 1000, result
+
+
+def configure_env(site_url: str, github_url: str, workdir: str, snapshot: str | None = None, capture: bool = False):
+    """Point config at the fakes; must run before anything imports config."""
+    os.environ.update({
+        "CRANKCASE_URL": site_url,
+        "GITHUB_TOKEN": "bench-token",
+        "GITHUB_REPO": BENCH_REPO,
+        "GITHUB_API_URL": github_url,
+        "JWT_SECRET": BENCH_SECRET,
+        "SESSION_USER_ID": "bench",
+        "SESSION_USER_NAME": BENCH_USER,
+        "AUTH_CACHE_DIR": os.path.join(workdir, "auth"),
+        "ISSUE_CACHE_PATH": os.path.join(workdir, "issues.sqlite3"),
+        # Keep every store out of the repo's .cache, so stand-in latencies and pages never reach real runs
+        "TIMEOUT_STORE_PATH": os.path.join(workdir, "timeouts.sqlite3"),
+        "CRAWL_CACHE_DIR": os.path.join(workdir, "sitemap"),
+        "SCREENSHOT_DIR": os.path.join(workdir, "screenshots"),
+        "VISUAL_BASELINE_DIR": os.path.join(workdir, "baselines"),
+        "RECORD_DIR": os.path.join(workdir, "recordings"),
+        "COORDINATION_DB": os.path.join(workdir, "coordination.sqlite3"),
+        "RESPONSE_CACHE_PATH": os.path.join(workdir, "responses.sqlite3"),
+        "METRICS_TRACE_DIR": "",
+        # The stand-in app polls like the real one; ignore it for settle detection
+        "SETTLE_IGNORE_URLS": "/api/status",
+    })
+    if snapshot:
+        os.environ.update({
+            "RESPONSE_CACHE": "on" if capture else "offline",
+            "RESPONSE_CACHE_PATH": os.path.abspath(snapshot),
+            "RESPONSE_CACHE_TYPES": "*",
+            "RESPONSE_CACHE_BUILD_ID": "benchmark",
+            "RESPONSE_CACHE_MAX_MB": "4096",
+            "RESPONSE_CACHE_MAX_ENTRY_MB": "256",
+        })
+
+
+async def bench_start_login(repeats: int) -> dict:
+    import auth_state
+    from browser import BrowserController
+    from config import config
+
+    results = {}
+    for mode in ("cold", "warm"):
+        timings = []
+        for _ in range(repeats):
+            if mode == "cold":
+                auth_state.invalidate(config.AUTH_CACHE_DIR, config.SESSION_USER_ID, config.JWT_SECRET)
+            browser = BrowserController(headless=True)
+            start = time.perf_counter()
+            await browser.start()
+            result = await browser.login()
+            timings.append((time.perf_counter() - start) * 1000)
+            await browser.stop()
+            if result["status"] != "ok":
+                raise RuntimeError(f"login failed against the stand-in site: {result}")
+        results[f"start_login_{mode}"] = summarize(timings)
+    return results
+
+
+async def bench_browser(sizes: list[int], repeats: int, workdir: str) -> dict:
+    from browser import BrowserController
+    from config import config
+    from screenshots import ScreenshotStore
+
+    results = {}
+    browser = BrowserController(headless=True)
+    await browser.start()
+    try:
+        await browser.login()
+        for size in sizes:
+            await browser.navigate(f"{config.CRANKCASE_URL}/?elements={size}")
+            timings, state = [], None
+            for _ in range(repeats):
+                ms, state = await timed(browser.get_page_state())
+                timings.append(ms)
+            results[f"get_page_state_{size}"] = summarize(
+                timings, raw_chars=state["raw_chars"], emitted_chars=state["emitted_chars"], pages=state.get("pages", 1)
+            )
+
+            timings = []
+            for _ in range(repeats):
+                ms, _ = await timed(browser.get_page_state(diff=True))
+                timings.append(ms)
+            results[f"get_page_state_diff_{size}"] = summarize(timings)
+
+        await browser.navigate(f"{config.CRANKCASE_URL}/?elements={sizes[0]}")
+        timings, settle = [], []
+        for _ in range(repeats):
+            ms, result = await timed(browser.click("#refresh"))
+            if result["status"] != "ok":
+                raise RuntimeError(f"click failed: {result}")
+            timings.append(ms)
+            settle.append(result["settle_ms"])
+        results["click"] = summarize(timings, median_settle_ms=round(statistics.median(settle), 2))
+
+        store = ScreenshotStore(os.path.join(workdir, "screenshots"), config.SCREENSHOT_DEDUP_DISTANCE)
+        timings, sizes_written = [], []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            shot = await browser.screenshot(image_format=config.SCREENSHOT_FORMAT, quality=config.SCREENSHOT_QUALITY)
+            saved = store.save(shot, shot["url"])
+            timings.append((time.perf_counter() - start) * 1000)
+            sizes_written.append(saved.get("bytes", 0))
+        await store.close()
+        results["screenshot"] = summarize(
+            timings, format=config.SCREENSHOT_FORMAT, written=store.written, bytes_written=sum(sizes_written)
+        )
+    finally:
+        await browser.stop()
+    return results
+
+
+async def bench_reporter(fake: FakeGitHub, existing: int, repeats: int) -> dict:
+    from config import config
+    from github_client import GitHubClient
+    from github_reporter import GitHubReporter
+
+    fake.seed(existing, SEED)
+    client = GitHubClient(config.GITHUB_TOKEN, config.GITHUB_REPO, base_url=config.GITHUB_API_URL)
+    reporter = GitHubReporter(client)
+    results = {}
+    try:
+        ms, _ = await timed(reporter.get_index())
+        results["dedup_index_cold_sync"] = summarize([ms], existing_issues=existing)
+
+        # Half re-filed titles (duplicates), half unseen ones
+        candidates = [title for title, _ in generate_issues(repeats, SEED)]
+        candidates += [f"Novel issue {i}: export fails for tandem bikes" for i in range(repeats)]
+        timings, duplicates = [], 0
+        for title in candidates:
+            ms, duplicate = await timed(reporter.is_duplicate(title))
+            timings.append(ms)
+            duplicates += duplicate
+        results["is_duplicate"] = summarize(timings, duplicates=duplicates)
+
+        # Distinct terms per title and body, so no two new bugs reach DEDUP_THRESHOLD
+        timings = []
+        for i in range(repeats):
+            title = f"Truing wizard w{i}a w{i}b w{i}c fails"
+            body = f"Panel w{i}d shows w{i}e instead of w{i}f."
+            ms, result = await timed(reporter.create_bug(title, body, f"1. Open w{i}g"))
+            if result["status"] != "created":
+                raise RuntimeError(f"create_bug failed: {result}")
+            timings.append(ms)
+        results["create_bug"] = summarize(timings)
+
+        await reporter.cache.expire()
+        ms, sync = await timed(reporter.cache.sync())
+        results["issue_cache_resync"] = summarize([ms], status=sync["status"])
+    finally:
+        await client.aclose()
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Names of benchmarks whose median regressed by more than `tolerance`."""
+    regressions = []
+    for name, entry in results["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if not before or not before["median_ms"]:
+            continue
+        ratio = entry["median_ms"] / before["median_ms"]
+        flag = " REGRESSION" if ratio > 1 + tolerance else ""
+        print(f"{name:32} {before['median_ms']:>10.2f} -> {entry['median_ms']:>10.2f} ms  x{ratio:.2f}{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+async def run(args) -> dict:
+    sizes = [int(s) for s in args.sizes.split(",")]
+    with tempfile.TemporaryDirectory() as workdir, contextlib.ExitStack() as stack, \
+            FakeGitHub(BENCH_REPO, latency_ms=args.github_latency_ms) as github:
+        if args.snapshot and not args.capture:
+            site_url = f"http://127.0.0.1:{SNAPSHOT_PORT}"  # Nothing listens; every response comes from the snapshot
+        else:
+            site = stack.enter_context(FakeCrankCase(BENCH_SECRET, port=SNAPSHOT_PORT if args.snapshot else 0))
+            site_url = site.url
+        configure_env(site_url, github.url, workdir, args.snapshot, args.capture)
+        results = {}
+        if "browser" in args.only:
+            results.update(await bench_start_login(args.repeats))
+            results.update(await bench_browser(sizes, args.repeats, workdir))
+        if "github" in args.only:
+            results.update(await bench_reporter(github, args.existing_issues, args.repeats))
+
+    return {
+        "meta": {
+            "timestamp": int(time.time()),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "sizes": sizes,
+            "repeats": args.repeats,
+            "existing_issues": args.existing_issues,
+            "github_latency_ms": args.github_latency_ms,
+            "seed": SEED,
+            "snapshot": "capture" if args.capture else ("offline" if args.snapshot else None),
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="100,1000,10000,50000", help="Comma-separated page element counts")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--existing-issues", type=int, default=500, help="Open issues seeded into fake GitHub")
+    parser.add_argument("--github-latency-ms", type=float, default=0, help="Simulated per-request API latency")
+    parser.add_argument("--only", default="browser,github", help="Comma-separated groups: browser, github")
+    parser.add_argument("--snapshot", help="Response cache file to serve the stand-in site from")
+    parser.add_argument("--capture", action="store_true", help="Record the live stand-in site into --snapshot")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--baseline", help="Previous results JSON to compare medians against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed median slowdown before flagging")
+    args = parser.parse_args()
+    if args.capture and not args.snapshot:
+        parser.error("--capture needs --snapshot")
+
+    results = asyncio.run(run(args))
+    print(json.dumps(results["results"], indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
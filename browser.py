@@ -1,146 +1,605 @@
+import asyncio
 import time
 from urllib.parse import urlparse
 
-import jwt
-from playwright.async_api import async_playwright, Page, Browser
+from playwright.async_api import async_playwright, Page, Browser, ElementHandle
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 
+import auth_state
+from browser_pool import ContextPool, PooledContext
 from config import config
+from diagnostics import Diagnostics
+from element_refs import RefMap, StaleRefError, parse_ref
+from extraction import extract_elements, resolve_target
+from interception import RELOAD_VISUALS_SCRIPT, ResourceBlocker
+from link_checker import LINKS_SCRIPT, LinkChecker
+from metrics import phase
+from page_budget import serialize
+from page_snapshot import PageSnapshot, diff_snapshots
+from recorder import TraceRecorder, describe_target, observe
+from response_cache import ResponseCache
+from route_timeouts import RouteTimeouts
+from screenshots import capture
+from settle import DOM_QUIET_SCRIPT, SettleTracker
+from visual_diff import BaselineStore, baseline_key, compare_with_baseline
+
+DEFAULT_SESSION = "default"
+
+# Cheap authentication probe: avoids serializing the whole document
+AUTH_CHECK_SCRIPT = """
+(name) => {
+    // A logout control is a cheap probe; serializing the whole body's text is the fallback
+    if (document.querySelector('[href*="logout" i], [action*="logout" i], [id*="logout" i], [class*="logout" i]')) {
+        return true;
+    }
+    const text = document.body ? document.body.textContent : '';
+    return text.includes(name) || /log ?out/i.test(text);
+}
+"""
 
 
 class BrowserController:
-    def __init__(self, headless: bool = False):
+    def __init__(self, headless: bool = False, pool_size: int | None = None, recorder: TraceRecorder | None = None):
         self.headless = headless
+        self.recorder = recorder
+        self.pool_size = pool_size or config.BROWSER_POOL_SIZE
         self.playwright = None
         self.browser: Browser | None = None
-        self.page: Page | None = None
+        self.pool: ContextPool | None = None
+        self.sessions: dict[str, PooledContext] = {}
+        self._session_locks: dict[str, asyncio.Lock] = {}
+        self._storage_state: dict | None = None
+        self._snapshots: dict[str, PageSnapshot] = {}
+        self._refs: dict[str, RefMap] = {}
+        self._settle_trackers: dict[Page, SettleTracker] = {}
+        self._blockers: dict[Page, ResourceBlocker] = {}
+        self.link_checker = LinkChecker(config.LINK_CHECK_CONCURRENCY, config.ACTION_TIMEOUT, config.SLOW_REQUEST_MS)
+        self.diagnostics = Diagnostics(config.DIAGNOSTICS_BUFFER_SIZE, config.SLOW_REQUEST_MS, self._session_of)
+        self.timeouts: RouteTimeouts | None = None
+        if config.ADAPTIVE_TIMEOUTS:
+            self.timeouts = RouteTimeouts(
+                config.TIMEOUT_STORE_PATH,
+                default_ms=config.ACTION_TIMEOUT,
+                floor_ms=config.TIMEOUT_FLOOR_MS,
+                ceiling_ms=config.TIMEOUT_CEILING_MS,
+            )
+        self.response_cache: ResponseCache | None = None
+        if config.RESPONSE_CACHE != "off":
+            types = config.RESPONSE_CACHE_TYPES.strip()
+            self.response_cache = ResponseCache(
+                config.RESPONSE_CACHE_PATH,
+                max_bytes=config.RESPONSE_CACHE_MAX_MB * 1024 * 1024,
+                max_entry_bytes=config.RESPONSE_CACHE_MAX_ENTRY_MB * 1024 * 1024,
+                resource_types=None if types == "*" else {t.strip() for t in types.split(",") if t.strip()},
+                offline=config.RESPONSE_CACHE == "offline",
+            )
+
+    @property
+    def page(self) -> Page | None:
+        """Page of the default session."""
+        session = self.sessions.get(DEFAULT_SESSION)
+        return session.page if session else None
 
     async def start(self):
         self.playwright = await async_playwright().start()
         self.browser = await self.playwright.chromium.launch(headless=self.headless)
-        self.page = await self.browser.new_page()
-        self.page.set_default_timeout(config.ACTION_TIMEOUT)
+        if self.response_cache:
+            await self.response_cache.open(
+                self.playwright.request, config.CRANKCASE_URL, config.RESPONSE_CACHE_BUILD_ID
+            )
+        self.pool = ContextPool(
+            self._new_context,
+            size=self.pool_size,
+            max_navigations=config.CONTEXT_MAX_NAVIGATIONS,
+        )
+        cached = self._load_auth()
+        if cached:
+            self._storage_state = cached["storage_state"]
+        await self._session(DEFAULT_SESSION)
 
     async def stop(self):
+        if self.pool:
+            await self.pool.close()
+        self.sessions.clear()
+        self._session_locks.clear()
+        self._snapshots.clear()
+        self._refs.clear()
+        self._settle_trackers.clear()
+        self._blockers.clear()
         if self.browser:
             await self.browser.close()
         if self.playwright:
             await self.playwright.stop()
 
-    async def navigate(self, url: str) -> dict:
-        await self.page.goto(url)
-        return {"status": "ok", "url": self.page.url}
+    async def _new_context(self) -> PooledContext:
+        # Contexts created after login() inherit its cookies, so they come up authenticated
+        context = await self.browser.new_context(storage_state=self._storage_state)
+        await context.add_init_script(f"({DOM_QUIET_SCRIPT})()")
+        if self.response_cache:
+            await self.response_cache.attach(context)
+        blocker = ResourceBlocker(self._blocked_resource_types(), config.BLOCK_DOMAINS)
+        await blocker.attach(context)
+        self.diagnostics.attach(context)
+        page = await context.new_page()
+        page.set_default_timeout(config.ACTION_TIMEOUT)
+        self._settle_trackers[page] = SettleTracker(page, config.SETTLE_IGNORE_URLS)
+        self._blockers[page] = blocker
+        page.on("close", self._forget_page)
+        return PooledContext(context, page)
+
+    def _forget_page(self, page: Page):
+        self._settle_trackers.pop(page, None)
+        self._blockers.pop(page, None)
+
+    def _session_of(self, page: Page) -> str | None:
+        for session_id, session in self.sessions.items():
+            if session.page == page:
+                return session_id
+        return None
+
+    def get_diagnostics(self, since: int = 0, session_id: str | None = None) -> dict:
+        """Console errors, page errors and failed/erroring/slow requests recorded after cursor `since`."""
+        return self.diagnostics.since(since, session_id)
+
+    def _blocked_resource_types(self) -> set[str]:
+        """Images, fonts and media are blocked by default only in headless runs."""
+        types = config.BLOCK_RESOURCE_TYPES
+        if types is None:
+            types = "image,font,media" if self.headless else ""
+        return {t.strip() for t in types.split(",") if t.strip()}
+
+    async def _settle(self, page: Page) -> dict:
+        """Wait for the page to go quiet after an action and report how long it took."""
+        tracker = self._settle_trackers.get(page)
+        if tracker is None:
+            return {"settled": True, "settle_ms": 0}
+        with phase("settle"):
+            return await tracker.wait(config.SETTLE_QUIET_MS, config.SETTLE_TIMEOUT)
 
-    async def click(self, selector: str) -> dict:
+    async def _session(self, session_id: str) -> PooledContext:
+        """Return the context bound to a session, checking one out on first use."""
+        # Concurrent first calls (or recycles) of one session must not each check out a context
+        async with self._session_locks.setdefault(session_id, asyncio.Lock()):
+            session = self.sessions.get(session_id)
+            if session is None:
+                with phase("checkout"):
+                    session = await self.pool.checkout(timeout=config.ACTION_TIMEOUT / 1000)
+                self.sessions[session_id] = session
+            elif session.navigations >= self.pool.max_navigations:
+                url = session.page.url
+                session = await self.pool.recycle(session)
+                self.sessions[session_id] = session
+                if url.startswith("http"):
+                    await session.page.goto(url, wait_until="domcontentloaded")
+                    await self._settle(session.page)
+            return session
+
+    async def _page(self, session_id: str) -> Page:
+        return (await self._session(session_id)).page
+
+    async def release_session(self, session_id: str) -> dict:
+        """Return a session's context to the pool for reuse by other sessions."""
+        session = self.sessions.pop(session_id, None)
+        self._session_locks.pop(session_id, None)
+        self._snapshots.pop(session_id, None)
+        self._refs.pop(session_id, None)
+        if self.recorder:
+            self.recorder.forget(session_id)
+        if session is None:
+            return {"status": "error", "message": f"Unknown session: {session_id}"}
+        await self.pool.checkin(session)
+        return {"status": "ok", "session_id": session_id}
+
+    async def _ref_element(self, page: Page, session_id: str, selector: str) -> ElementHandle | None:
+        """Resolve a `ref=N` selector from the last get_page_state; None for CSS selectors."""
+        ref = parse_ref(selector)
+        if ref is None:
+            return None
+        refs = self._refs.get(session_id)
+        if refs is None or refs.url != page.url or ref not in refs.targets:
+            raise StaleRefError(f"Unknown or stale ref {ref}; call get_page_state for fresh refs")
+        element = await resolve_target(page, refs.targets[ref])
+        if element is None:
+            raise StaleRefError(f"Element for ref {ref} is no longer on the page; call get_page_state")
+        return element
+
+    async def navigate(self, url: str, session_id: str = DEFAULT_SESSION) -> dict:
+        page = await self._page(session_id)
+        before = await self._observe(page) if self.recorder else None
+        timeout = await self._timeout("load", url)
+        start = time.perf_counter()
         try:
-            await self.page.click(selector, timeout=config.ACTION_TIMEOUT)
-            await self.page.wait_for_load_state("networkidle", timeout=5000)
-            return {"status": "ok"}
+            with phase("action"):
+                response = await page.goto(url, wait_until="domcontentloaded", timeout=timeout)
+        except PlaywrightTimeoutError:
+            if self.timeouts:
+                await self.timeouts.record_timeout("load", url, timeout, grow=True)
+            raise
+        if self.timeouts:
+            await self.timeouts.record("load", url, (time.perf_counter() - start) * 1000)
+        settle = await self._settle(page)
+        result = {"status": "ok", "url": page.url, "http_status": response.status if response else None, **settle}
+        if before:
+            await self._record(session_id, page, {"action": "navigate", "url": url}, before, result)
+        return result
+
+    async def _timeout(self, kind: str, url: str) -> int:
+        """Learned timeout for the URL's route ("action" or "load"), else ACTION_TIMEOUT."""
+        return await self.timeouts.timeout(kind, url) if self.timeouts else config.ACTION_TIMEOUT
+
+    async def get_timeout_report(self) -> dict:
+        if not self.timeouts:
+            return {"status": "error", "message": "Adaptive timeouts are disabled (ADAPTIVE_TIMEOUTS=false)"}
+        return {"status": "ok", **await self.timeouts.report()}
+
+    async def evaluate(self, script: str, arg=None, session_id: str = DEFAULT_SESSION):
+        """Run a JS function in the session's page and return its result."""
+        page = await self._page(session_id)
+        return await page.evaluate(script, arg)
+
+    async def click(self, selector: str, session_id: str = DEFAULT_SESSION) -> dict:
+        return await self._interact(session_id, "click", selector)
+
+    async def fill(self, selector: str, text: str, session_id: str = DEFAULT_SESSION) -> dict:
+        return await self._interact(session_id, "fill", selector, text)
+
+    async def select(self, selector: str, value: str, session_id: str = DEFAULT_SESSION) -> dict:
+        return await self._interact(session_id, "select", selector, value)
+
+    async def _interact(self, session_id: str, action: str, selector: str, value: str | None = None) -> dict:
+        """Click, fill or select an element given by CSS selector or ref=N, then wait for the page to settle."""
+        step = {"action": action, "selector": selector}
+        if value is not None:
+            step["value"] = value
+        page, before, target = None, None, None
+        url, timeout, element = None, config.ACTION_TIMEOUT, None
+        try:
+            page = await self._page(session_id)
+            url = page.url
+            timeout = await self._timeout("action", url)
+            element = await self._ref_element(page, session_id, selector)
+            if self.recorder:
+                # Recording only observes; the action below takes the same path either way
+                before = await self._observe(page)
+                target = await describe_target(page, element, selector)
+            start = time.perf_counter()
+            with phase("action"):
+                if action == "click":
+                    if element:
+                        await element.click(timeout=timeout)
+                    else:
+                        await page.click(selector, timeout=timeout)
+                elif action == "fill":
+                    if element:
+                        await element.fill(value, timeout=timeout)
+                    else:
+                        await page.fill(selector, value, timeout=timeout)
+                else:
+                    if element:
+                        await element.select_option(value, timeout=timeout)
+                    else:
+                        await page.select_option(selector, value, timeout=timeout)
+            if self.timeouts:
+                await self.timeouts.record("action", url, (time.perf_counter() - start) * 1000)
+            result = {"status": "ok", **await self._settle(page)}
+        except PlaywrightTimeoutError as e:
+            if self.timeouts and url:
+                # A selector that matched nothing is the agent's mistake, not a slow page
+                try:
+                    matched = element is not None or await page.locator(selector).count() > 0
+                except Exception:
+                    matched = False
+                await self.timeouts.record_timeout("action", url, timeout, grow=matched)
+            result = {"status": "error", "message": str(e), "timeout_ms": timeout}
+        except Exception as e:
+            result = {"status": "error", "message": str(e)}
+        if before:
+            if target:
+                step["target"] = target
+            await self._record(session_id, page, step, before, result)
+        return result
+
+    async def _observe(self, page: Page) -> dict:
+        try:
+            return await observe(page)
+        except Exception:
+            return {"url": page.url, "fingerprint": None}  # Context destroyed mid-navigation
+
+    async def _record(self, session_id: str, page: Page, step: dict, before: dict, result: dict):
+        after = await self._observe(page)
+        entry = {
+            **step,
+            "url_before": before["url"],
+            "fingerprint_before": before["fingerprint"],
+            "url_after": after["url"],
+            "fingerprint_after": after["fingerprint"],
+            "status": result["status"],
+        }
+        if "message" in result:
+            entry["message"] = result["message"]
+        self.recorder.record(session_id, entry)
+
+    async def screenshot(
+        self,
+        session_id: str = DEFAULT_SESSION,
+        image_format: str = "png",
+        quality: int | None = None,
+        selector: str = "",
+        full_page: bool = False,
+    ) -> dict:
+        """Capture the viewport, the full page or one element (CSS selector or ref=N).
+
+        Returns the encoded bytes as "data" with a perceptual "hash"; see screenshots.capture.
+        """
+        try:
+            page = await self._page(session_id)
+            box = None
+            if selector:
+                element = await self._ref_element(page, session_id, selector) or await page.query_selector(selector)
+                box = await element.bounding_box() if element else None
+                if box is None:
+                    return {"status": "error", "message": f"No visible element matches {selector}"}
+            blocker = self._blockers.get(page)
+            with phase("screenshot"):
+                if blocker and blocker.blocks_visuals:
+                    async with blocker.visuals_enabled():
+                        await page.evaluate(RELOAD_VISUALS_SCRIPT)
+                        shot = await capture(page, image_format, quality, box, full_page)
+                else:
+                    shot = await capture(page, image_format, quality, box, full_page)
+            return {"status": "ok", "url": page.url, **shot}
         except Exception as e:
             return {"status": "error", "message": str(e)}
 
-    async def fill(self, selector: str, text: str) -> dict:
+    async def visual_check(
+        self,
+        store: BaselineStore,
+        session_id: str = DEFAULT_SESSION,
+        selector: str = "",
+        full_page: bool = False,
+        ignore: list[str] | None = None,
+        tolerance: int = 16,
+        update_baseline: bool = False,
+    ) -> dict:
+        """Compare the viewport, full page or one element with its stored baseline; see visual_diff.compare_with_baseline.
+
+        `ignore` lists CSS selectors whose elements are masked out of the comparison.
+        """
         try:
-            await self.page.fill(selector, text)
-            return {"status": "ok"}
+            page = await self._page(session_id)
+            box = None
+            if selector:
+                element = await self._ref_element(page, session_id, selector) or await page.query_selector(selector)
+                box = await element.bounding_box() if element else None
+                if box is None:
+                    return {"status": "error", "message": f"No visible element matches {selector}"}
+            ignore_boxes = []
+            for css in ignore or []:
+                for element in await page.query_selector_all(css):
+                    bounds = await element.bounding_box()
+                    if bounds:
+                        ignore_boxes.append(bounds)
+            key = baseline_key(page.url, page.viewport_size or {"width": 0, "height": 0}, selector, full_page)
+            blocker = self._blockers.get(page)
+            args = (page, store, key, box, full_page, ignore_boxes, tolerance, update_baseline)
+            with phase("visual_check"):
+                if blocker and blocker.blocks_visuals:
+                    async with blocker.visuals_enabled():
+                        await page.evaluate(RELOAD_VISUALS_SCRIPT)
+                        return await compare_with_baseline(*args)
+                return await compare_with_baseline(*args)
         except Exception as e:
             return {"status": "error", "message": str(e)}
 
-    async def select(self, selector: str, value: str) -> dict:
+    async def check_links(
+        self, session_id: str = DEFAULT_SESSION, urls: list[str] | None = None, include_external: bool = False
+    ) -> dict:
+        """Verify the links on the current page (or `urls`) as the logged-in user.
+
+        Returns only failures and slow responses; results are cached for the life of the controller.
+        """
         try:
-            await self.page.select_option(selector, value)
-            return {"status": "ok"}
+            page = await self._page(session_id)
+            if urls:
+                links = [{"href": url, "text": ""} for url in urls]
+            else:
+                links = await page.evaluate(LINKS_SCRIPT)
+            same_host = None if include_external else urlparse(page.url).hostname
+            with phase("check_links"):
+                return {"status": "ok", **await self.link_checker.check(page.context.request, links, same_host)}
         except Exception as e:
             return {"status": "error", "message": str(e)}
 
-    async def screenshot(self, path: str = "screenshot.png") -> dict:
-        await self.page.screenshot(path=path)
-        return {"status": "ok", "path": path}
+    async def run_actions(self, steps: list[dict], session_id: str = DEFAULT_SESSION, diff: bool = False) -> dict:
+        """Run a sequence of steps in one call, stopping at the first that fails.
+
+        Each step is a dict with an "action" of navigate (url), click (selector),
+        fill (selector, text), select (selector, value), wait (selector, ms, or
+        neither to wait for the page to settle) or assert (any of selector,
+        text, url_contains). Returns per-step results and the final page state.
+        """
+        results = []
+        for i, step in enumerate(steps, start=1):
+            action = step.get("action", "")
+            try:
+                result = await self._run_step(action, step, session_id)
+            except Exception as e:
+                result = {"status": "error", "message": str(e)}
+            results.append({"step": i, "action": action, **result})
+            if result.get("status") != "ok":
+                break
 
-    async def get_page_state(self) -> dict:
-        url = self.page.url
-        title = await self.page.title()
-        html = await self._get_simplified_html()
+        succeeded = len(results) == len(steps) and all(r["status"] == "ok" for r in results)
+        return {
+            "status": "ok" if succeeded else "error",
+            "completed": sum(1 for r in results if r["status"] == "ok"),
+            "results": results,
+            "page_state": await self.get_page_state(session_id=session_id, diff=diff),
+        }
+
+    async def _run_step(self, action: str, step: dict, session_id: str) -> dict:
+        if action == "navigate":
+            return await self.navigate(step["url"], session_id=session_id)
+        if action == "click":
+            return await self.click(step["selector"], session_id=session_id)
+        if action == "fill":
+            return await self.fill(step["selector"], step["text"], session_id=session_id)
+        if action == "select":
+            return await self.select(step["selector"], step["value"], session_id=session_id)
+
+        page = await self._page(session_id)
+        if action == "wait":
+            if "selector" in step:
+                element = await self._ref_element(page, session_id, step["selector"])
+                if element:
+                    await element.wait_for_element_state("visible", timeout=config.ACTION_TIMEOUT)
+                else:
+                    await page.wait_for_selector(step["selector"], timeout=config.ACTION_TIMEOUT)
+                return {"status": "ok"}
+            if "ms" in step:
+                await asyncio.sleep(step["ms"] / 1000)
+                return {"status": "ok"}
+            return {"status": "ok", **await self._settle(page)}
+
+        if action == "assert":
+            failures = []
+            if "selector" in step:
+                element = await self._ref_element(page, session_id, step["selector"])
+                if element:
+                    visible = await element.is_visible()
+                else:
+                    visible = await page.locator(step["selector"]).first.is_visible()
+                if not visible:
+                    failures.append(f"{step['selector']} is not visible")
+            if "text" in step:
+                found = await page.evaluate("(t) => (document.body?.textContent || '').includes(t)", step["text"])
+                if not found:
+                    failures.append(f"text {step['text']!r} not found")
+            if "url_contains" in step and step["url_contains"] not in page.url:
+                failures.append(f"URL {page.url} does not contain {step['url_contains']!r}")
+            if failures:
+                return {"status": "failed", "message": "; ".join(failures)}
+            return {"status": "ok"}
+
+        raise ValueError(f"Unknown action: {action!r}")
+
+    async def get_page_state(
+        self,
+        session_id: str = DEFAULT_SESSION,
+        diff: bool = False,
+        max_chars: int | None = None,
+        page_number: int = 1,
+    ) -> dict:
+        """Return the page's simplified HTML, or only what changed since the last call.
+
+        In diff mode the previous snapshot of the session is used as the base;
+        a URL change (or no previous snapshot) falls back to a full resync.
+        Output is limited to `max_chars` (PAGE_STATE_MAX_CHARS by default, 0
+        for no limit): a diff larger than that also falls back to a full
+        resync, which is ranked so the most useful elements come first;
+        `page_number` pages through the remainder.
+        """
+        page = await self._page(session_id)
+        url = page.url
+        title = await page.title()
+        previous = self._snapshots.get(session_id)
+        version = previous.version + 1 if previous else 1
+        refs = self._refs.setdefault(session_id, RefMap())
+        elements = refs.assign(url, await self._extract_elements(page))
+        snapshot = PageSnapshot(url, elements, version)
+        self._snapshots[session_id] = snapshot
+
+        if max_chars is None:
+            max_chars = config.PAGE_STATE_MAX_CHARS
+        if diff and previous and previous.url == url:
+            changes = diff_snapshots(previous, snapshot)
+            size = sum(len(html) + 1 for part in ("added", "removed", "changed") for html in changes[part])
+            if not max_chars or size <= max_chars:
+                return {"url": url, "title": title, "mode": "diff", "version": version, **changes}
+
+        if max_chars:
+            body = serialize(elements, max_chars, page_number)
+        elif page_number != 1:
+            body = {"status": "error", "message": f"No page {page_number}; this page state has 1", "pages": 1}
+        else:
+            html = snapshot.html()
+            body = {"html": html, "raw_chars": len(html), "emitted_chars": len(html)}
         return {
             "url": url,
             "title": title,
-            "html": html,
+            "mode": "full",
+            "version": version,
+            **body,
         }
 
-    async def _get_simplified_html(self) -> str:
-        """Extract simplified HTML with interactive elements and text."""
-        script = """
-        () => {
-            const elements = [];
-
-            // Get all interactive and content elements
-            const selectors = 'a, button, input, select, textarea, form, h1, h2, h3, h4, label, [role="button"], [onclick]';
-            document.querySelectorAll(selectors).forEach((el, idx) => {
-                const tag = el.tagName.toLowerCase();
-                const text = el.innerText?.slice(0, 100) || '';
-                const attrs = [];
-
-                if (el.id) attrs.push(`id="${el.id}"`);
-                if (el.name) attrs.push(`name="${el.name}"`);
-                if (el.className) attrs.push(`class="${el.className}"`);
-                if (el.type) attrs.push(`type="${el.type}"`);
-                if (el.href) attrs.push(`href="${el.href}"`);
-                if (el.placeholder) attrs.push(`placeholder="${el.placeholder}"`);
-                if (el.value && tag === 'input') attrs.push(`value="${el.value}"`);
-
-                const attrStr = attrs.length ? ' ' + attrs.join(' ') : '';
-                elements.push(`<${tag}${attrStr}>${text.trim()}</${tag}>`);
-            });
-
-            return elements.join('\\n');
-        }
-        """
-        return await self.page.evaluate(script)
+    async def _extract_elements(self, page: Page) -> list[dict]:
+        """Extract interactive and content elements with the configured engine."""
+        with phase("extraction"):
+            return await extract_elements(page, config.EXTRACTION_ENGINE)
 
-    async def login(self) -> dict:
+    async def login(self, session_id: str = DEFAULT_SESSION) -> dict:
         """Log in by injecting a pre-authenticated JWT session cookie.
 
         The site uses Strava OAuth which blocks headless browsers, so we bypass
         by generating a valid JWT session cookie using credentials from config.
+        The token and resulting storage state are cached on disk and seed every
+        context the pool creates, so a warm start is a single navigation.
         """
         try:
-            # Navigate to the site first
-            await self.navigate(config.CRANKCASE_URL)
-            await self.page.wait_for_load_state("networkidle")
-
-            # Generate JWT token
-            payload = {
-                "sub": config.SESSION_USER_ID,
-                "name": config.SESSION_USER_NAME,
-                "exp": int(time.time()) + 60 * 60 * 24 * 7,  # 7 days
-                "iat": int(time.time()),
-            }
-            token = jwt.encode(payload, config.JWT_SECRET, algorithm="HS256")
-
-            # Extract domain from URL
-            parsed = urlparse(config.CRANKCASE_URL)
-            domain = parsed.netloc
-
-            # Inject session cookie
-            await self.page.context.add_cookies([{
-                "name": "session",
-                "value": token,
-                "domain": domain,
-                "path": "/",
-                "httpOnly": True,
-                "secure": parsed.scheme == "https",
-                "sameSite": "Lax",
-            }])
-
-            # Reload to apply the cookie
-            await self.page.reload()
-            await self.page.wait_for_load_state("networkidle")
-
-            # Verify authentication by checking for user name or logout button
-            html = await self.page.content()
-            if config.SESSION_USER_NAME in html or "logout" in html.lower():
-                return {"status": "ok", "url": self.page.url, "user": config.SESSION_USER_NAME}
-            else:
-                return {"status": "error", "message": "Cookie injection succeeded but user not authenticated"}
+            page = await self._page(session_id)
+            cached = self._load_auth()
+            with phase("login"):
+                result = await self._login_with(page, cached)
+                if result["status"] != "ok" and cached:
+                    # Cached session was rejected (e.g. revoked server-side); mint a fresh one
+                    auth_state.invalidate(config.AUTH_CACHE_DIR, config.SESSION_USER_ID, config.JWT_SECRET)
+                    result = await self._login_with(page, None)
+            return result
 
         except Exception as e:
             return {"status": "error", "message": str(e)}
+
+    def _load_auth(self) -> dict | None:
+        return auth_state.load(
+            config.AUTH_CACHE_DIR, config.SESSION_USER_ID, config.JWT_SECRET, config.AUTH_REFRESH_MARGIN
+        )
+
+    async def _login_with(self, page: Page, cached: dict | None) -> dict:
+        if cached:
+            token, exp = cached["token"], cached["exp"]
+        else:
+            token, exp = auth_state.mint_token(config.SESSION_USER_ID, config.SESSION_USER_NAME, config.JWT_SECRET)
+
+        # Extract domain from URL
+        parsed = urlparse(config.CRANKCASE_URL)
+        domain = parsed.netloc
+
+        # Inject session cookie before the first request so one navigation suffices
+        await page.context.add_cookies([{
+            "name": "session",
+            "value": token,
+            "domain": domain,
+            "path": "/",
+            "httpOnly": True,
+            "secure": parsed.scheme == "https",
+            "sameSite": "Lax",
+        }])
+
+        await page.goto(config.CRANKCASE_URL, wait_until="domcontentloaded")
+        settle = await self._settle(page)
+
+        # Verify authentication by checking for user name or logout control
+        if not await page.evaluate(AUTH_CHECK_SCRIPT, config.SESSION_USER_NAME):
+            return {"status": "error", "message": "Cookie injection succeeded but user not authenticated"}
+
+        self._storage_state = await page.context.storage_state()
+        auth_state.save(
+            config.AUTH_CACHE_DIR, config.SESSION_USER_ID, config.JWT_SECRET, token, exp, self._storage_state
+        )
+        return {
+            "status": "ok",
+            "url": page.url,
+            "user": config.SESSION_USER_NAME,
+            "cached": cached is not None,
+            "settle_ms": settle["settle_ms"],
+        }
@@ -4,18 +4,55 @@
 import asyncio
 import os
 import atexit
+from contextlib import asynccontextmanager
 from mcp.server.fastmcp import FastMCP
-from browser import BrowserController
+from metrics import Metrics
+from browser import BrowserController, DEFAULT_SESSION
+from coordination import RunCoordinator
+from crawler import SiteCrawler, SiteMapCache
+from filing_queue import FilingQueue
+from recorder import TraceRecorder
 from github_reporter import GitHubReporter
+from screenshots import ScreenshotStore
+from visual_diff import BaselineStore
 from config import config
 
-mcp = FastMCP("crankcase-qa")
-
 # Global state
 browser: BrowserController | None = None
+launch: asyncio.Task | None = None  # Browser start + login, possibly begun at server startup
 reporter: GitHubReporter | None = None
+filing_queue: FilingQueue | None = None
+screenshot_store: ScreenshotStore | None = None
+coordinator: RunCoordinator | None = None  # Shared with the other shards of a sharded run
 dry_run: bool = os.environ.get("DRY_RUN", "").lower() in ("1", "true", "yes")
-issues_created: int = 0
+
+
+async def _launch_browser(headless: bool) -> dict:
+    global browser
+    recorder = TraceRecorder(config.RECORD_DIR) if config.RECORD_TRACES else None
+    controller = BrowserController(headless=headless, recorder=recorder)
+    await controller.start()
+    result = await controller.login()
+    browser = controller
+    return result
+
+
+@asynccontextmanager
+async def lifespan(server: FastMCP):
+    """With PREWARM_BROWSER, launch and log in while the client is still connecting."""
+    global launch
+    if config.PREWARM_BROWSER:
+        launch = asyncio.create_task(_launch_browser(config.PREWARM_HEADLESS))
+    try:
+        yield {}
+    finally:
+        if launch and not launch.done():
+            launch.cancel()
+
+
+mcp = FastMCP("crankcase-qa", lifespan=lifespan)
+metrics = Metrics("crankcase-qa")
+tool = metrics.instrument(mcp)
 
 
 def cleanup():
@@ -36,18 +73,37 @@ def cleanup():
 atexit.register(cleanup)
 
 
-@mcp.tool()
-async def start_browser(headless: bool = False) -> str:
-    """Start the browser and log in to the application. Call this first before any other browser tools."""
-    global browser, reporter
-
-    if browser:
+async def _start_session(session_id: str) -> str:
+    """Check out a pooled, pre-authenticated context for an extra session."""
+    if session_id == DEFAULT_SESSION:
         return "Browser already running"
+    if session_id in browser.sessions:
+        return f"Session {session_id} already running"
+    result = await browser.navigate(config.CRANKCASE_URL, session_id=session_id)
+    return f"Session {session_id} started. URL: {result.get('url')}"
+
+
+@tool()
+async def start_browser(headless: bool = False, session_id: str = DEFAULT_SESSION) -> str:
+    """Start the browser and log in to the application. Call this first before any other browser tools.
 
-    browser = BrowserController(headless=headless)
-    await browser.start()
-    result = await browser.login()
-    reporter = GitHubReporter()
+    Pass a session_id to open an additional, already logged-in session that can be driven in parallel.
+    If the server prewarmed a browser, it is reused as is and `headless` is ignored.
+    """
+    global launch
+
+    if browser:
+        return await _start_session(session_id)
+
+    if launch is None:
+        launch = asyncio.create_task(_launch_browser(headless))
+    try:
+        result = await asyncio.shield(launch)
+    except Exception:
+        launch = None
+        raise
+    if session_id != DEFAULT_SESSION:
+        await _start_session(session_id)
 
     status = result.get("status", "unknown")
     if status == "ok":
@@ -56,115 +112,333 @@ async def start_browser(headless: bool = False) -> str:
         return f"Browser started but login failed: {result.get('message', 'unknown error')}. Continuing anyway."
 
 
-@mcp.tool()
-async def stop_browser() -> str:
-    """Close the browser when done testing. Call this when finished."""
-    global browser
+@tool()
+async def stop_browser(session_id: str = "") -> str:
+    """Close the browser when done testing. Call this when finished. Pass a session_id to release only that session.
+
+    Waits for queued bug and feature reports to finish filing.
+    """
+    global browser, launch, reporter
 
     if not browser:
         return "Browser not running"
 
+    if session_id:
+        result = await browser.release_session(session_id)
+        return f"Session {session_id} released" if result["status"] == "ok" else result["message"]
+
     await browser.stop()
     browser = None
-    return "Browser closed"
+    launch = None
+    if screenshot_store:
+        await screenshot_store.flush()
+
+    summary = ""
+    if filing_queue:
+        try:
+            await filing_queue.flush(timeout=60)
+        except asyncio.TimeoutError:
+            # Closing the client now would fail reports whose POST may already have reached GitHub
+            return (
+                f"Browser closed. {filing_queue.pending_count} report(s) are still being filed in the background; "
+                "check get_report_status."
+            )
+        summary = f" {filing_queue.created_count} issue(s) filed."
+    if reporter:
+        await reporter.client.aclose()
+        reporter = None
+    return "Browser closed." + summary
+
+
+@tool()
+async def get_page_state(
+    diff: bool = False, max_chars: int | None = None, page: int = 1, session_id: str = DEFAULT_SESSION
+) -> dict:
+    """Get the current page URL, title, and simplified HTML showing interactive elements.
+
+    Each element carries a ref="N"; pass selector "ref=N" to click/fill/select to target it directly.
+
+    Pass diff=true after an action on the same page to get only the elements added, removed or changed;
+    a diff over the size limit comes back as full output instead ("mode": "full").
+    Full output is size-limited with the most relevant elements first; if "pages" > 1, pass page=2, 3, ...
+    up to "pages" for the rest. max_chars overrides the size limit (0 = unlimited).
+
+    In a sharded run, "covered_by_shards" lists the other shards that already inspected this kind of page.
+    """
+    if not browser:
+        return {"error": "Browser not started. Call start_browser first."}
+    state = await browser.get_page_state(
+        session_id=session_id, diff=diff, max_chars=max_chars, page_number=page
+    )
+    if _coordinator() and state.get("url") and page == 1:
+        covered_by = await _coordinator().visit(state["url"])
+        if covered_by:
+            state["covered_by_shards"] = covered_by
+    return state
+
+
+@tool()
+async def navigate(url: str, session_id: str = DEFAULT_SESSION) -> dict:
+    """Navigate to a URL."""
+    if not browser:
+        return {"error": "Browser not started. Call start_browser first."}
+    return await browser.navigate(url, session_id=session_id)
 
 
-@mcp.tool()
-async def get_page_state() -> dict:
-    """Get the current page URL, title, and simplified HTML showing interactive elements."""
+@tool()
+async def click(selector: str, session_id: str = DEFAULT_SESSION) -> dict:
+    """Click on an element using a CSS selector, or ref=N from get_page_state."""
     if not browser:
         return {"error": "Browser not started. Call start_browser first."}
-    return await browser.get_page_state()
+    return await browser.click(selector, session_id=session_id)
 
 
-@mcp.tool()
-async def navigate(url: str) -> dict:
-    """Navigate to a URL."""
+@tool()
+async def fill(selector: str, text: str, session_id: str = DEFAULT_SESSION) -> dict:
+    """Fill a text input field (CSS selector or ref=N) with the given text."""
     if not browser:
         return {"error": "Browser not started. Call start_browser first."}
-    return await browser.navigate(url)
+    return await browser.fill(selector, text, session_id=session_id)
 
 
-@mcp.tool()
-async def click(selector: str) -> dict:
-    """Click on an element using a CSS selector."""
+@tool()
+async def select(selector: str, value: str, session_id: str = DEFAULT_SESSION) -> dict:
+    """Select an option from a dropdown (CSS selector or ref=N) by value."""
     if not browser:
         return {"error": "Browser not started. Call start_browser first."}
-    return await browser.click(selector)
+    return await browser.select(selector, value, session_id=session_id)
 
 
-@mcp.tool()
-async def fill(selector: str, text: str) -> dict:
-    """Fill a text input field with the given text."""
+@tool()
+async def run_actions(steps: list[dict], diff: bool = False, session_id: str = DEFAULT_SESSION) -> dict:
+    """Run several browser steps in one call, stopping at the first failure. Returns per-step results and the final page state.
+
+    Each step is an object with "action" and its arguments:
+    {"action": "navigate", "url": ...}, {"action": "click", "selector": ...},
+    {"action": "fill", "selector": ..., "text": ...}, {"action": "select", "selector": ..., "value": ...},
+    {"action": "wait", "selector": ...} or {"action": "wait", "ms": ...} or {"action": "wait"} (until the page settles),
+    {"action": "assert", "selector": ..., "text": ..., "url_contains": ...} (any combination).
+    Selectors may be CSS or ref=N. Pass diff=true to get the final page state as a diff.
+    """
     if not browser:
         return {"error": "Browser not started. Call start_browser first."}
-    return await browser.fill(selector, text)
+    return await browser.run_actions(steps, session_id=session_id, diff=diff)
+
 
+@tool()
+async def get_diagnostics(since: int = 0, session_id: str = "") -> dict:
+    """Get JS console errors, uncaught page errors, failed requests, 4xx/5xx responses and slow requests.
 
-@mcp.tool()
-async def select(selector: str, value: str) -> dict:
-    """Select an option from a dropdown by value."""
+    Cheap to call after each action. Pass the returned "cursor" as since next time to get only new entries;
+    "missed" counts entries that were dropped from the buffer before you saw them. Pass a session_id to
+    only see that session's entries; "missed" still counts dropped entries of all sessions, since dropped
+    entries can't be attributed, so treat it as an upper bound.
+    """
     if not browser:
         return {"error": "Browser not started. Call start_browser first."}
-    return await browser.select(selector, value)
+    return browser.get_diagnostics(since, session_id or None)
 
 
-@mcp.tool()
-async def screenshot() -> dict:
-    """Take a screenshot of the current page. Use sparingly - only when you suspect a visual bug."""
+@tool()
+async def get_timeout_report() -> dict:
+    """Get the learned per-route timeouts: samples, p50/p95 latency, current timeout and how often it was hit.
+
+    Routes are origin plus URL template (https://site/bikes/:id); "action" is click/fill/select on that page,
+    "load" is navigating to it.
+    Routes that hit timeouts come first.
+    """
     if not browser:
         return {"error": "Browser not started. Call start_browser first."}
+    return await browser.get_timeout_report()
 
-    os.makedirs("screenshots", exist_ok=True)
 
-    # Find next available screenshot number
-    existing = [f for f in os.listdir("screenshots") if f.startswith("screenshot_")]
-    num = len(existing) + 1
-    path = f"screenshots/screenshot_{num}.png"
+@tool()
+async def check_links(urls: list[str] | None = None, include_external: bool = False, session_id: str = DEFAULT_SESSION) -> dict:
+    """Check every link on the current page (or the given urls) for broken targets, in parallel, as the logged-in user.
 
-    result = await browser.screenshot(path)
-    result["note"] = "Screenshot saved. Describe what you expected to see vs what appears."
-    return result
+    Returns only failures (4xx/5xx or unreachable) and slow responses. Links to other sites are skipped
+    unless include_external=true. Links that would log out or change data (logout, delete, ...) are never
+    requested and come back in "skipped_unsafe"; verify those by hand. Each URL is checked once per browser run.
+    """
+    if not browser:
+        return {"error": "Browser not started. Call start_browser first."}
+    return await browser.check_links(session_id=session_id, urls=urls, include_external=include_external)
 
 
-@mcp.tool()
-def report_bug(title: str, description: str, steps_to_reproduce: str) -> dict:
-    """Report a bug found during testing. Include specific steps to reproduce."""
-    global issues_created
+@tool()
+async def get_site_map(refresh: bool = False, max_depth: int | None = None, max_pages: int | None = None) -> dict:
+    """Get a map of the logged-in app: one entry per route template (e.g. /bikes/:id) with title, headings,
+    form/input/button counts, load time and which routes it links to. Start exploring from this.
 
-    if not reporter:
+    Built by a parallel breadth-first crawl from the app's start page and cached on disk; pass refresh=true
+    to recrawl, or max_depth/max_pages to change the crawl bounds. Logout and delete-style links are not followed.
+    """
+    if not browser:
+        return {"error": "Browser not started. Call start_browser first."}
+
+    cache = SiteMapCache(config.CRAWL_CACHE_DIR, config.CRAWL_CACHE_TTL)
+    if not refresh and max_depth is None and max_pages is None:
+        site_map = cache.load(config.CRANKCASE_URL, config.SESSION_USER_ID)
+        if site_map:
+            return {**site_map, "cached": True}
+
+    # Leave pool slots for the sessions already in use
+    concurrency = min(config.CRAWL_CONCURRENCY, max(1, browser.pool_size - len(browser.sessions)))
+    crawler = SiteCrawler(
+        browser,
+        max_depth=config.CRAWL_MAX_DEPTH if max_depth is None else max_depth,
+        max_pages=config.CRAWL_MAX_PAGES if max_pages is None else max_pages,
+        concurrency=concurrency,
+    )
+    site_map = await crawler.crawl(config.CRANKCASE_URL)
+    cache.save(config.CRANKCASE_URL, config.SESSION_USER_ID, site_map)
+    return {**site_map, "cached": False}
+
+
+def _screenshot_store() -> ScreenshotStore:
+    global screenshot_store
+    if screenshot_store is None:
+        screenshot_store = ScreenshotStore(config.SCREENSHOT_DIR, config.SCREENSHOT_DEDUP_DISTANCE)
+    return screenshot_store
+
+
+@tool()
+async def screenshot(selector: str = "", full_page: bool = False, session_id: str = DEFAULT_SESSION) -> dict:
+    """Take a screenshot of the current page. Use sparingly - only when you suspect a visual bug.
+
+    Captures the viewport by default; pass a selector (CSS or ref=N) to capture just that element,
+    or full_page=true for the whole page. A near-identical earlier screenshot is reused, not saved again.
+    """
+    if not browser:
+        return {"error": "Browser not started. Call start_browser first."}
+
+    result = await browser.screenshot(
+        session_id=session_id,
+        image_format=config.SCREENSHOT_FORMAT,
+        quality=config.SCREENSHOT_QUALITY,
+        selector=selector,
+        full_page=full_page,
+    )
+    if result["status"] != "ok":
+        return result
+
+    saved = _screenshot_store().save(result, result["url"])
+    return {
+        "status": "ok",
+        **saved,
+        "note": "Screenshot saved. Describe what you expected to see vs what appears.",
+    }
+
+
+@tool()
+async def visual_check(
+    selector: str = "",
+    full_page: bool = False,
+    ignore: list[str] | None = None,
+    update_baseline: bool = False,
+    session_id: str = DEFAULT_SESSION,
+) -> dict:
+    """Compare the page with its stored baseline screenshot and get a summary of what changed, not an image.
+
+    The first check of a URL (per viewport and selector) records the baseline. Later checks return
+    "match" or "changed" with bounding boxes of changed regions. Pass a selector (CSS or ref=N) to check
+    one element, full_page=true for the whole page, ignore=[CSS selectors] to mask dynamic content
+    (timestamps, avatars), and update_baseline=true to accept the current rendering as the new baseline.
+    """
+    if not browser:
+        return {"error": "Browser not started. Call start_browser first."}
+    return await browser.visual_check(
+        BaselineStore(config.VISUAL_BASELINE_DIR),
+        session_id=session_id,
+        selector=selector,
+        full_page=full_page,
+        ignore=ignore,
+        tolerance=config.VISUAL_TOLERANCE,
+        update_baseline=update_baseline,
+    )
+
+
+def _coordinator() -> RunCoordinator | None:
+    """The run's shared coordination store, when this server is one shard of a sharded run."""
+    global coordinator
+    if coordinator is None and config.RUN_ID:
+        coordinator = RunCoordinator(
+            config.COORDINATION_DB, config.RUN_ID, config.SHARD_ID, config.MAX_ISSUES, config.DEDUP_THRESHOLD
+        )
+    return coordinator
+
+
+def _filing_queue() -> FilingQueue:
+    """Create the GitHub reporter on the first report, and the queue that files through it."""
+    global reporter, filing_queue
+    if reporter is None:
+        reporter = GitHubReporter()
+    if filing_queue is None:
+        filing_queue = FilingQueue(
+            reporter, config.MAX_ISSUES, config.DEDUP_THRESHOLD, coordinator=_coordinator()
+        )
+    # The queue outlives browser restarts so MAX_ISSUES counts across them
+    filing_queue.reporter = reporter
+    return filing_queue
+
+
+@tool()
+async def report_bug(title: str, description: str, steps_to_reproduce: str) -> dict:
+    """Report a bug found during testing. Include specific steps to reproduce.
+
+    Returns immediately with a pending report ID; the issue is filed in the background.
+    """
+    if not browser:
         return {"error": "Browser not started. Call start_browser first."}
 
     if dry_run:
         return {"status": "dry_run", "would_create": "bug", "title": title}
 
-    if issues_created >= config.MAX_ISSUES:
-        return {"status": "skipped", "reason": f"Max issues ({config.MAX_ISSUES}) already created"}
-
-    result = reporter.create_bug(title, description, steps_to_reproduce)
-    if result.get("status") == "created":
-        issues_created += 1
-    return result
+    return await _filing_queue().submit("bug", title, description, steps_to_reproduce)
 
 
-@mcp.tool()
-def report_feature_request(title: str, description: str, rationale: str) -> dict:
-    """Suggest a feature or improvement. Explain what it should do and why it would be valuable."""
-    global issues_created
+@tool()
+async def report_feature_request(title: str, description: str, rationale: str) -> dict:
+    """Suggest a feature or improvement. Explain what it should do and why it would be valuable.
 
-    if not reporter:
+    Returns immediately with a pending report ID; the issue is filed in the background.
+    """
+    if not browser:
         return {"error": "Browser not started. Call start_browser first."}
 
     if dry_run:
         return {"status": "dry_run", "would_create": "feature_request", "title": title}
 
-    if issues_created >= config.MAX_ISSUES:
-        return {"status": "skipped", "reason": f"Max issues ({config.MAX_ISSUES}) already created"}
+    return await _filing_queue().submit("feature_request", title, description, rationale)
 
-    result = reporter.create_feature_request(title, description, rationale)
-    if result.get("status") == "created":
-        issues_created += 1
-    return result
+
+@tool()
+async def get_report_status(report_id: str = "") -> dict:
+    """Get the final status and issue URL of a filed report, or of all reports if no ID is given."""
+    if not filing_queue:
+        return {"reports": []}
+    result = filing_queue.status(report_id)
+    return {"reports": result} if isinstance(result, list) else result
+
+
+@tool()
+async def get_coverage() -> dict:
+    """In a sharded run, get the pages (route templates) every shard has inspected and the run's remaining issue budget.
+
+    Prefer routes no shard has covered yet. Outside a sharded run there is nothing to coordinate.
+    """
+    if not _coordinator():
+        return {"status": "error", "message": "Not a sharded run (RUN_ID is not set)"}
+    return await _coordinator().coverage()
+
+
+@tool()
+def get_metrics() -> dict:
+    """Get per-tool call counts, latency percentiles/histograms, payload sizes, errors and sub-phase timings."""
+    summary = metrics.summary()
+    if browser and browser.response_cache:
+        summary["response_cache"] = browser.response_cache.stats()
+    return summary
 
 
 if __name__ == "__main__":
@@ -0,0 +1,91 @@
+import asyncio
+from typing import Awaitable, Callable
+
+from playwright.async_api import BrowserContext, Page
+
+
+class PooledContext:
+    """A browser context and its working page, checked out from a ContextPool."""
+
+    def __init__(self, context: BrowserContext, page: Page):
+        self.context = context
+        self.page = page
+        self.navigations = 0
+        page.on("framenavigated", self._on_navigated)
+
+    def _on_navigated(self, frame):
+        if frame == self.page.main_frame:
+            self.navigations += 1
+
+    async def is_healthy(self) -> bool:
+        """Cheap liveness probe: the page is open and still runs script."""
+        if self.page.is_closed():
+            return False
+        try:
+            await asyncio.wait_for(self.page.evaluate("1"), timeout=2)
+            return True
+        except Exception:
+            return False
+
+    async def close(self):
+        try:
+            await self.context.close()
+        except Exception:
+            pass  # Context may already be gone with the browser
+
+
+class ContextPool:
+    """Bounded pool of browser contexts sharing a single Chromium process.
+
+    At most `size` contexts are checked out at once; further checkouts wait
+    for a return. Idle contexts are health-checked before reuse and recycled
+    once they have served `max_navigations` navigations.
+    """
+
+    def __init__(
+        self,
+        context_factory: Callable[[], Awaitable[PooledContext]],
+        size: int,
+        max_navigations: int,
+    ):
+        self._new_context = context_factory
+        self.size = size
+        self.max_navigations = max_navigations
+        self._idle: list[PooledContext] = []
+        self._slots = asyncio.Semaphore(size)
+        self._closed = False
+
+    async def checkout(self, timeout: float | None = None) -> PooledContext:
+        """Take a healthy context from the pool, creating one if none are idle."""
+        await asyncio.wait_for(self._slots.acquire(), timeout)
+        try:
+            while self._idle:
+                ctx = self._idle.pop()
+                if await ctx.is_healthy():
+                    return ctx
+                await ctx.close()
+            return await self._new_context()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def checkin(self, ctx: PooledContext):
+        """Return a context to the pool, closing it if worn out or broken."""
+        try:
+            if self._closed or ctx.navigations >= self.max_navigations or not await ctx.is_healthy():
+                await ctx.close()
+            else:
+                self._idle.append(ctx)
+        finally:
+            self._slots.release()
+
+    async def recycle(self, ctx: PooledContext) -> PooledContext:
+        """Replace a checked-out context with a fresh one, keeping its slot."""
+        await ctx.close()
+        return await self._new_context()
+
+    async def close(self):
+        self._closed = True
+        for ctx in self._idle:
+            await ctx.close()
+        self._idle.clear()
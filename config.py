@@ -4,20 +4,130 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
+class Required:
+    """A mandatory env var, read on first access so importing config never fails.
+
+    Servers can start, and tools that don't need a value can run, before it is set.
+    """
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, owner=None) -> str:
+        try:
+            value = os.environ[self.name]
+        except KeyError:
+            raise RuntimeError(f"{self.name} is not set; add it to the environment or .env") from None
+        if obj is not None:
+            obj.__dict__[self.name] = value  # Cache; shadows this (non-data) descriptor
+        return value
+
+
 class Config:
-    CRANKCASE_URL: str = os.environ["CRANKCASE_URL"]
-    GITHUB_TOKEN: str = os.environ["GITHUB_TOKEN"]
-    GITHUB_REPO: str = os.environ["GITHUB_REPO"]
+    CRANKCASE_URL: str = Required()
+    GITHUB_TOKEN: str = Required()
+    GITHUB_REPO: str = Required()
+    GITHUB_API_URL: str = os.environ.get("GITHUB_API_URL", "https://api.github.com")
 
     # JWT session authentication (for sites using Strava OAuth)
-    JWT_SECRET: str = os.environ["JWT_SECRET"]
-    SESSION_USER_ID: str = os.environ["SESSION_USER_ID"]
-    SESSION_USER_NAME: str = os.environ["SESSION_USER_NAME"]
+    JWT_SECRET: str = Required()
+    SESSION_USER_ID: str = Required()
+    SESSION_USER_NAME: str = Required()
+
+    # Cached session token and storage state, reused until AUTH_REFRESH_MARGIN before expiry
+    AUTH_CACHE_DIR: str = os.environ.get("AUTH_CACHE_DIR", ".cache/auth")
+    AUTH_REFRESH_MARGIN: int = int(os.environ.get("AUTH_REFRESH_MARGIN", "3600"))  # seconds
+
+    # Minimum similarity (0-1) for a new issue to count as a duplicate of an open one
+    DEDUP_THRESHOLD: float = float(os.environ.get("DEDUP_THRESHOLD", "0.6"))
 
     # Defaults
     MAX_STEPS: int = int(os.environ.get("MAX_STEPS", "100"))
     MAX_ISSUES: int = int(os.environ.get("MAX_ISSUES", "10"))
     ACTION_TIMEOUT: int = int(os.environ.get("ACTION_TIMEOUT", "30000"))  # ms
 
+    # Per-route click/fill/select and navigation timeouts: a high percentile of the route's observed
+    # latencies (with headroom) clamped to the floor/ceiling; ACTION_TIMEOUT until a route has history
+    ADAPTIVE_TIMEOUTS: bool = os.environ.get("ADAPTIVE_TIMEOUTS", "true").lower() in ("1", "true", "yes")
+    TIMEOUT_STORE_PATH: str = os.environ.get("TIMEOUT_STORE_PATH", ".cache/timeouts.sqlite3")
+    TIMEOUT_FLOOR_MS: int = int(os.environ.get("TIMEOUT_FLOOR_MS", "2000"))
+    TIMEOUT_CEILING_MS: int = int(os.environ.get("TIMEOUT_CEILING_MS", os.environ.get("ACTION_TIMEOUT", "30000")))
+
+    # Sharded runs (run.sh with SHARDS > 1): MCP servers with the same RUN_ID share the MAX_ISSUES
+    # budget, duplicate checks of in-flight reports and page coverage through COORDINATION_DB
+    RUN_ID: str | None = os.environ.get("RUN_ID") or None
+    SHARD_ID: str = os.environ.get("SHARD_ID", "0")
+    COORDINATION_DB: str = os.environ.get("COORDINATION_DB", ".cache/coordination.sqlite3")
+
+    # Launch the browser and log in in the background as soon as an MCP server starts
+    PREWARM_BROWSER: bool = os.environ.get("PREWARM_BROWSER", "").lower() in ("1", "true", "yes")
+    PREWARM_HEADLESS: bool = os.environ.get("PREWARM_HEADLESS", "true").lower() in ("1", "true", "yes")
+
+    # Browser context pool (parallel sessions within one Chromium)
+    BROWSER_POOL_SIZE: int = int(os.environ.get("BROWSER_POOL_SIZE", "4"))
+    CONTEXT_MAX_NAVIGATIONS: int = int(os.environ.get("CONTEXT_MAX_NAVIGATIONS", "200"))
+
+    # Page extraction engine: "js" (innerText per element) or "cdp" (one DOMSnapshot)
+    EXTRACTION_ENGINE: str = os.environ.get("EXTRACTION_ENGINE", "js")
+    # Size budget for get_page_state output; 0 disables ranking and paging
+    PAGE_STATE_MAX_CHARS: int = int(os.environ.get("PAGE_STATE_MAX_CHARS", "12000"))
+
+    # Settle detection: page is quiet after SETTLE_QUIET_MS without requests or DOM mutations
+    SETTLE_QUIET_MS: int = int(os.environ.get("SETTLE_QUIET_MS", "300"))
+    SETTLE_TIMEOUT: int = int(os.environ.get("SETTLE_TIMEOUT", "5000"))  # ms
+    # Comma-separated URL substrings for background traffic that never goes idle
+    SETTLE_IGNORE_URLS: list[str] = [
+        u.strip() for u in os.environ.get("SETTLE_IGNORE_URLS", "").split(",") if u.strip()
+    ]
+
+    # Console/page errors and failed, 4xx/5xx or slow (>= SLOW_REQUEST_MS) requests kept for get_diagnostics
+    DIAGNOSTICS_BUFFER_SIZE: int = int(os.environ.get("DIAGNOSTICS_BUFFER_SIZE", "500"))
+    SLOW_REQUEST_MS: int = int(os.environ.get("SLOW_REQUEST_MS", "3000"))
+
+    # Parallel requests for check_links; links at or above SLOW_REQUEST_MS are reported as slow
+    LINK_CHECK_CONCURRENCY: int = int(os.environ.get("LINK_CHECK_CONCURRENCY", "8"))
+
+    # Site map crawl (get_site_map): parallel sessions, bounds, and how long a cached map is reused
+    CRAWL_CONCURRENCY: int = int(os.environ.get("CRAWL_CONCURRENCY", "3"))
+    CRAWL_MAX_DEPTH: int = int(os.environ.get("CRAWL_MAX_DEPTH", "2"))
+    CRAWL_MAX_PAGES: int = int(os.environ.get("CRAWL_MAX_PAGES", "50"))
+    CRAWL_CACHE_DIR: str = os.environ.get("CRAWL_CACHE_DIR", ".cache/sitemap")
+    CRAWL_CACHE_TTL: int = int(os.environ.get("CRAWL_CACHE_TTL", "86400"))  # seconds
+
+    # Screenshots: png, jpeg or webp; quality (0-100) applies to jpeg/webp.
+    # A byte-identical capture of the same URL is not saved again. SCREENSHOT_DEDUP_DISTANCE > 0 also
+    # treats captures within that many bits (of a 64-bit perceptual hash) as duplicates; -1 disables dedup.
+    SCREENSHOT_DIR: str = os.environ.get("SCREENSHOT_DIR", "screenshots")
+    SCREENSHOT_FORMAT: str = os.environ.get("SCREENSHOT_FORMAT", "jpeg")
+    SCREENSHOT_QUALITY: int = int(os.environ.get("SCREENSHOT_QUALITY", "80"))
+    SCREENSHOT_DEDUP_DISTANCE: int = int(os.environ.get("SCREENSHOT_DEDUP_DISTANCE", "0"))
+
+    # Visual regression baselines; a pixel changed when a channel differs by more than the tolerance (0-255)
+    VISUAL_BASELINE_DIR: str = os.environ.get("VISUAL_BASELINE_DIR", "baselines")
+    VISUAL_TOLERANCE: int = int(os.environ.get("VISUAL_TOLERANCE", "16"))
+
+    # Record every session's actions to RECORD_DIR for `python -m replay`
+    RECORD_TRACES: bool = os.environ.get("RECORD_TRACES", "").lower() in ("1", "true", "yes")
+    RECORD_DIR: str = os.environ.get("RECORD_DIR", "recordings")
+
+    # Response cache: "off", "on" (serve hits, store misses) or "offline" (serve hits, abort misses).
+    # RESPONSE_CACHE_TYPES lists the resource types stored ("*" for all, e.g. to capture an offline
+    # snapshot); entries are dropped when the site's build changes (RESPONSE_CACHE_BUILD_ID overrides).
+    RESPONSE_CACHE: str = os.environ.get("RESPONSE_CACHE", "off")
+    RESPONSE_CACHE_PATH: str = os.environ.get("RESPONSE_CACHE_PATH", ".cache/responses.sqlite3")
+    RESPONSE_CACHE_TYPES: str = os.environ.get("RESPONSE_CACHE_TYPES", "script,stylesheet,image,font,media")
+    RESPONSE_CACHE_BUILD_ID: str | None = os.environ.get("RESPONSE_CACHE_BUILD_ID")
+    RESPONSE_CACHE_MAX_MB: int = int(os.environ.get("RESPONSE_CACHE_MAX_MB", "512"))
+    RESPONSE_CACHE_MAX_ENTRY_MB: int = int(os.environ.get("RESPONSE_CACHE_MAX_ENTRY_MB", "8"))
+
+    # Request interception. Unset BLOCK_RESOURCE_TYPES means "image,font,media" when headless.
+    BLOCK_RESOURCE_TYPES: str | None = os.environ.get("BLOCK_RESOURCE_TYPES")
+    BLOCK_DOMAINS: list[str] = [
+        d.strip() for d in os.environ.get(
+            "BLOCK_DOMAINS",
+            "google-analytics.com,googletagmanager.com,doubleclick.net,segment.io,hotjar.com,facebook.net",
+        ).split(",") if d.strip()
+    ]
+
 
 config = Config()
@@ -0,0 +1,214 @@
+"""State shared by the shards of one sharded QA run.
+
+`run.sh` with SHARDS > 1 starts several agents, each with its own MCP
+server and browser, under one RUN_ID. They coordinate through a local
+SQLite database:
+
+- reports: every report a shard queues is reserved here first. The
+  reservation checks the run's MAX_ISSUES budget and looks for duplicates
+  among the reports in flight or filed by any shard. The check and the
+  insert happen in one write transaction, so two shards can't both take
+  the last slot or both file the same bug. Failed reports give their slot
+  back, and so do reports still pending after PENDING_TIMEOUT (their shard
+  died or was killed before it could record the outcome).
+- visits: the route templates each shard has inspected. Shards see when a
+  page was already covered by another shard and can move on.
+
+The database is shared by every shard and can be busy, so the MCP server's
+calls run on a worker thread instead of blocking its event loop.
+
+Run `python -m coordination RUN_ID` for a summary of a run.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+from crawler import route_template
+from dedup_index import DedupIndex
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL,
+    shard TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL,
+    status TEXT NOT NULL,
+    url TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS reports_run ON reports (run_id, status);
+CREATE TABLE IF NOT EXISTS visits (
+    run_id TEXT NOT NULL,
+    route TEXT NOT NULL,
+    shard TEXT NOT NULL,
+    url TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    first_at REAL NOT NULL,
+    PRIMARY KEY (run_id, route, shard)
+);
+"""
+
+LIVE_STATUSES = ("pending", "created")
+PENDING_TIMEOUT = 1800  # s; filing with retries takes minutes, so a pending row this old was abandoned
+
+
+class RunCoordinator:
+    def __init__(
+        self,
+        path: str,
+        run_id: str,
+        shard: str,
+        max_issues: int,
+        dedup_threshold: float,
+        pending_timeout: float = PENDING_TIMEOUT,
+    ):
+        self.run_id = run_id
+        self.shard = shard
+        self.max_issues = max_issues
+        self.dedup_threshold = dedup_threshold
+        self.pending_timeout = pending_timeout
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Autocommit mode, so transactions are opened explicitly with BEGIN IMMEDIATE
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(SCHEMA)
+
+    def _write(self, work):
+        """Run `work` in a transaction that holds the database write lock from the start."""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                result = work()
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+            return result
+
+    async def reserve(self, kind: str, title: str, description: str) -> dict:
+        """Claim a slot of the run's budget for a report.
+
+        Returns status "reserved" with the report's id, "duplicate" with the
+        shard that reported it first, or "budget_exhausted".
+        """
+        return await asyncio.to_thread(self._reserve, kind, title, description)
+
+    def _reserve(self, kind: str, title: str, description: str) -> dict:
+        def work():
+            # Reclaim the slots of reports whose shard never recorded an outcome
+            self._db.execute(
+                "UPDATE reports SET status = 'expired' WHERE run_id = ? AND status = 'pending' AND created_at < ?",
+                (self.run_id, time.time() - self.pending_timeout),
+            )
+            # At most max_issues rows are live, so rebuilding the index is cheap
+            live = self._db.execute(
+                "SELECT id, shard, title, description FROM reports WHERE run_id = ? AND status IN (?, ?)",
+                (self.run_id, *LIVE_STATUSES),
+            ).fetchall()
+            index = DedupIndex(self.dedup_threshold)
+            shards = {}
+            for row in live:
+                index.add(row["title"], row["description"], key=row["id"])
+                shards[row["id"]] = row["shard"]
+            match = index.find(title, description)
+            if match:
+                return {"status": "duplicate", "shard": shards[match[0]]}
+            if len(live) >= self.max_issues:
+                return {"status": "budget_exhausted"}
+            cursor = self._db.execute(
+                "INSERT INTO reports (run_id, shard, kind, title, description, status, created_at) "
+                "VALUES (?, ?, ?, ?, ?, 'pending', ?)",
+                (self.run_id, self.shard, kind, title, description, time.time()),
+            )
+            return {"status": "reserved", "id": cursor.lastrowid}
+
+        return self._write(work)
+
+    async def finish(self, report_id: int, created: bool, url: str | None = None):
+        """Record a reserved report's outcome; a report that wasn't created frees its slot."""
+        await asyncio.to_thread(self._finish, report_id, created, url)
+
+    def _finish(self, report_id: int, created: bool, url: str | None):
+        with self._lock:
+            self._db.execute(
+                "UPDATE reports SET status = ?, url = ? WHERE id = ?",
+                ("created" if created else "failed", url, report_id),
+            )
+
+    async def visit(self, url: str) -> list[str]:
+        """Mark the URL's route as inspected by this shard; returns the other shards that got there first."""
+        return await asyncio.to_thread(self._visit, route_template(url), url)
+
+    def _visit(self, route: str, url: str) -> list[str]:
+        def work():
+            others = [
+                row["shard"] for row in self._db.execute(
+                    "SELECT shard FROM visits WHERE run_id = ? AND route = ? AND shard != ? ORDER BY first_at",
+                    (self.run_id, route, self.shard),
+                )
+            ]
+            self._db.execute(
+                "INSERT INTO visits VALUES (?, ?, ?, ?, 1, ?) "
+                "ON CONFLICT (run_id, route, shard) DO UPDATE SET count = count + 1",
+                (self.run_id, route, self.shard, url, time.time()),
+            )
+            return others
+
+        return self._write(work)
+
+    async def coverage(self) -> dict:
+        """Routes inspected so far by any shard, and the run's report budget."""
+        return await asyncio.to_thread(self._coverage)
+
+    def _coverage(self) -> dict:
+        with self._lock:
+            visits = self._db.execute(
+                "SELECT route, shard, url, count FROM visits WHERE run_id = ? ORDER BY first_at", (self.run_id,)
+            ).fetchall()
+            reports = self._db.execute(
+                "SELECT shard, kind, title, status, url FROM reports WHERE run_id = ? ORDER BY id", (self.run_id,)
+            ).fetchall()
+        routes: dict[str, dict] = {}
+        for row in visits:
+            entry = routes.setdefault(row["route"], {"route": row["route"], "example": row["url"], "shards": {}})
+            entry["shards"][row["shard"]] = row["count"]
+        live = [row for row in reports if row["status"] in LIVE_STATUSES]
+        return {
+            "run_id": self.run_id,
+            "shard": self.shard,
+            "routes": list(routes.values()),
+            "budget": {
+                "max_issues": self.max_issues,
+                "created": sum(1 for row in live if row["status"] == "created"),
+                "pending": sum(1 for row in live if row["status"] == "pending"),
+                "remaining": max(self.max_issues - len(live), 0),
+            },
+            "reports": [dict(row) for row in reports],
+        }
+
+
+def main():
+    from config import config
+
+    if len(sys.argv) != 2:
+        sys.exit("usage: python -m coordination RUN_ID")
+    coordinator = RunCoordinator(
+        config.COORDINATION_DB, sys.argv[1], config.SHARD_ID, config.MAX_ISSUES, config.DEDUP_THRESHOLD
+    )
+    summary = asyncio.run(coordinator.coverage())
+    summary.pop("shard")
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
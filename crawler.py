@@ -0,0 +1,167 @@
+"""Breadth-first crawl of the logged-in site into a cached site map.
+
+Several pooled sessions visit pages in parallel, following same-origin
+links up to `max_depth` hops from the start page. URLs are collapsed into
+route templates (/bikes/42/edit -> /bikes/:id/edit) and only the first
+URL of each template is visited; the others are counted as instances.
+Links that would end the session or change data (logout, delete, ...)
+are never followed.
+
+The site map (one entry per template with title, headings, control
+counts, load time and outgoing templates) is cached on disk per origin
+and user, so later runs start from it instead of rediscovering pages.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from urllib.parse import parse_qsl, urlsplit
+
+from link_checker import LINKS_SCRIPT, UNSAFE_LINK_RE, canonicalize
+
+SUMMARY_SCRIPT = """
+() => ({
+    title: document.title,
+    headings: Array.from(document.querySelectorAll('h1, h2, h3'), h => h.innerText.trim()).filter(Boolean).slice(0, 5),
+    forms: document.forms.length,
+    inputs: document.querySelectorAll('input:not([type=hidden]), select, textarea').length,
+    buttons: document.querySelectorAll('button, [role=button], input[type=submit]').length,
+    links: document.links.length,
+})
+"""
+
+ID_SEGMENT_RE = re.compile(
+    r"^(\d+|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|[0-9a-f]{12,}|[A-Za-z0-9_-]*\d[A-Za-z0-9_-]{15,})$",
+    re.IGNORECASE,
+)
+MAX_EXAMPLES = 3
+MAX_LINKS_TO = 20
+
+
+def route_template(url: str) -> str:
+    """Collapse ID-like path segments to :id and keep only the query's parameter names."""
+    parts = urlsplit(url)
+    segments = [":id" if ID_SEGMENT_RE.match(segment) else segment for segment in parts.path.split("/")]
+    template = "/".join(segments) or "/"
+    keys = sorted({key for key, _ in parse_qsl(parts.query, keep_blank_values=True)})
+    return template + ("?" + "&".join(keys) if keys else "")
+
+
+class SiteCrawler:
+    def __init__(self, browser, max_depth: int = 2, max_pages: int = 50, concurrency: int = 3):
+        self.browser = browser
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.concurrency = concurrency
+
+    async def crawl(self, start_url: str) -> dict:
+        origin = urlsplit(start_url)
+        start = canonicalize(start_url)
+        pages: dict[str, dict] = {}
+        instances: dict[str, set[str]] = {route_template(start): {start}}
+        queue: asyncio.Queue[tuple[str, int]] = asyncio.Queue()
+        queue.put_nowait((start, 0))
+        started = time.perf_counter()
+
+        def enqueue(url: str, depth: int):
+            parts = urlsplit(url)
+            if (parts.scheme, parts.netloc) != (origin.scheme, origin.netloc) or UNSAFE_LINK_RE.search(url):
+                return
+            seen = instances.setdefault(route_template(url), set())
+            # One visit per template; past max_pages new templates are only counted
+            if not seen and len(instances) <= self.max_pages:
+                queue.put_nowait((url, depth))
+            seen.add(url)
+
+        async def worker(session_id: str):
+            while True:
+                url, depth = await queue.get()
+                template = route_template(url)
+                try:
+                    page = await self._visit(session_id, url, depth)
+                    links = page.pop("links_found")
+                    if depth < self.max_depth:
+                        for link in links:
+                            enqueue(link, depth + 1)
+                    pages[template] = page
+                except Exception as e:
+                    pages[template] = {"url": url, "depth": depth, "error": str(e).splitlines()[0]}
+                finally:
+                    queue.task_done()
+
+        sessions = [f"crawl-{i}" for i in range(self.concurrency)]
+        workers = [asyncio.create_task(worker(session_id)) for session_id in sessions]
+        try:
+            await queue.join()
+        finally:
+            for task in workers:
+                task.cancel()
+            for session_id in sessions:
+                await self.browser.release_session(session_id)
+
+        entries = []
+        for template, page in sorted(pages.items(), key=lambda item: (item[1]["depth"], item[0])):
+            urls = sorted(instances.get(template, ()))
+            entries.append({"template": template, **page, "instances": len(urls), "examples": urls[:MAX_EXAMPLES]})
+        return {
+            "origin": f"{origin.scheme}://{origin.netloc}",
+            "crawled_at": int(time.time()),
+            "crawl_ms": round((time.perf_counter() - started) * 1000),
+            "max_depth": self.max_depth,
+            "truncated": len(instances) > self.max_pages,
+            "pages": entries,
+        }
+
+    async def _visit(self, session_id: str, url: str, depth: int) -> dict:
+        start = time.perf_counter()
+        result = await self.browser.navigate(url, session_id=session_id)
+        load_ms = round((time.perf_counter() - start) * 1000)
+        summary = await self.browser.evaluate(SUMMARY_SCRIPT, session_id=session_id)
+        links = [canonicalize(link["href"]) for link in await self.browser.evaluate(LINKS_SCRIPT, session_id=session_id)]
+        links = [link for link in dict.fromkeys(links) if link]
+        templates = list(dict.fromkeys(route_template(link) for link in links))
+        return {
+            "url": url,
+            "final_url": result["url"] if result["url"] != url else None,
+            "depth": depth,
+            "http_status": result.get("http_status"),
+            "load_ms": load_ms,
+            "settle_ms": result.get("settle_ms"),
+            **summary,
+            "links_to": templates[:MAX_LINKS_TO],
+            "links_found": links,
+        }
+
+
+class SiteMapCache:
+    """Crawl results on disk, one JSON file per origin and user, reused until `ttl` seconds old."""
+
+    def __init__(self, directory: str, ttl: float):
+        self.directory = directory
+        self.ttl = ttl
+
+    def _path(self, origin: str, user: str) -> str:
+        digest = hashlib.sha256(f"{origin}|{user}".encode()).hexdigest()[:12]
+        host = re.sub(r"[^a-zA-Z0-9]+", "_", urlsplit(origin).netloc)
+        return os.path.join(self.directory, f"{host}-{digest}.json")
+
+    def load(self, origin: str, user: str) -> dict | None:
+        try:
+            with open(self._path(origin, user)) as f:
+                site_map = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if time.time() - site_map.get("crawled_at", 0) > self.ttl:
+            return None
+        return site_map
+
+    def save(self, origin: str, user: str, site_map: dict):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(origin, user)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(site_map, f)
+        os.replace(tmp, path)
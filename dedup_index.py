@@ -0,0 +1,102 @@
+import re
+from collections import Counter
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "does", "doesn", "for", "from", "in", "is",
+    "it", "not", "of", "on", "or", "should", "the", "to", "when", "with", "t",
+}
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize(text: str) -> str:
+    return " ".join(TOKEN_RE.findall(text.lower()))
+
+
+def terms(text: str) -> set[str]:
+    """Normalized content words, with a light plural/verb-suffix stem."""
+    result = set()
+    for word in TOKEN_RE.findall(text.lower()):
+        if word in STOPWORDS:
+            continue
+        for suffix in ("ing", "es", "s"):
+            if len(word) > len(suffix) + 3 and word.endswith(suffix):
+                word = word[: -len(suffix)]
+                break
+        result.add(word)
+    return result
+
+
+class DedupIndex:
+    """Inverted index over issue title (and optional body) terms.
+
+    A candidate is a duplicate when the Jaccard similarity of its title terms
+    reaches the threshold, or when one normalized title contains the other.
+    When both sides have a body and the titles are already within
+    BODY_MARGIN of the threshold, the body similarity is blended in and can
+    tip the match. Bodies alone never make a duplicate, since reports often
+    share boilerplate ("Steps to reproduce: 1. Log in ...").
+    """
+
+    BODY_WEIGHT = 0.3
+    BODY_MARGIN = 0.1
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self._titles: dict[int, str] = {}
+        self._title_terms: dict[int, set[str]] = {}
+        self._body_terms: dict[int, set[str]] = {}
+        self._postings: dict[str, set[int]] = {}
+        self._next_key = -1  # keys for entries without an issue number
+
+    def __len__(self) -> int:
+        return len(self._titles)
+
+    def titles(self) -> list[str]:
+        return list(self._titles.values())
+
+    def add(self, title: str, body: str = "", key: int | None = None) -> int:
+        if key is None:
+            key = self._next_key
+            self._next_key -= 1
+        if key in self._titles:
+            self.remove(key)
+        self._titles[key] = normalize(title)
+        self._title_terms[key] = terms(title)
+        if body:
+            self._body_terms[key] = terms(body)
+        for term in self._title_terms[key]:
+            self._postings.setdefault(term, set()).add(key)
+        return key
+
+    def remove(self, key: int):
+        for term in self._title_terms.pop(key, ()):
+            self._postings[term].discard(key)
+        self._titles.pop(key, None)
+        self._body_terms.pop(key, None)
+
+    def find(self, title: str, body: str = "") -> tuple[int, float] | None:
+        """Return (key, score) of the best match at or above the threshold."""
+        query = terms(title)
+        query_title = normalize(title)
+        query_body = terms(body) if body else set()
+
+        shared: Counter[int] = Counter()
+        for term in query:
+            for key in self._postings.get(term, ()):
+                shared[key] += 1
+
+        best: tuple[int, float] | None = None
+        for key, overlap in shared.items():
+            existing = self._title_terms[key]
+            score = overlap / (len(query) + len(existing) - overlap)
+            if query_body and key in self._body_terms and score >= self.threshold - self.BODY_MARGIN:
+                other = self._body_terms[key]
+                body_score = len(query_body & other) / len(query_body | other)
+                score = (1 - self.BODY_WEIGHT) * score + self.BODY_WEIGHT * body_score
+            if overlap == min(len(query), len(existing)):
+                existing_title = self._titles[key]
+                if query_title in existing_title or existing_title in query_title:
+                    score = 1.0
+            if score >= self.threshold and (best is None or score > best[1]):
+                best = (key, score)
+        return best
@@ -0,0 +1,112 @@
+"""Bounded capture of console errors, page errors and failed, erroring or slow requests.
+
+Entries go into a fixed-size ring buffer and carry a sequence number, so
+a caller can poll with the last cursor it saw and get only what is new
+(plus how many entries, of any session, it missed if the buffer wrapped
+in between).
+Requests we abort ourselves (resource blocking) and requests cancelled by
+a navigation are not errors and are skipped.
+"""
+
+import time
+from collections import deque
+from typing import Callable
+
+from playwright.async_api import BrowserContext, ConsoleMessage, Page, Request, Response, WebError
+
+MAX_TEXT = 500
+MAX_URL = 300
+IGNORED_FAILURES = ("net::ERR_BLOCKED_BY_CLIENT", "net::ERR_ABORTED")
+
+
+def _page_of(request: Request) -> Page | None:
+    try:
+        return request.frame.page
+    except Exception:
+        return None  # Service worker requests have no frame
+
+
+class Diagnostics:
+    def __init__(self, size: int = 500, slow_ms: int = 3000, session_of: Callable[[Page], str | None] | None = None):
+        self.entries: deque[dict] = deque(maxlen=size)
+        self.cursor = 0
+        self.slow_ms = slow_ms
+        self._session_of = session_of or (lambda page: None)
+
+    def attach(self, context: BrowserContext):
+        context.on("console", self._on_console)
+        context.on("weberror", self._on_web_error)
+        context.on("requestfailed", self._on_request_failed)
+        context.on("response", self._on_response)
+        context.on("requestfinished", self._on_request_finished)
+
+    def _add(self, kind: str, page: Page | None, **fields):
+        self.cursor += 1
+        self.entries.append({
+            "seq": self.cursor,
+            "ts": round(time.time(), 3),
+            "kind": kind,
+            "session": self._session_of(page) if page else None,
+            "page": page.url[:MAX_URL] if page else None,
+            **fields,
+        })
+
+    def _on_console(self, message: ConsoleMessage):
+        if message.type != "error" or any(failure in message.text for failure in IGNORED_FAILURES):
+            return
+        location = message.location
+        source = f"{location.get('url', '')}:{location.get('lineNumber', 0)}" if location.get("url") else None
+        self._add("console", message.page, text=message.text[:MAX_TEXT], source=source)
+
+    def _on_web_error(self, web_error: WebError):
+        error = web_error.error
+        stack = (error.stack or "").splitlines()[1:4]
+        self._add("page_error", web_error.page, text=f"{error.name}: {error.message}"[:MAX_TEXT], stack=stack)
+
+    def _on_request_failed(self, request: Request):
+        failure = request.failure or ""
+        if any(ignored in failure for ignored in IGNORED_FAILURES):
+            return
+        self._add(
+            "request_failed", _page_of(request),
+            method=request.method, url=request.url[:MAX_URL], resource_type=request.resource_type, error=failure,
+        )
+
+    def _on_response(self, response: Response):
+        if response.status < 400:
+            return
+        request = response.request
+        self._add(
+            "http_error", _page_of(request),
+            status=response.status, method=request.method, url=request.url[:MAX_URL],
+            resource_type=request.resource_type, ms=round(request.timing.get("responseStart", -1), 1),
+        )
+
+    def _on_request_finished(self, request: Request):
+        ms = request.timing.get("responseEnd", -1)
+        if ms < self.slow_ms:
+            return
+        self._add(
+            "slow_request", _page_of(request),
+            method=request.method, url=request.url[:MAX_URL], resource_type=request.resource_type, ms=round(ms, 1),
+        )
+
+    def since(self, cursor: int = 0, session: str | None = None, limit: int = 100) -> dict:
+        """Entries after `cursor`, oldest first; pass the returned cursor next time.
+
+        "missed" counts the entries after `cursor` that were evicted before
+        this call. Evicted entries are gone, so it is counted over all
+        sessions even when `session` is given: an upper bound for that session.
+        """
+        # Before filtering: sequence numbers are global, so gaps can't be attributed to a session
+        missed = max(0, self.entries[0]["seq"] - cursor - 1) if self.entries else 0
+        new = [e for e in self.entries if e["seq"] > cursor and (session is None or e["session"] == session)]
+        truncated = len(new) > limit
+        if truncated:
+            new = new[:limit]
+        return {
+            "cursor": new[-1]["seq"] if truncated else self.cursor,
+            "entries": new,
+            "missed": missed,
+            "more": truncated,
+        }
@@ -0,0 +1,57 @@
+import re
+
+REF_SELECTOR_RE = re.compile(r"^\s*ref\s*=\s*(\d+)\s*$")
+TAG_RE = re.compile(r"^<[a-zA-Z0-9-]+")
+
+
+class StaleRefError(Exception):
+    pass
+
+
+def parse_ref(selector: str) -> int | None:
+    """Return N for a `ref=N` selector, or None for a regular CSS selector."""
+    match = REF_SELECTOR_RE.match(selector)
+    return int(match.group(1)) if match else None
+
+
+class RefMap:
+    """Short numeric refs for extracted elements of one session.
+
+    A ref stays bound to the same element fingerprint for as long as the
+    page URL is unchanged, so refs (and diff output) do not shift when
+    elements are inserted. Navigating to another URL starts over at 1.
+    `targets` maps each ref to what the extraction engine needs to find
+    the element again: ("js", index) or ("cdp", backend node id).
+    """
+
+    def __init__(self):
+        self.url: str | None = None
+        self.targets: dict[int, tuple[str, int]] = {}
+        self._by_key: dict[str, int] = {}
+        self._next_ref = 1
+
+    def assign(self, url: str, elements: list[dict]) -> list[dict]:
+        """Tag each element's html with its ref; returns the updated records."""
+        if url != self.url:
+            self.url = url
+            self._by_key = {}
+            self._next_ref = 1
+        self.targets = {}
+
+        tagged = []
+        seen: dict[str, int] = {}
+        for i, el in enumerate(elements):
+            key = el["key"]
+            # Fingerprints can collide (duplicate ids); disambiguate by order
+            seen[key] = seen.get(key, 0) + 1
+            if seen[key] > 1:
+                key = f"{key}~{seen[key]}"
+            ref = self._by_key.get(key)
+            if ref is None:
+                ref = self._next_ref
+                self._next_ref += 1
+                self._by_key[key] = ref
+            self.targets[ref] = ("cdp", el["backend_id"]) if "backend_id" in el else ("js", i)
+            html = TAG_RE.sub(lambda m: f'{m.group(0)} ref="{ref}"', el["html"], count=1)
+            tagged.append({**el, "key": key, "html": html})
+        return tagged
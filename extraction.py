@@ -0,0 +1,251 @@
+"""Extraction engines that turn a page into simplified {key, html} element records.
+
+Two engines produce the same records:
+
+- "js": one page.evaluate() that walks matching elements and reads
+  el.innerText for each. Simple, but innerText forces style/layout work per
+  element, which gets slow on large dashboards and long tables.
+- "cdp": one CDP DOMSnapshot.captureSnapshot call that returns the whole
+  flattened document, with the element list built in Python. Text is
+  gathered from rendered text nodes and whitespace-collapsed, so it can
+  differ slightly from innerText around block boundaries.
+"""
+
+from urllib.parse import urljoin
+
+from playwright.async_api import ElementHandle, Page
+
+ENGINES = ("js", "cdp")
+
+MATCH_TAGS = {"a", "button", "input", "select", "textarea", "form", "h1", "h2", "h3", "h4", "label"}
+TEXT_LIMIT = 100
+
+JS_EXTRACT_SCRIPT = """
+() => {
+    const elements = [];
+
+    const fingerprint = (el) => {
+        if (el.id) return `${el.tagName.toLowerCase()}#${el.id}`;
+        const parts = [];
+        for (let node = el; node && node !== document.documentElement; node = node.parentElement) {
+            if (node.id) {
+                parts.unshift(`#${node.id}`);
+                break;
+            }
+            let nth = 1;
+            for (let sib = node.previousElementSibling; sib; sib = sib.previousElementSibling) {
+                if (sib.tagName === node.tagName) nth++;
+            }
+            parts.unshift(`${node.tagName.toLowerCase()}:${nth}`);
+        }
+        return parts.join('>');
+    };
+
+    // Matched elements, in output order, for ref-based targeting
+    window.__qaEls = [];
+
+    // Get all interactive and content elements
+    const selectors = 'a, button, input, select, textarea, form, h1, h2, h3, h4, label, [role="button"], [onclick]';
+    document.querySelectorAll(selectors).forEach((el, idx) => {
+        const tag = el.tagName.toLowerCase();
+        const text = el.innerText?.slice(0, 100) || '';
+        const attrs = [];
+
+        if (el.id) attrs.push(`id="${el.id}"`);
+        if (el.name) attrs.push(`name="${el.name}"`);
+        if (el.className) attrs.push(`class="${el.className}"`);
+        if (el.type) attrs.push(`type="${el.type}"`);
+        if (el.href) attrs.push(`href="${el.href}"`);
+        if (el.placeholder) attrs.push(`placeholder="${el.placeholder}"`);
+        if (el.value && tag === 'input') attrs.push(`value="${el.value}"`);
+
+        const attrStr = attrs.length ? ' ' + attrs.join(' ') : '';
+        // 2 = in viewport, 1 = rendered off-screen, 0 = not rendered
+        const r = el.getBoundingClientRect();
+        const vis = !(r.width || r.height) ? 0
+            : (r.bottom > 0 && r.top < innerHeight && r.right > 0 && r.left < innerWidth ? 2 : 1);
+
+        window.__qaEls.push(el);
+        elements.push({key: fingerprint(el), html: `<${tag}${attrStr}>${text.trim()}</${tag}>`, vis});
+    });
+
+    return elements;
+}
+"""
+
+
+async def extract_elements(page: Page, engine: str = "js") -> list[dict]:
+    """Extract interactive and content elements using the given engine.
+
+    Each record's `key` is a fingerprint that stays stable across calls: the
+    element id when present, otherwise its tag path from the nearest
+    ancestor with an id. `vis` is 2 in the viewport, 1 rendered off-screen
+    and 0 when the element has no box.
+    """
+    if engine == "cdp":
+        return await extract_elements_cdp(page)
+    if engine != "js":
+        raise ValueError(f"Unknown extraction engine: {engine} (expected one of {ENGINES})")
+    return await page.evaluate(JS_EXTRACT_SCRIPT)
+
+
+async def extract_elements_cdp(page: Page) -> list[dict]:
+    client = await page.context.new_cdp_session(page)
+    try:
+        snapshot = await client.send("DOMSnapshot.captureSnapshot", {"computedStyles": []})
+    finally:
+        await client.detach()
+    viewport = page.viewport_size or {"width": 1280, "height": 720}
+    return elements_from_snapshot(snapshot, viewport)
+
+
+async def resolve_target(page: Page, target: tuple[str, int]) -> ElementHandle | None:
+    """Find an element recorded by a previous extraction; None if it is gone."""
+    engine, value = target
+    if engine == "cdp":
+        client = await page.context.new_cdp_session(page)
+        try:
+            node = await client.send("DOM.resolveNode", {"backendNodeId": value})
+            await client.send("Runtime.callFunctionOn", {
+                "objectId": node["object"]["objectId"],
+                "functionDeclaration": "function() { window.__qaTarget = this; }",
+            })
+        except Exception:
+            return None  # Node belongs to a document that no longer exists
+        finally:
+            await client.detach()
+        script = "() => { const el = window.__qaTarget; delete window.__qaTarget; return el?.isConnected ? el : null; }"
+        handle = await page.evaluate_handle(script)
+    else:
+        handle = await page.evaluate_handle("(i) => { const el = window.__qaEls?.[i]; return el?.isConnected ? el : null; }", value)
+    return handle.as_element()
+
+
+def _rare_strings(data: dict | None, strings: list[str]) -> dict[int, str]:
+    if not data:
+        return {}
+    return {node: strings[value] for node, value in zip(data["index"], data["value"])}
+
+
+def _input_type(tag: str, attrs: dict[str, str]) -> str:
+    """Mirror the DOM `type` property, which has defaults for form controls."""
+    if tag == "input":
+        return attrs.get("type", "").lower() or "text"
+    if tag == "button":
+        return attrs.get("type", "").lower() or "submit"
+    if tag == "select":
+        return "select-multiple" if "multiple" in attrs else "select-one"
+    if tag == "textarea":
+        return "textarea"
+    return attrs.get("type", "")
+
+
+def elements_from_snapshot(snapshot: dict, viewport: dict | None = None) -> list[dict]:
+    """Build {key, html, vis} records from a DOMSnapshot.captureSnapshot result."""
+    strings = snapshot["strings"]
+    doc = snapshot["documents"][0]
+    nodes = doc["nodes"]
+    parents = nodes["parentIndex"]
+    backend_ids = nodes["backendNodeId"]
+    types = nodes["nodeType"]
+    names = [strings[i].lower() if i >= 0 else "" for i in nodes["nodeName"]]
+    values = nodes.get("nodeValue", [])
+    base_url = strings[doc["baseURL"]] if doc.get("baseURL", -1) >= 0 else ""
+    input_values = _rare_strings(nodes.get("inputValue"), strings)
+    layout = doc.get("layout", {})
+    bounds = dict(zip(layout.get("nodeIndex", []), layout.get("bounds", [])))
+    rendered = set(bounds)
+    viewport = viewport or {"width": 1280, "height": 720}
+    view_left = doc.get("scrollOffsetX", 0)
+    view_top = doc.get("scrollOffsetY", 0)
+    view_right = view_left + viewport["width"]
+    view_bottom = view_top + viewport["height"]
+    count = len(parents)
+
+    attributes: list[dict[str, str]] = []
+    for flat in nodes.get("attributes", [[] for _ in range(count)]):
+        attributes.append({strings[flat[i]].lower(): strings[flat[i + 1]] for i in range(0, len(flat), 2)})
+
+    # Nodes come in document (pre-order) order, so a single pass can assign
+    # nth-of-type indices, id paths and shadow-root exclusion from the parent.
+    paths: list[str] = [""] * count
+    hidden = [False] * count  # inside a shadow root, like querySelectorAll
+    sibling_counts: dict[tuple[int, str], int] = {}
+    matched: dict[int, list[str]] = {}
+    order: list[int] = []
+    for i in range(count):
+        parent = parents[i]
+        hidden[i] = parent >= 0 and (hidden[parent] or types[parent] == 11)
+        if types[i] != 1 or hidden[i]:
+            continue
+        tag = names[i]
+        attrs = attributes[i]
+        nth = sibling_counts.get((parent, tag), 0) + 1
+        sibling_counts[(parent, tag)] = nth
+        if tag == "html":
+            paths[i] = ""
+        elif attrs.get("id"):
+            paths[i] = f"#{attrs['id']}"
+        else:
+            prefix = paths[parent] if parent >= 0 else ""
+            paths[i] = f"{prefix}>{tag}:{nth}" if prefix else f"{tag}:{nth}"
+        if tag in MATCH_TAGS or attrs.get("role") == "button" or "onclick" in attrs:
+            matched[i] = []
+            order.append(i)
+
+    # Distribute rendered text to every matched ancestor, stopping once full
+    for i in range(count):
+        if types[i] != 3 or hidden[i] or not matched:
+            continue
+        parent = parents[i]
+        if i not in rendered and not (parent >= 0 and names[parent] == "option"):
+            continue
+        text = strings[values[i]] if values[i] >= 0 else ""
+        if not text.strip():
+            continue
+        node = parent
+        while node >= 0:
+            chunks = matched.get(node)
+            if chunks is not None and sum(len(c) for c in chunks) <= TEXT_LIMIT:
+                chunks.append(text)
+            node = parents[node]
+
+    elements = []
+    for i in order:
+        tag = names[i]
+        attrs = attributes[i]
+        text = " ".join(" ".join(matched[i]).split())[:TEXT_LIMIT] if tag != "input" else ""
+        parts = []
+        if attrs.get("id"):
+            parts.append(f'id="{attrs["id"]}"')
+        if attrs.get("name"):
+            parts.append(f'name="{attrs["name"]}"')
+        if attrs.get("class"):
+            parts.append(f'class="{attrs["class"]}"')
+        input_type = _input_type(tag, attrs)
+        if input_type:
+            parts.append(f'type="{input_type}"')
+        if tag == "a" and "href" in attrs:
+            parts.append(f'href="{urljoin(base_url, attrs["href"])}"')
+        if attrs.get("placeholder") and tag in ("input", "textarea"):
+            parts.append(f'placeholder="{attrs["placeholder"]}"')
+        value = input_values.get(i, attrs.get("value", ""))
+        if value and tag == "input":
+            parts.append(f'value="{value}"')
+
+        attr_str = " " + " ".join(parts) if parts else ""
+        key = f"{tag}#{attrs['id']}" if attrs.get("id") else paths[i]
+        x, y, w, h = bounds.get(i, (0, 0, 0, 0))
+        if not (w or h):
+            vis = 0
+        elif x + w > view_left and x < view_right and y + h > view_top and y < view_bottom:
+            vis = 2
+        else:
+            vis = 1
+        elements.append({
+            "key": key,
+            "html": f"<{tag}{attr_str}>{text.strip()}</{tag}>",
+            "vis": vis,
+            "backend_id": backend_ids[i],
+        })
+    return elements
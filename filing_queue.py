@@ -0,0 +1,171 @@
+import asyncio
+
+from coordination import RunCoordinator
+from dedup_index import DedupIndex
+from github_client import GitHubError
+from github_reporter import GitHubReporter
+
+BATCH_CONCURRENCY = 4
+
+
+class FilingQueue:
+    """Files issues in the background so report tools return immediately.
+
+    `submit()` validates and deduplicates a report, reserves one of the
+    `max_issues` slots and returns a pending ID. A worker drains the queue
+    in batches, creating issues concurrently with retries. Slots are
+    reserved on the event loop before the first await and released only
+    when a report ends without creating an issue, so the cap is exact
+    however many reports are in flight.
+
+    With a `coordinator` (sharded runs), each report also reserves a slot of
+    the run-wide budget, which checks it against the other shards' reports.
+    A report the coordinator rejects gives its local slot back.
+    """
+
+    def __init__(
+        self,
+        reporter: GitHubReporter,
+        max_issues: int,
+        dedup_threshold: float,
+        max_retries: int = 3,
+        coordinator: RunCoordinator | None = None,
+    ):
+        self.reporter = reporter
+        self.max_issues = max_issues
+        self.max_retries = max_retries
+        self.coordinator = coordinator
+        self.reports: dict[str, dict] = {}
+        self._reserved = 0
+        self._submitted = DedupIndex(dedup_threshold)
+        self._queue: asyncio.Queue[str] = asyncio.Queue()
+        self._worker: asyncio.Task | None = None
+        self._next_id = 1
+
+    async def submit(self, kind: str, title: str, description: str, details: str) -> dict:
+        """Queue a "bug" or "feature_request"; returns at once with a pending ID."""
+        title = title.strip()
+        if not title or not description.strip():
+            return {"status": "error", "message": "Title and description are required"}
+
+        if self._submitted.find(title, description) or self.reporter.is_known_duplicate(title, description):
+            return {"status": "skipped", "reason": "duplicate"}
+
+        if self._reserved >= self.max_issues:
+            return {"status": "skipped", "reason": f"Max issues ({self.max_issues}) already created"}
+        # Hold the local slot and title while the run-wide reservation is awaited
+        self._reserved += 1
+        dedup_key = self._submitted.add(title, description)
+        shared_id = None
+        if self.coordinator:
+            try:
+                claim = await self.coordinator.reserve(kind, title, description)
+            except Exception as e:
+                claim = {"status": "error", "message": f"Could not reserve a run-wide slot: {e}"}
+            if claim["status"] != "reserved":
+                self._reserved -= 1
+                self._submitted.remove(dedup_key)
+            if claim["status"] == "duplicate":
+                return {"status": "skipped", "reason": f"duplicate (reported by shard {claim['shard']})"}
+            if claim["status"] == "budget_exhausted":
+                return {"status": "skipped", "reason": f"Max issues ({self.max_issues}) already created across shards"}
+            if claim["status"] == "error":
+                return claim
+            shared_id = claim["id"]
+
+        report_id = f"report-{self._next_id}"
+        self._next_id += 1
+        self.reports[report_id] = {
+            "id": report_id,
+            "kind": kind,
+            "title": title,
+            "status": "pending",
+            "_args": (title, description, details),
+            "_dedup_key": dedup_key,
+            "_shared_id": shared_id,
+        }
+        self._queue.put_nowait(report_id)
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+        return {"status": "pending", "id": report_id, "title": title}
+
+    def status(self, report_id: str = "") -> dict | list[dict]:
+        """Public view of one report, or of all reports when no ID is given."""
+        if not report_id:
+            return [self._public(r) for r in self.reports.values()]
+        report = self.reports.get(report_id)
+        if report is None:
+            return {"status": "error", "message": f"Unknown report: {report_id}"}
+        return self._public(report)
+
+    @staticmethod
+    def _public(report: dict) -> dict:
+        return {k: v for k, v in report.items() if not k.startswith("_")}
+
+    @property
+    def created_count(self) -> int:
+        return sum(1 for r in self.reports.values() if r["status"] == "created")
+
+    @property
+    def pending_count(self) -> int:
+        return sum(1 for r in self.reports.values() if r["status"] == "pending")
+
+    async def flush(self, timeout: float | None = None):
+        """Wait for every queued report to reach a final status."""
+        await asyncio.wait_for(self._queue.join(), timeout)
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                # Load the index once, before concurrent creates race to build it
+                await self.reporter.get_index()
+            except Exception:
+                pass  # Each create retries its own duplicate check
+            slots = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+            async def file(report_id: str):
+                report = self.reports[report_id]
+                try:
+                    async with slots:
+                        await self._file(report)
+                except Exception as e:
+                    # One report's failure must not take the rest of the batch (or flush) with it
+                    if report["status"] == "pending":
+                        report.update(status="failed", message=str(e))
+                        self._release(report)
+                finally:
+                    self._queue.task_done()
+
+            await asyncio.gather(*(file(report_id) for report_id in batch))
+
+    async def _file(self, report: dict):
+        create = self.reporter.create_bug if report["kind"] == "bug" else self.reporter.create_feature_request
+        for attempt in range(self.max_retries + 1):
+            report["attempts"] = attempt + 1
+            try:
+                result = await create(*report["_args"])
+                break
+            except GitHubError as e:
+                result = {"status": "failed", "message": str(e)}
+                # Client errors (bad labels, permissions) will not succeed on retry
+                if 400 <= e.status < 500:
+                    break
+            except Exception as e:
+                result = {"status": "failed", "message": str(e)}
+            if attempt < self.max_retries:
+                await asyncio.sleep(2 ** attempt)
+
+        report.update(result)
+        if result.get("status") != "created":
+            self._release(report)
+        if report["_shared_id"] is not None:
+            # If this fails, the shared row stays pending until the coordinator expires it
+            await self.coordinator.finish(report["_shared_id"], result.get("status") == "created", result.get("url"))
+
+    def _release(self, report: dict):
+        """Free a report's slot, and let a corrected report with its title through."""
+        self._reserved -= 1
+        self._submitted.remove(report["_dedup_key"])
@@ -0,0 +1,217 @@
+"""Async GitHub REST/GraphQL client shared by the MCP servers and GitHubReporter.
+
+One httpx.AsyncClient per process keeps TLS connections alive across
+tool calls. Requests are retried with exponential backoff on transport
+errors and 5xx responses, and wait out primary/secondary rate limits
+using Retry-After or X-RateLimit-Reset. GITHUB_API_URL points the
+client at another server, e.g. a local fake for tests and benchmarks.
+"""
+
+import asyncio
+import os
+import random
+import re
+import subprocess
+import time
+
+import httpx
+
+from metrics import phase
+
+API_URL = "https://api.github.com"
+NEXT_LINK_RE = re.compile(r'<([^>]+)>;\s*rel="next"')
+REMOTE_RE = re.compile(r"github\.com[:/]([^/\s]+/[^/\s]+?)(?:\.git)?/?$")
+MAX_RATE_LIMIT_WAIT = 60  # seconds; beyond this, surface the error instead
+
+
+class GitHubError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(f"GitHub API {status}: {message}")
+        self.status = status
+
+
+def github_token() -> str:
+    token = os.environ.get("GITHUB_TOKEN", "")
+    if token:
+        return token
+    # Same credentials the gh CLI uses
+    try:
+        result = subprocess.run(["gh", "auth", "token"], capture_output=True, text=True, timeout=10)
+        return result.stdout.strip()
+    except Exception:
+        return ""
+
+
+def github_repo() -> str:
+    """GITHUB_REPO, else owner/name of the checkout's GitHub remote, as gh would infer it."""
+    repo = os.environ.get("GITHUB_REPO", "")
+    if repo:
+        return repo
+    try:
+        result = subprocess.run(["git", "remote", "get-url", "origin"], capture_output=True, text=True, timeout=10)
+        match = REMOTE_RE.search(result.stdout.strip())
+    except Exception:
+        match = None
+    if not match:
+        raise RuntimeError("GITHUB_REPO is not set and origin is not a GitHub remote; add it to the environment or .env")
+    return match.group(1)
+
+
+class GitHubClient:
+    def __init__(
+        self,
+        token: str,
+        repo: str,
+        base_url: str = API_URL,
+        max_connections: int = 10,
+        max_retries: int = 3,
+    ):
+        self.repo = repo
+        self.max_retries = max_retries
+        self._http = httpx.AsyncClient(
+            base_url=base_url,
+            headers={
+                "Authorization": f"Bearer {token}",
+                "Accept": "application/vnd.github+json",
+                "X-GitHub-Api-Version": "2022-11-28",
+            },
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=30,
+        )
+
+    @classmethod
+    async def from_env(cls) -> "GitHubClient":
+        """Client for GITHUB_REPO; the gh/git fallbacks run subprocesses, so they run on a worker thread."""
+        token, repo = await asyncio.to_thread(lambda: (github_token(), github_repo()))
+        return cls(token, repo, base_url=os.environ.get("GITHUB_API_URL", API_URL))
+
+    async def aclose(self):
+        await self._http.aclose()
+
+    def _rate_limit_wait(self, response: httpx.Response) -> float | None:
+        """Seconds to wait before retrying a rate-limited response, if it is one."""
+        if response.status_code not in (403, 429):
+            return None
+        if "Retry-After" in response.headers:
+            return float(response.headers["Retry-After"])
+        if response.headers.get("X-RateLimit-Remaining") == "0":
+            reset = float(response.headers.get("X-RateLimit-Reset", time.time()))
+            return max(reset - time.time(), 0) + 1
+        return None
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request with retries. Returns 2xx and 304 responses, raises GitHubError otherwise."""
+        for attempt in range(self.max_retries + 1):
+            last = attempt == self.max_retries
+            try:
+                with phase("github"):
+                    response = await self._http.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                if last:
+                    raise GitHubError(0, str(e)) from e
+                await asyncio.sleep(2 ** attempt + random.random())
+                continue
+
+            if response.is_success or response.status_code == 304:
+                return response
+
+            wait = self._rate_limit_wait(response)
+            if wait is None and response.status_code >= 500:
+                wait = 2 ** attempt + random.random()
+            if wait is None or last or wait > MAX_RATE_LIMIT_WAIT:
+                try:
+                    message = response.json().get("message", response.text)
+                except ValueError:
+                    message = response.text
+                raise GitHubError(response.status_code, message)
+            await asyncio.sleep(wait)
+
+    async def paginate(self, url: str, params: dict | None = None, limit: int | None = None) -> list:
+        """Follow Link: rel="next" pages and return the concatenated items."""
+        items = []
+        while url:
+            response = await self.request("GET", url, params=params)
+            items.extend(response.json())
+            if limit is not None and len(items) >= limit:
+                return items[:limit]
+            match = NEXT_LINK_RE.search(response.headers.get("Link", ""))
+            url = match.group(1) if match else None
+            params = None  # Next links already carry the query
+        return items
+
+    async def graphql(self, query: str, variables: dict) -> dict:
+        response = await self.request("POST", "/graphql", json={"query": query, "variables": variables})
+        data = response.json()
+        if data.get("errors"):
+            raise GitHubError(response.status_code, data["errors"][0].get("message", "GraphQL error"))
+        return data["data"]
+
+    # -------------------------------------------------------------------------
+    # Repository helpers, returning the shapes the gh CLI used to produce
+    # -------------------------------------------------------------------------
+
+    async def list_issues(self, state: str = "open", labels: str = "", limit: int = 50) -> list[dict]:
+        params = {"state": state, "per_page": min(limit, 100)}
+        if labels:
+            params["labels"] = labels
+        # The issues endpoint also returns pull requests; over-fetch and filter
+        items = await self.paginate(f"/repos/{self.repo}/issues", params, limit=limit * 2)
+        issues = [
+            {
+                "number": item["number"],
+                "title": item["title"],
+                "labels": [{"name": label["name"]} for label in item["labels"]],
+                "state": item["state"].upper(),
+                "body": item.get("body") or "",
+            }
+            for item in items
+            if "pull_request" not in item
+        ]
+        return issues[:limit]
+
+    async def list_prs(self, state: str = "open", limit: int = 20) -> list[dict]:
+        api_state = "closed" if state == "merged" else state
+        items = await self.paginate(
+            f"/repos/{self.repo}/pulls", {"state": api_state, "per_page": min(limit, 100)}, limit=limit
+        )
+        if state == "merged":
+            items = [item for item in items if item.get("merged_at")]
+        return [
+            {
+                "number": item["number"],
+                "title": item["title"],
+                "state": "MERGED" if item.get("merged_at") else item["state"].upper(),
+                "headRefName": item["head"]["ref"],
+            }
+            for item in items
+        ]
+
+    async def get_issue(self, number: int) -> dict:
+        issue, comments = await asyncio.gather(
+            self.request("GET", f"/repos/{self.repo}/issues/{number}"),
+            self.paginate(f"/repos/{self.repo}/issues/{number}/comments", {"per_page": 100}),
+        )
+        issue = issue.json()
+        return {
+            "number": issue["number"],
+            "title": issue["title"],
+            "body": issue.get("body") or "",
+            "labels": [{"name": label["name"]} for label in issue["labels"]],
+            "state": issue["state"].upper(),
+            "comments": [
+                {"author": {"login": c["user"]["login"]}, "body": c["body"], "createdAt": c["created_at"]}
+                for c in comments
+            ],
+        }
+
+    async def create_issue(self, title: str, body: str, labels: list[str] | None = None) -> dict:
+        """Create an issue and return the raw API object."""
+        payload = {"title": title, "body": body}
+        if labels:
+            payload["labels"] = labels
+        response = await self.request("POST", f"/repos/{self.repo}/issues", json=payload)
+        return response.json()
+
+    async def add_comment(self, number: int, body: str) -> dict:
+        response = await self.request("POST", f"/repos/{self.repo}/issues/{number}/comments", json={"body": body})
+        return response.json()
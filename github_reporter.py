@@ -1,33 +1,78 @@
-from github import Github
 from config import config
+from dedup_index import DedupIndex
+from github_client import GitHubClient
+from issue_cache import IssueCache
+
+OPEN_ISSUE_TITLES_QUERY = """
+query($owner: String!, $name: String!, $cursor: String) {
+  repository(owner: $owner, name: $name) {
+    issues(states: OPEN, first: 100, after: $cursor) {
+      nodes { number title }
+      pageInfo { hasNextPage endCursor }
+    }
+  }
+}
+"""
 
 
 class GitHubReporter:
-    def __init__(self):
-        self.github = Github(config.GITHUB_TOKEN)
-        self.repo = self.github.get_repo(config.GITHUB_REPO)
-        self._existing_issues: list[str] | None = None
+    def __init__(self, client: GitHubClient | None = None):
+        self.client = client or GitHubClient(config.GITHUB_TOKEN, config.GITHUB_REPO, base_url=config.GITHUB_API_URL)
+        self.cache = IssueCache.from_env(self.client)
+        self._index: DedupIndex | None = None
+
+    async def _fetch_open_titles(self) -> list[tuple[int, str]]:
+        """Fetch (number, title) of open issues via GraphQL, without bodies."""
+        owner, name = config.GITHUB_REPO.split("/", 1)
+        results = []
+        cursor = None
+        while True:
+            data = await self.client.graphql(
+                OPEN_ISSUE_TITLES_QUERY, {"owner": owner, "name": name, "cursor": cursor}
+            )
+            issues = data["repository"]["issues"]
+            results.extend((node["number"], node["title"]) for node in issues["nodes"])
+            if not issues["pageInfo"]["hasNextPage"]:
+                return results
+            cursor = issues["pageInfo"]["endCursor"]
+
+    async def get_index(self) -> DedupIndex:
+        """Build the duplicate-detection index from open issue titles on first use."""
+        if self._index is None:
+            index = DedupIndex(config.DEDUP_THRESHOLD)
+            try:
+                await self.cache.sync()
+                for issue in await self.cache.list_issues("open", limit=None):
+                    index.add(issue["title"], issue["body"], key=issue["number"])
+            except Exception:
+                # Cache sync failed; fall back to a title-only fetch
+                for number, title in await self._fetch_open_titles():
+                    index.add(title, key=number)
+            self._index = index
+        return self._index
 
-    def get_existing_issues(self) -> list[str]:
+    async def get_existing_issues(self) -> list[str]:
         """Fetch titles of open issues for duplicate detection."""
-        if self._existing_issues is None:
-            issues = self.repo.get_issues(state="open")
-            self._existing_issues = [issue.title.lower() for issue in issues]
-        return self._existing_issues
+        return (await self.get_index()).titles()
 
-    def is_duplicate(self, title: str) -> bool:
+    async def is_duplicate(self, title: str, body: str = "") -> bool:
         """Check if a similar issue already exists."""
-        existing = self.get_existing_issues()
-        title_lower = title.lower()
-        for existing_title in existing:
-            # Simple similarity check - title contains or is contained
-            if title_lower in existing_title or existing_title in title_lower:
-                return True
-        return False
-
-    def create_bug(self, title: str, description: str, steps_to_reproduce: str) -> dict:
+        return (await self.get_index()).find(title, body) is not None
+
+    def is_known_duplicate(self, title: str, body: str = "") -> bool:
+        """Duplicate check against the index if already loaded; never touches the network."""
+        return self._index is not None and self._index.find(title, body) is not None
+
+    async def _create(self, title: str, description: str, body: str, label: str) -> dict:
+        issue = await self.client.create_issue(title, body, [label])
+        # Make the new issue visible to dedup and to the other servers right away
+        self._index.add(title, description, key=issue["number"])
+        await self.cache.record(issue)
+        return {"status": "created", "url": issue["html_url"], "number": issue["number"]}
+
+    async def create_bug(self, title: str, description: str, steps_to_reproduce: str) -> dict:
         """Create a bug issue."""
-        if self.is_duplicate(title):
+        if await self.is_duplicate(title, description):
             return {"status": "skipped", "reason": "duplicate"}
 
         body = f"""## Description
@@ -39,13 +84,11 @@ class GitHubReporter:
 ---
 *Reported by automated QA agent*
 """
-        issue = self.repo.create_issue(title=title, body=body, labels=["bug"])
-        self._existing_issues.append(title.lower())
-        return {"status": "created", "url": issue.html_url, "number": issue.number}
+        return await self._create(title, description, body, "bug")
 
-    def create_feature_request(self, title: str, description: str, rationale: str) -> dict:
+    async def create_feature_request(self, title: str, description: str, rationale: str) -> dict:
         """Create a feature request issue."""
-        if self.is_duplicate(title):
+        if await self.is_duplicate(title, description):
             return {"status": "skipped", "reason": "duplicate"}
 
         body = f"""## Description
@@ -57,6 +100,4 @@ class GitHubReporter:
 ---
 *Suggested by automated QA agent*
 """
-        issue = self.repo.create_issue(title=title, body=body, labels=["enhancement"])
-        self._existing_issues.append(title.lower())
-        return {"status": "created", "url": issue.html_url, "number": issue.number}
+        return await self._create(title, description, body, "enhancement")
@@ -1,79 +1,72 @@
 #!/usr/bin/env python3
 """Growth Agent - MCP server for marketing research and campaign planning."""
 
-import json
 import os
-import subprocess
 from datetime import date
 from mcp.server.fastmcp import FastMCP
+from metrics import Metrics
+from github_client import GitHubClient
+from issue_cache import IssueCache
 
 mcp = FastMCP("growth-agent")
+metrics = Metrics("growth-agent")
+tool = metrics.instrument(mcp)
+
+# Global state
+github: GitHubClient | None = None
+issue_cache: IssueCache | None = None
 
 
 # =============================================================================
-# GitHub Tools (via gh CLI)
+# GitHub Tools
 # =============================================================================
 
-def _run_gh(args: list[str]) -> dict:
-    """Run a gh CLI command and return parsed JSON."""
-    try:
-        repo = os.environ.get("GITHUB_REPO", "")
-        if repo and "--repo" not in args:
-            args = ["--repo", repo] + args
-
-        result = subprocess.run(
-            ["gh"] + args,
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
-        if result.returncode != 0:
-            return {"error": result.stderr.strip()}
-
-        if result.stdout.strip():
-            return json.loads(result.stdout)
-        return {"status": "ok"}
-    except subprocess.TimeoutExpired:
-        return {"error": "Command timed out"}
-    except json.JSONDecodeError:
-        return {"output": result.stdout.strip()}
-    except Exception as e:
-        return {"error": str(e)}
+async def _github() -> tuple[GitHubClient, IssueCache]:
+    """Create the pooled GitHub client and issue cache on first use."""
+    global github, issue_cache
+    if github is None:
+        client = await GitHubClient.from_env()
+        if github is None:
+            github, issue_cache = client, IssueCache.from_env(client)
+        else:
+            await client.aclose()  # A concurrent first call got there first
+    return github, issue_cache
 
 
-@mcp.tool()
-def list_issues(state: str = "open", labels: str = "") -> dict:
+@tool()
+async def list_issues(state: str = "open", labels: str = "") -> dict:
     """List GitHub issues. State: open, closed, or all. Labels: comma-separated."""
-    args = ["issue", "list", "--json", "number,title,labels,state,body", "--limit", "50", "--state", state]
-    if labels:
-        args.extend(["--label", labels])
-    return _run_gh(args)
+    client, cache = await _github()
+    try:
+        await cache.sync()
+        return await cache.list_issues(state, labels)
+    except Exception:
+        pass  # Cache unavailable; ask the API directly
+    try:
+        return await client.list_issues(state, labels)
+    except Exception as e:
+        return {"error": str(e)}
 
 
-@mcp.tool()
-def create_issue(title: str, body: str, labels: str = "") -> dict:
+@tool()
+async def create_issue(title: str, body: str, labels: str = "") -> dict:
     """Create a GitHub issue. Labels: comma-separated (e.g., 'marketing,growth')."""
-    repo = os.environ.get("GITHUB_REPO", "")
-    args = ["gh", "issue", "create", "--title", title, "--body", body]
-    if repo:
-        args.extend(["--repo", repo])
-    if labels:
-        for label in labels.split(","):
-            args.extend(["--label", label.strip()])
-
-    result = subprocess.run(args, capture_output=True, text=True, timeout=30)
-    if result.returncode != 0:
-        return {"error": result.stderr.strip()}
+    client, cache = await _github()
+    label_list = [label.strip() for label in labels.split(",") if label.strip()]
+    try:
+        issue = await client.create_issue(title, body, label_list)
+    except Exception as e:
+        return {"error": str(e)}
 
-    url = result.stdout.strip()
-    return {"status": "created", "url": url}
+    await cache.record(issue)
+    return {"status": "created", "url": issue["html_url"]}
 
 
 # =============================================================================
 # Strategy Tools
 # =============================================================================
 
-@mcp.tool()
+@tool()
 def save_strategy(filename: str, content: str) -> dict:
     """Save a strategy/research document to docs/strategy/. Returns the file path."""
     os.makedirs("docs/strategy", exist_ok=True)
@@ -94,7 +87,7 @@ def save_strategy(filename: str, content: str) -> dict:
     return {"status": "ok", "path": path}
 
 
-@mcp.tool()
+@tool()
 def read_file(path: str) -> dict:
     """Read a file's contents. Use for reading strategy docs or previous research."""
     try:
@@ -106,5 +99,11 @@ def read_file(path: str) -> dict:
         return {"error": str(e)}
 
 
+@tool()
+def get_metrics() -> dict:
+    """Get per-tool call counts, latency percentiles/histograms, payload sizes, errors and sub-phase timings."""
+    return metrics.summary()
+
+
 if __name__ == "__main__":
     mcp.run()
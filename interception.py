@@ -0,0 +1,75 @@
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
+
+from playwright.async_api import BrowserContext, Route
+
+# Resource types that only matter when someone looks at the page
+VISUAL_RESOURCE_TYPES = {"image", "font", "media"}
+
+# Re-request images and fonts that were blocked before the blocker was paused.
+# Stylesheets are re-attached so their @font-face rules get fresh FontFaces.
+RELOAD_VISUALS_SCRIPT = """
+async () => {
+    const images = Array.from(document.images);
+    for (const img of images) {
+        if (img.srcset) { const srcset = img.srcset; img.srcset = ''; img.srcset = srcset; }
+        if (img.src) { const src = img.src; img.src = ''; img.src = src; }
+    }
+    document.querySelectorAll('link[rel="stylesheet"]').forEach(link => {
+        link.after(link.cloneNode());
+    });
+    const loaded = Promise.all(images.map(img => img.complete ? null : new Promise(resolve => {
+        img.addEventListener('load', resolve, {once: true});
+        img.addEventListener('error', resolve, {once: true});
+    })));
+    await Promise.race([Promise.all([loaded, document.fonts.ready]), new Promise(r => setTimeout(r, 5000))]);
+}
+"""
+
+
+class ResourceBlocker:
+    """Route handler that aborts requests by resource type or domain.
+
+    Domain entries match the host and any of its subdomains. Resource-type
+    blocking can be paused (e.g. around a screenshot); domain blocking cannot.
+    """
+
+    def __init__(self, blocked_types: set[str], blocked_domains: list[str]):
+        self.blocked_types = blocked_types
+        self.blocked_domains = [d.lower().lstrip(".") for d in blocked_domains]
+        self.blocked_count = 0
+        self._types_paused = False
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.blocked_types or self.blocked_domains)
+
+    @property
+    def blocks_visuals(self) -> bool:
+        return bool(self.blocked_types & VISUAL_RESOURCE_TYPES)
+
+    async def attach(self, context: BrowserContext):
+        if self.enabled:
+            await context.route("**/*", self._handle)
+
+    def _blocked_domain(self, url: str) -> bool:
+        host = (urlparse(url).hostname or "").lower()
+        return any(host == d or host.endswith("." + d) for d in self.blocked_domains)
+
+    async def _handle(self, route: Route):
+        request = route.request
+        blocked_type = not self._types_paused and request.resource_type in self.blocked_types
+        if blocked_type or self._blocked_domain(request.url):
+            self.blocked_count += 1
+            await route.abort("blockedbyclient")
+        else:
+            await route.fallback()  # On to the response cache's handler, if any, else the network
+
+    @asynccontextmanager
+    async def visuals_enabled(self):
+        """Temporarily let blocked resource types through."""
+        self._types_paused = True
+        try:
+            yield
+        finally:
+            self._types_paused = False
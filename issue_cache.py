@@ -0,0 +1,180 @@
+"""Local SQLite cache of a repository's issues, shared by the MCP servers.
+
+Reads are served from the database. `sync()` brings it up to date with
+an incremental `since=` query through the shared GitHubClient, sending the
+previous ETag as If-None-Match so an unchanged repository costs a 304
+(which does not count against the rate limit). Syncs are skipped while
+the last check is younger than the TTL, so back-to-back and concurrent
+agent runs share one round-trip.
+
+Every MCP server and the reporter share the database, and a writer in one
+can keep it busy, so database work runs on a worker thread instead of
+stalling the caller's event loop.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from github_client import NEXT_LINK_RE, GitHubClient
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS issues (
+    repo TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    body TEXT NOT NULL,
+    state TEXT NOT NULL,
+    labels TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (repo, number)
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    repo TEXT PRIMARY KEY,
+    since TEXT,
+    url TEXT,
+    etag TEXT,
+    checked_at REAL NOT NULL
+);
+"""
+
+
+class IssueCache:
+    def __init__(self, path: str, client: GitHubClient, ttl: float = 60):
+        self.client = client
+        self.repo = client.repo
+        self.ttl = ttl
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        self._sync_lock = asyncio.Lock()
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(SCHEMA)
+
+    @classmethod
+    def from_env(cls, client: GitHubClient) -> "IssueCache":
+        return cls(
+            os.environ.get("ISSUE_CACHE_PATH", ".cache/issues.sqlite3"),
+            client,
+            ttl=float(os.environ.get("ISSUE_CACHE_TTL", "60")),
+        )
+
+    def _sync_state(self) -> sqlite3.Row | None:
+        with self._lock:
+            return self._db.execute("SELECT * FROM sync_state WHERE repo = ?", (self.repo,)).fetchone()
+
+    async def sync(self, force: bool = False) -> dict:
+        """Fetch issues updated since the last sync; no-op while within the TTL."""
+        async with self._sync_lock:
+            state = await asyncio.to_thread(self._sync_state)
+            if not force and state and time.time() - state["checked_at"] < self.ttl:
+                return {"status": "fresh"}
+
+            since = state["since"] if state else None
+            url = f"/repos/{self.repo}/issues?state=all&sort=updated&direction=asc&per_page=100"
+            if since:
+                url += f"&since={since}"
+            headers = {"If-None-Match": state["etag"]} if state and state["url"] == url and state["etag"] else {}
+
+            response = await self.client.request("GET", url, headers=headers)
+            if response.status_code == 304:
+                await asyncio.to_thread(self._touch)
+                return {"status": "not_modified"}
+
+            first_etag = response.headers.get("ETag")
+            issues = []
+            while True:
+                for issue in response.json():
+                    if since is None or issue["updated_at"] > since:
+                        since = issue["updated_at"]
+                    if "pull_request" not in issue:
+                        issues.append(issue)
+                match = NEXT_LINK_RE.search(response.headers.get("Link", ""))
+                if not match:
+                    break
+                response = await self.client.request("GET", match.group(1))
+
+            await asyncio.to_thread(self._store, issues, since, url, first_etag)
+            return {"status": "synced", "updated": len(issues)}
+
+    def _touch(self):
+        with self._lock, self._db:
+            self._db.execute("UPDATE sync_state SET checked_at = ? WHERE repo = ?", (time.time(), self.repo))
+
+    def _store(self, issues: list[dict], since: str | None, url: str, etag: str | None):
+        with self._lock, self._db:
+            for issue in issues:
+                self._upsert(issue)
+            # `since` is inclusive, so re-requesting the same URL keeps matching
+            # the newest issue; its ETag then lets the next sync be a 304.
+            self._db.execute(
+                "INSERT OR REPLACE INTO sync_state (repo, since, url, etag, checked_at) VALUES (?, ?, ?, ?, ?)",
+                (self.repo, since, url, etag, time.time()),
+            )
+
+    def _upsert(self, issue: dict):
+        self._db.execute(
+            "INSERT OR REPLACE INTO issues (repo, number, title, body, state, labels, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                self.repo,
+                issue["number"],
+                issue["title"],
+                issue.get("body") or "",
+                issue["state"].upper(),
+                json.dumps([label["name"] for label in issue.get("labels", [])]),
+                issue["updated_at"],
+            ),
+        )
+
+    async def record(self, issue: dict):
+        """Store an issue we just created or changed, ahead of the next sync."""
+        await asyncio.to_thread(self._record, issue)
+
+    def _record(self, issue: dict):
+        with self._lock, self._db:
+            self._upsert(issue)
+
+    async def expire(self):
+        """Force the next sync to hit the API, e.g. after creating an issue elsewhere."""
+        await asyncio.to_thread(self._expire)
+
+    def _expire(self):
+        with self._lock, self._db:
+            self._db.execute("UPDATE sync_state SET checked_at = 0 WHERE repo = ?", (self.repo,))
+
+    async def list_issues(self, state: str = "open", labels: str = "", limit: int | None = 50) -> list[dict]:
+        """Issues in the same shape as `gh issue list --json number,title,labels,state,body`."""
+        return await asyncio.to_thread(self._list_issues, state, labels, limit)
+
+    def _list_issues(self, state: str, labels: str, limit: int | None) -> list[dict]:
+        wanted = {label.strip() for label in labels.split(",") if label.strip()}
+        query = "SELECT * FROM issues WHERE repo = ?"
+        params: list = [self.repo]
+        if state != "all":
+            query += " AND state = ?"
+            params.append(state.upper())
+        query += " ORDER BY number DESC"
+
+        results = []
+        with self._lock:
+            rows = self._db.execute(query, params).fetchall()
+        for row in rows:
+            row_labels = json.loads(row["labels"])
+            if wanted and not wanted.issubset(row_labels):
+                continue
+            results.append({
+                "number": row["number"],
+                "title": row["title"],
+                "labels": [{"name": name} for name in row_labels],
+                "state": row["state"],
+                "body": row["body"],
+            })
+            if limit is not None and len(results) >= limit:
+                break
+        return results
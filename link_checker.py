@@ -0,0 +1,125 @@
+"""Concurrent link verification through a browser context's request API.
+
+Requests go through `BrowserContext.request`, which shares the context's
+cookie jar, so links behind the session cookie from `login()` check as
+the logged-in user. Each URL is tried with HEAD first and falls back to
+GET when the server rejects or mishandles HEAD. Links that would end the
+session or change data (logout, delete, ...) are never requested, since
+even a HEAD to them can log the agent out. HTTP statuses are cached per
+checker, so a URL linked from many pages is only fetched once per run;
+timeouts and connection errors are retried on the next check.
+"""
+
+import asyncio
+import re
+import time
+from urllib.parse import urlsplit, urlunsplit
+
+from playwright.async_api import APIRequestContext
+
+# Anchors with their text; `href` is already resolved against the document base
+LINKS_SCRIPT = """
+() => Array.from(document.querySelectorAll('a[href], area[href]'), a => ({
+    href: a.href,
+    text: (a.innerText || a.getAttribute('aria-label') || a.title || '').trim().slice(0, 80),
+}))
+"""
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+# Links that end the session or change data when merely requested
+UNSAFE_LINK_RE = re.compile(r"log[-_]?out|sign[-_]?out|delete|destroy|remove|unsubscribe", re.IGNORECASE)
+# Responses that often mean "HEAD not supported" rather than "broken"
+HEAD_FALLBACK_STATUSES = {403, 404, 405, 501}
+
+
+def canonicalize(url: str) -> str | None:
+    """Normalize an http(s) URL for dedup (no fragment, lowercase host, no default port); None otherwise."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return None
+    host = parts.hostname.lower()
+    try:
+        port = parts.port
+    except ValueError:
+        return None
+    netloc = host if port in (None, DEFAULT_PORTS[scheme]) else f"{host}:{port}"
+    return urlunsplit((scheme, netloc, parts.path or "/", parts.query, ""))
+
+
+class LinkChecker:
+    def __init__(self, concurrency: int = 8, timeout_ms: int = 10000, slow_ms: int = 3000):
+        self.concurrency = concurrency
+        self.timeout_ms = timeout_ms
+        self.slow_ms = slow_ms
+        self._cache: dict[str, dict] = {}
+        self._inflight: dict[str, asyncio.Task] = {}
+
+    async def _fetch(self, request: APIRequestContext, url: str, slots: asyncio.Semaphore) -> dict:
+        async with slots:
+            start = time.perf_counter()
+            method = "HEAD"
+            try:
+                response = await request.head(url, timeout=self.timeout_ms)
+                if response.status in HEAD_FALLBACK_STATUSES:
+                    await response.dispose()
+                    method = "GET"
+                    response = await request.get(url, timeout=self.timeout_ms)
+                status = response.status
+                await response.dispose()
+                error = None
+            except Exception as e:
+                status, error = None, str(e).splitlines()[0]
+            ms = round((time.perf_counter() - start) * 1000, 1)
+        return {"url": url, "status": status, "method": method, "ms": ms, "error": error}
+
+    async def _check_one(self, request: APIRequestContext, url: str, slots: asyncio.Semaphore) -> dict:
+        if url in self._cache:
+            return {**self._cache[url], "cached": True}
+        # Concurrent checks (e.g. from parallel sessions) share one fetch per URL
+        task = self._inflight.get(url)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(request, url, slots))
+            self._inflight[url] = task
+            task.add_done_callback(lambda _: self._inflight.pop(url, None))
+        result = await asyncio.shield(task)
+        if result["error"] is None:
+            self._cache[url] = result  # Transient failures (timeouts, resets) are not final
+        return result
+
+    async def check(self, request: APIRequestContext, links: list[dict], same_host: str | None = None) -> dict:
+        """Check `links` ({href, text}) and return only failures and slow responses.
+
+        With `same_host`, links to other hosts are skipped; unsafe links
+        (logout, delete, ...) are always skipped and listed as such.
+        """
+        texts: dict[str, str] = {}
+        unsafe: list[str] = []
+        for link in links:
+            url = canonicalize(link["href"])
+            if url is None or (same_host and urlsplit(url).hostname != same_host):
+                continue
+            if UNSAFE_LINK_RE.search(url):
+                if url not in unsafe:
+                    unsafe.append(url)
+                continue
+            texts.setdefault(url, link.get("text", ""))
+
+        slots = asyncio.Semaphore(self.concurrency)
+        results = await asyncio.gather(*(self._check_one(request, url, slots) for url in texts))
+
+        failures, slow = [], []
+        for result in results:
+            entry = {**result, "text": texts[result["url"]]}
+            entry.pop("cached", None)
+            if result["error"] or result["status"] >= 400:
+                failures.append(entry)
+            elif result["ms"] >= self.slow_ms:
+                slow.append(entry)
+        return {
+            "checked": len(results),
+            "cached": sum(1 for result in results if result.get("cached")),
+            "failures": failures,
+            "slow": sorted(slow, key=lambda entry: entry["ms"], reverse=True),
+            "skipped_unsafe": unsafe,
+        }
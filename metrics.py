@@ -0,0 +1,181 @@
+"""Latency and payload instrumentation for MCP tools.
+
+`Metrics.instrument(mcp)` returns a drop-in replacement for `mcp.tool`
+that times every call and records its response size, error class and
+sub-phase timings into in-memory histograms, and appends one JSON line
+per call to a trace file (METRICS_TRACE_DIR, empty to disable).
+
+Code under a tool marks sub-phases with `with phase("settle"): ...`;
+time is attributed to whichever tool call is running in the current
+task. Phases may nest (e.g. "login" includes its "settle").
+"""
+
+import bisect
+import functools
+import inspect
+import json
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000]
+SAMPLES_KEPT = 1000
+
+_current_phases: ContextVar[dict | None] = ContextVar("current_phases", default=None)
+
+
+@contextmanager
+def phase(name: str):
+    """Attribute the time spent in this block to a named sub-phase of the current tool call."""
+    phases = _current_phases.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if phases is not None:
+            phases[name] = phases.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+
+def _error_class(result) -> str | None:
+    """Tools report most failures in their result rather than by raising."""
+    if isinstance(result, dict):
+        if "error" in result:
+            return "ErrorResult"
+        if result.get("status") in ("error", "failed"):
+            return "ErrorStatus"
+    return None
+
+
+class ToolStats:
+    def __init__(self):
+        self.calls = 0
+        self.errors: dict[str, int] = {}
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self.samples: deque[float] = deque(maxlen=SAMPLES_KEPT)
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.total_bytes = 0
+        self.max_bytes = 0
+        self.phase_ms: dict[str, float] = {}
+
+    def add(self, ms: float, size: int, error: str | None, phases: dict[str, float]):
+        self.calls += 1
+        if error:
+            self.errors[error] = self.errors.get(error, 0) + 1
+        self.buckets[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.samples.append(ms)
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.total_bytes += size
+        self.max_bytes = max(self.max_bytes, size)
+        for name, value in phases.items():
+            self.phase_ms[name] = self.phase_ms.get(name, 0.0) + value
+
+    def summary(self) -> dict:
+        ordered = sorted(self.samples)
+
+        def percentile(p: float) -> float:
+            return round(ordered[min(int(len(ordered) * p), len(ordered) - 1)], 1) if ordered else 0.0
+
+        labels = [f"<={b}ms" for b in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}ms"]
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "mean_ms": round(self.total_ms / self.calls, 1) if self.calls else 0.0,
+            "p50_ms": percentile(0.5),
+            "p95_ms": percentile(0.95),
+            "max_ms": round(self.max_ms, 1),
+            "histogram": {label: n for label, n in zip(labels, self.buckets) if n},
+            "mean_bytes": self.total_bytes // self.calls if self.calls else 0,
+            "max_bytes": self.max_bytes,
+            "phase_ms": {name: round(ms, 1) for name, ms in self.phase_ms.items()},
+        }
+
+
+class Metrics:
+    def __init__(self, server: str):
+        self.server = server
+        self.started = time.time()
+        self.tools: dict[str, ToolStats] = {}
+        trace_dir = os.environ.get("METRICS_TRACE_DIR", ".cache/traces")
+        self.trace_path = os.path.join(trace_dir, f"{server}-{os.getpid()}.jsonl") if trace_dir else None
+        if self.trace_path:
+            os.makedirs(trace_dir, exist_ok=True)
+
+    def record(self, tool: str, ms: float, size: int, error: str | None, phases: dict[str, float]):
+        self.tools.setdefault(tool, ToolStats()).add(ms, size, error, phases)
+        if self.trace_path:
+            line = {
+                "ts": round(time.time(), 3),
+                "tool": tool,
+                "ms": round(ms, 1),
+                "bytes": size,
+                "error": error,
+                "phases": {name: round(value, 1) for name, value in phases.items()},
+            }
+            with open(self.trace_path, "a") as f:
+                f.write(json.dumps(line) + "\n")
+
+    def summary(self) -> dict:
+        return {
+            "server": self.server,
+            "uptime_s": round(time.time() - self.started),
+            "trace_path": self.trace_path,
+            "tools": {name: stats.summary() for name, stats in sorted(self.tools.items())},
+        }
+
+    def _finish(self, name: str, start: float, phases: dict, result=None, error: str | None = None):
+        ms = (time.perf_counter() - start) * 1000
+        size = len(json.dumps(result, default=str)) if result is not None else 0
+        self.record(name, ms, size, error or _error_class(result), phases)
+
+    def instrument(self, mcp):
+        """Return a `tool()` decorator factory that registers instrumented tools on `mcp`."""
+
+        def tool(*args, **kwargs):
+            register = mcp.tool(*args, **kwargs)
+
+            def decorator(fn):
+                name = kwargs.get("name") or fn.__name__
+
+                # FastMCP inspects the signature (followed through __wrapped__)
+                # and whether the function is a coroutine, so keep both intact.
+                if inspect.iscoroutinefunction(fn):
+                    @functools.wraps(fn)
+                    async def wrapper(*a, **kw):
+                        phases: dict[str, float] = {}
+                        token = _current_phases.set(phases)
+                        start = time.perf_counter()
+                        try:
+                            result = await fn(*a, **kw)
+                        except Exception as e:
+                            self._finish(name, start, phases, error=type(e).__name__)
+                            raise
+                        finally:
+                            _current_phases.reset(token)
+                        self._finish(name, start, phases, result)
+                        return result
+                else:
+                    @functools.wraps(fn)
+                    def wrapper(*a, **kw):
+                        phases: dict[str, float] = {}
+                        token = _current_phases.set(phases)
+                        start = time.perf_counter()
+                        try:
+                            result = fn(*a, **kw)
+                        except Exception as e:
+                            self._finish(name, start, phases, error=type(e).__name__)
+                            raise
+                        finally:
+                            _current_phases.reset(token)
+                        self._finish(name, start, phases, result)
+                        return result
+
+                register(wrapper)
+                return fn
+
+            return decorator
+
+        return tool
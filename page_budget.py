@@ -0,0 +1,100 @@
+"""Size-bounded, ranked serialization of extracted page elements.
+
+Elements are ranked (in the viewport first, then interactive controls and
+headings, then the rest; elements with no box last) and the highest ranked
+ones are emitted, in document order, until `max_chars` is reached. Long
+runs of repeated structures (table rows, list items, cards) are collapsed
+to a few samples plus a summary line. Everything left out - over budget
+or collapsed - can be fetched in rank order with `page`; asking for a
+page past the last one is an error rather than a repeat of the last page.
+"""
+
+import re
+
+INTERACTIVE_TAGS = {"a", "button", "input", "select", "textarea"}
+HEADING_TAGS = {"h1", "h2", "h3", "h4"}
+STRUCTURAL_TAGS = {"form", "label"} | HEADING_TAGS
+
+TAG_RE = re.compile(r"^<([a-z0-9-]+)")
+NTH_RE = re.compile(r":\d+")
+CLASS_RE = re.compile(r' class="([^"]*)"')
+
+COLLAPSE_MIN = 6  # siblings with the same structure before collapsing kicks in
+COLLAPSE_SAMPLES = 3
+MAX_CLASSES = 3
+
+
+def _rank(el: dict, index: int) -> tuple:
+    tag = TAG_RE.match(el["html"]).group(1)
+    # role="button" / onclick elements have other tags but are still controls
+    interactive = tag in INTERACTIVE_TAGS or tag not in STRUCTURAL_TAGS
+    vis = el.get("vis", 1)
+    return (vis == 0, vis != 2, not (interactive or tag in HEADING_TAGS), index)
+
+
+def _template(key: str) -> str:
+    """Fingerprint with ancestor sibling indices wildcarded.
+
+    Elements inside repeated containers (rows, list items, cards) share a
+    template; siblings that are themselves the repeated unit, like the
+    links of a nav bar, keep distinct templates and are never collapsed.
+    """
+    *ancestors, leaf = key.split(">")
+    return ">".join([NTH_RE.sub(":*", part) for part in ancestors] + [leaf])
+
+
+def _trim_classes(html: str) -> str:
+    def keep_first(match):
+        classes = match.group(1).split()
+        return f' class="{" ".join(classes[:MAX_CLASSES])}"' if classes else ""
+
+    return CLASS_RE.sub(keep_first, html, count=1)
+
+
+def serialize(elements: list[dict], max_chars: int, page: int = 1) -> dict:
+    """Emit one budget-sized page of ranked elements plus size accounting, or an error for a missing page."""
+    raw_chars = sum(len(el["html"]) + 1 for el in elements)
+
+    groups: dict[str, list[int]] = {}
+    for i, el in enumerate(elements):
+        groups.setdefault(_template(el["key"]), []).append(i)
+    collapsed: dict[int, int] = {}  # representative index -> number of hidden siblings
+    hidden: set[int] = set()
+    for members in groups.values():
+        if len(members) >= COLLAPSE_MIN:
+            collapsed[members[COLLAPSE_SAMPLES - 1]] = len(members) - COLLAPSE_SAMPLES
+            hidden.update(members[COLLAPSE_SAMPLES:])
+
+    visible = sorted((i for i in range(len(elements)) if i not in hidden), key=lambda i: _rank(elements[i], i))
+    collapsed_rest = sorted(hidden, key=lambda i: _rank(elements[i], i))
+
+    # Cut the ranked list into budget-sized pages; collapsed siblings start a fresh page
+    first_collapsed = collapsed_rest[0] if collapsed_rest else None
+    pages: list[list[int]] = [[]]
+    used = 0
+    for i in visible + collapsed_rest:
+        size = len(_trim_classes(elements[i]["html"])) + 1
+        if i in collapsed:
+            size += 60  # summary line
+        if pages[-1] and (used + size > max_chars or i == first_collapsed):
+            pages.append([])
+            used = 0
+        pages[-1].append(i)
+        used += size
+
+    if not 1 <= page <= len(pages):
+        return {"status": "error", "message": f"No page {page}; this page state has {len(pages)}", "pages": len(pages)}
+    lines = []
+    for i in sorted(pages[page - 1]):
+        lines.append(_trim_classes(elements[i]["html"]))
+        if i in collapsed:
+            lines.append(f"<!-- {collapsed[i]} more similar elements; see later pages -->")
+    html = "\n".join(lines)
+
+    return {
+        "html": html,
+        "page": page,
+        "pages": len(pages),
+        "raw_chars": raw_chars,
+        "emitted_chars": len(html),
+    }
@@ -0,0 +1,28 @@
+class PageSnapshot:
+    """Simplified elements of a page, keyed by stable element fingerprint."""
+
+    def __init__(self, url: str, elements: list[dict], version: int):
+        """`elements` come from RefMap.assign, which already made their keys unique."""
+        self.url = url
+        self.version = version
+        self.elements: dict[str, str] = {el["key"]: el["html"] for el in elements}
+
+    def html(self) -> str:
+        return "\n".join(self.elements.values())
+
+
+def diff_snapshots(old: PageSnapshot, new: PageSnapshot) -> dict:
+    """Return elements added, removed and changed between two snapshots of a page."""
+    added = [html for key, html in new.elements.items() if key not in old.elements]
+    removed = [html for key, html in old.elements.items() if key not in new.elements]
+    changed = [
+        html for key, html in new.elements.items()
+        if key in old.elements and old.elements[key] != html
+    ]
+    return {
+        "base_version": old.version,
+        "added": added,
+        "removed": removed,
+        "changed": changed,
+        "unchanged": len(new.elements) - len(added) - len(changed),
+    }
@@ -2,19 +2,51 @@
 """PM Agent - MCP server for product strategy and issue creation."""
 
 import asyncio
-import json
 import os
-import subprocess
 import atexit
+from contextlib import asynccontextmanager
 from datetime import date
 from mcp.server.fastmcp import FastMCP
-from browser import BrowserController
+from metrics import Metrics
+from github_client import GitHubClient
+from issue_cache import IssueCache
+from browser import BrowserController, DEFAULT_SESSION
+from recorder import TraceRecorder
 from config import config
 
-mcp = FastMCP("pm-agent")
-
 # Global state
 browser: BrowserController | None = None
+launch: asyncio.Task | None = None  # Browser start + login, possibly begun at server startup
+github: GitHubClient | None = None
+issue_cache: IssueCache | None = None
+
+
+async def _launch_browser(headless: bool) -> dict:
+    global browser
+    recorder = TraceRecorder(config.RECORD_DIR) if config.RECORD_TRACES else None
+    controller = BrowserController(headless=headless, recorder=recorder)
+    await controller.start()
+    result = await controller.login()
+    browser = controller
+    return result
+
+
+@asynccontextmanager
+async def lifespan(server: FastMCP):
+    """With PREWARM_BROWSER, launch and log in while the client is still connecting."""
+    global launch
+    if config.PREWARM_BROWSER:
+        launch = asyncio.create_task(_launch_browser(config.PREWARM_HEADLESS))
+    try:
+        yield {}
+    finally:
+        if launch and not launch.done():
+            launch.cancel()
+
+
+mcp = FastMCP("pm-agent", lifespan=lifespan)
+metrics = Metrics("pm-agent")
+tool = metrics.instrument(mcp)
 
 
 def cleanup():
@@ -39,17 +71,37 @@ atexit.register(cleanup)
 # Browser Tools (reused from QA agent)
 # =============================================================================
 
-@mcp.tool()
-async def start_browser(headless: bool = True) -> str:
-    """Start the browser and log in to the application. Call this first."""
-    global browser
+async def _start_session(session_id: str) -> str:
+    """Check out a pooled, pre-authenticated context for an extra session."""
+    if session_id == DEFAULT_SESSION:
+        return "Browser already running"
+    if session_id in browser.sessions:
+        return f"Session {session_id} already running"
+    result = await browser.navigate(config.CRANKCASE_URL, session_id=session_id)
+    return f"Session {session_id} started. URL: {result.get('url')}"
+
+
+@tool()
+async def start_browser(headless: bool = True, session_id: str = DEFAULT_SESSION) -> str:
+    """Start the browser and log in to the application. Call this first.
+
+    Pass a session_id to open an additional, already logged-in session that can be driven in parallel.
+    If the server prewarmed a browser, it is reused as is and `headless` is ignored.
+    """
+    global launch
 
     if browser:
-        return "Browser already running"
+        return await _start_session(session_id)
 
-    browser = BrowserController(headless=headless)
-    await browser.start()
-    result = await browser.login()
+    if launch is None:
+        launch = asyncio.create_task(_launch_browser(headless))
+    try:
+        result = await asyncio.shield(launch)
+    except Exception:
+        launch = None
+        raise
+    if session_id != DEFAULT_SESSION:
+        await _start_session(session_id)
 
     status = result.get("status", "unknown")
     if status == "ok":
@@ -58,138 +110,141 @@ async def start_browser(headless: bool = True) -> str:
         return f"Browser started but login failed: {result.get('message', 'unknown error')}. Continuing anyway."
 
 
-@mcp.tool()
-async def stop_browser() -> str:
-    """Close the browser when done."""
-    global browser
+@tool()
+async def stop_browser(session_id: str = "") -> str:
+    """Close the browser when done. Pass a session_id to release only that session."""
+    global browser, launch
 
     if not browser:
         return "Browser not running"
 
+    if session_id:
+        result = await browser.release_session(session_id)
+        return f"Session {session_id} released" if result["status"] == "ok" else result["message"]
+
     await browser.stop()
     browser = None
+    launch = None
     return "Browser closed"
 
 
-@mcp.tool()
-async def get_page_state() -> dict:
-    """Get the current page URL, title, and interactive elements."""
+@tool()
+async def get_page_state(
+    diff: bool = False, max_chars: int | None = None, page: int = 1, session_id: str = DEFAULT_SESSION
+) -> dict:
+    """Get the current page URL, title, and interactive elements.
+
+    Each element carries a ref="N"; pass selector "ref=N" to click to target it directly.
+
+    Pass diff=true after an action on the same page to get only the elements added, removed or changed.
+    Full output is size-limited with the most relevant elements first; if "pages" > 1, pass page=2, 3, ...
+    for the rest. max_chars overrides the size limit (0 = unlimited).
+    """
     if not browser:
         return {"error": "Browser not started. Call start_browser first."}
-    return await browser.get_page_state()
+    return await browser.get_page_state(
+        session_id=session_id, diff=diff, max_chars=max_chars, page_number=page
+    )
 
 
-@mcp.tool()
-async def navigate(url: str) -> dict:
+@tool()
+async def navigate(url: str, session_id: str = DEFAULT_SESSION) -> dict:
     """Navigate to a URL."""
     if not browser:
         return {"error": "Browser not started. Call start_browser first."}
-    return await browser.navigate(url)
+    return await browser.navigate(url, session_id=session_id)
 
 
-@mcp.tool()
-async def click(selector: str) -> dict:
-    """Click on an element using a CSS selector."""
+@tool()
+async def click(selector: str, session_id: str = DEFAULT_SESSION) -> dict:
+    """Click on an element using a CSS selector, or ref=N from get_page_state."""
     if not browser:
         return {"error": "Browser not started. Call start_browser first."}
-    return await browser.click(selector)
+    return await browser.click(selector, session_id=session_id)
 
 
 # =============================================================================
-# GitHub Tools (via gh CLI)
+# GitHub Tools
 # =============================================================================
 
-def _run_gh(args: list[str]) -> dict:
-    """Run a gh CLI command and return parsed JSON."""
-    try:
-        # Use GITHUB_REPO from env if set
-        repo = os.environ.get("GITHUB_REPO", "")
-        if repo and "--repo" not in args:
-            args = ["--repo", repo] + args
-
-        result = subprocess.run(
-            ["gh"] + args,
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
-        if result.returncode != 0:
-            return {"error": result.stderr.strip()}
-
-        if result.stdout.strip():
-            return json.loads(result.stdout)
-        return {"status": "ok"}
-    except subprocess.TimeoutExpired:
-        return {"error": "Command timed out"}
-    except json.JSONDecodeError:
-        return {"output": result.stdout.strip()}
-    except Exception as e:
-        return {"error": str(e)}
+async def _github() -> tuple[GitHubClient, IssueCache]:
+    """Create the pooled GitHub client and issue cache on first use."""
+    global github, issue_cache
+    if github is None:
+        client = await GitHubClient.from_env()
+        if github is None:
+            github, issue_cache = client, IssueCache.from_env(client)
+        else:
+            await client.aclose()  # A concurrent first call got there first
+    return github, issue_cache
 
 
-@mcp.tool()
-def list_issues(state: str = "open", labels: str = "") -> dict:
+@tool()
+async def list_issues(state: str = "open", labels: str = "") -> dict:
     """List GitHub issues. State: open, closed, or all. Labels: comma-separated."""
-    args = ["issue", "list", "--json", "number,title,labels,state,body", "--limit", "50", "--state", state]
-    if labels:
-        args.extend(["--label", labels])
-    return _run_gh(args)
+    client, cache = await _github()
+    try:
+        await cache.sync()
+        return await cache.list_issues(state, labels)
+    except Exception:
+        pass  # Cache unavailable; ask the API directly
+    try:
+        return await client.list_issues(state, labels)
+    except Exception as e:
+        return {"error": str(e)}
 
 
-@mcp.tool()
-def list_prs(state: str = "open") -> dict:
+@tool()
+async def list_prs(state: str = "open") -> dict:
     """List pull requests. State: open, closed, merged, or all."""
-    args = ["pr", "list", "--json", "number,title,state,headRefName", "--limit", "20", "--state", state]
-    return _run_gh(args)
+    client, _ = await _github()
+    try:
+        return await client.list_prs(state)
+    except Exception as e:
+        return {"error": str(e)}
 
 
-@mcp.tool()
-def get_issue(number: int) -> dict:
+@tool()
+async def get_issue(number: int) -> dict:
     """Get full details of a specific issue including comments."""
-    args = ["issue", "view", str(number), "--json", "number,title,body,labels,comments,state"]
-    return _run_gh(args)
+    client, _ = await _github()
+    try:
+        return await client.get_issue(number)
+    except Exception as e:
+        return {"error": str(e)}
 
 
-@mcp.tool()
-def add_comment(issue_number: int, body: str) -> dict:
+@tool()
+async def add_comment(issue_number: int, body: str) -> dict:
     """Add a comment to a GitHub issue."""
-    repo = os.environ.get("GITHUB_REPO", "")
-    args = ["gh", "issue", "comment", str(issue_number), "--body", body]
-    if repo:
-        args.extend(["--repo", repo])
-
-    result = subprocess.run(args, capture_output=True, text=True, timeout=30)
-    if result.returncode != 0:
-        return {"error": result.stderr.strip()}
+    client, _ = await _github()
+    try:
+        await client.add_comment(issue_number, body)
+    except Exception as e:
+        return {"error": str(e)}
 
     return {"status": "ok", "issue": issue_number}
 
 
-@mcp.tool()
-def create_issue(title: str, body: str, labels: str = "") -> dict:
+@tool()
+async def create_issue(title: str, body: str, labels: str = "") -> dict:
     """Create a GitHub issue. Labels: comma-separated (e.g., 'enhancement,priority')."""
-    repo = os.environ.get("GITHUB_REPO", "")
-    args = ["gh", "issue", "create", "--title", title, "--body", body]
-    if repo:
-        args.extend(["--repo", repo])
-    if labels:
-        for label in labels.split(","):
-            args.extend(["--label", label.strip()])
-
-    result = subprocess.run(args, capture_output=True, text=True, timeout=30)
-    if result.returncode != 0:
-        return {"error": result.stderr.strip()}
+    client, cache = await _github()
+    label_list = [label.strip() for label in labels.split(",") if label.strip()]
+    try:
+        issue = await client.create_issue(title, body, label_list)
+    except Exception as e:
+        return {"error": str(e)}
 
-    # gh issue create outputs the URL
-    url = result.stdout.strip()
-    return {"status": "created", "url": url}
+    await cache.record(issue)
+    return {"status": "created", "url": issue["html_url"]}
 
 
 # =============================================================================
 # Strategy Tools
 # =============================================================================
 
-@mcp.tool()
+@tool()
 def save_strategy(filename: str, content: str) -> dict:
     """Save a strategy document to docs/strategy/. Returns the file path."""
     os.makedirs("docs/strategy", exist_ok=True)
@@ -212,7 +267,7 @@ def save_strategy(filename: str, content: str) -> dict:
     return {"status": "ok", "path": path}
 
 
-@mcp.tool()
+@tool()
 def read_file(path: str) -> dict:
     """Read a file's contents. Use for reading strategy docs or proposals."""
     try:
@@ -224,5 +279,11 @@ def read_file(path: str) -> dict:
         return {"error": str(e)}
 
 
+@tool()
+def get_metrics() -> dict:
+    """Get per-tool call counts, latency percentiles/histograms, payload sizes, errors and sub-phase timings."""
+    return metrics.summary()
+
+
 if __name__ == "__main__":
     mcp.run()
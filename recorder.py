@@ -0,0 +1,118 @@
+"""Action traces for record-and-replay regression runs.
+
+With a TraceRecorder attached, every navigate/click/fill/select of a
+BrowserController session is appended to that session's JSONL trace with
+the page URL and a DOM fingerprint before and after, and for element
+actions a stable CSS selector of the element that was actually acted on
+(so traces recorded with `ref=N` selectors replay without refs).
+`replay.py` re-executes traces and flags steps whose outcome diverges.
+
+The fingerprint hashes page structure (title, the distinct kinds of
+controls by tag/id/name and position, top-level heading text) and ignores
+free text and repeats, so timestamps, counters and new list rows don't make
+every step look different.
+"""
+
+import json
+import os
+import re
+import time
+
+from playwright.async_api import ElementHandle, Page
+
+# Same anchoring as extraction's fingerprints (nearest ancestor id, then
+# nth-of-type steps), but as a selector that can be queried again
+DESCRIBE_SCRIPT = """
+(el) => {
+    const parts = [];
+    for (let node = el; node && node !== document.documentElement; node = node.parentElement) {
+        if (node.id) {
+            parts.unshift(`#${CSS.escape(node.id)}`);
+            break;
+        }
+        let nth = 1;
+        for (let sib = node.previousElementSibling; sib; sib = sib.previousElementSibling) {
+            if (sib.tagName === node.tagName) nth++;
+        }
+        parts.unshift(`${node.tagName.toLowerCase()}:nth-of-type(${nth})`);
+    }
+    return {
+        selector: parts.join(' > '),
+        tag: el.tagName.toLowerCase(),
+        text: (el.innerText || el.value || el.getAttribute('aria-label') || '').trim().slice(0, 80),
+    };
+}
+"""
+
+# Each control or heading contributes its tag, id, name and ancestor tag path
+# once, however often it repeats (list and table rows), with digits in ids and
+# the title masked, so adding a row or bumping a counter keeps the fingerprint
+FINGERPRINT_SCRIPT = """
+() => {
+    const mask = (text) => text.replace(/\\d+/g, '#');
+    const keys = new Set([mask(document.title)]);
+    const selectors = 'a, button, input, select, textarea, form, h1, h2, h3, [role="button"]';
+    for (const el of document.querySelectorAll(selectors)) {
+        let path = '';
+        for (let node = el.parentElement, depth = 0; node && depth < 4; node = node.parentElement, depth++) {
+            path = `${node.tagName}>${path}`;
+        }
+        const heading = /^H[12]$/.test(el.tagName) ? ':' + mask(el.innerText.trim().slice(0, 40)) : '';
+        keys.add(`${path}${el.tagName}#${mask(el.id)}.${el.getAttribute('name') || ''}${heading}`);
+    }
+    // 32-bit FNV-1a
+    let hash = 0x811c9dc5;
+    const text = Array.from(keys).sort().join('|');
+    for (let i = 0; i < text.length; i++) {
+        hash ^= text.charCodeAt(i);
+        hash = Math.imul(hash, 0x01000193) >>> 0;
+    }
+    return `${hash.toString(16).padStart(8, '0')}-${keys.size}`;
+}
+"""
+
+
+async def observe(page: Page) -> dict:
+    return {"url": page.url, "fingerprint": await page.evaluate(FINGERPRINT_SCRIPT)}
+
+
+async def describe(element: ElementHandle) -> dict:
+    return await element.evaluate(DESCRIBE_SCRIPT)
+
+
+async def describe_target(page: Page, element: ElementHandle | None, selector: str) -> dict | None:
+    """Best effort description of the element a selector points at, without waiting for it."""
+    try:
+        element = element or await page.query_selector(selector)
+        return await describe(element) if element else None
+    except Exception:
+        return None  # Detached, navigated away, or not a CSS selector
+
+
+class TraceRecorder:
+    def __init__(self, directory: str = "recordings"):
+        self.directory = directory
+        self.run_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"  # Unique across concurrent shards
+        self._paths: dict[str, str] = {}
+        self._steps: dict[str, int] = {}
+
+    def path(self, session_id: str) -> str:
+        if session_id not in self._paths:
+            os.makedirs(self.directory, exist_ok=True)
+            safe = re.sub(r"[^a-zA-Z0-9_-]+", "_", session_id)
+            self._paths[session_id] = os.path.join(self.directory, f"{self.run_id}-{safe}.jsonl")
+            self._steps[session_id] = 0
+        return self._paths[session_id]
+
+    def record(self, session_id: str, step: dict):
+        """Append one step; written immediately so a crashed run still leaves a usable trace."""
+        path = self.path(session_id)
+        self._steps[session_id] += 1
+        line = json.dumps({"step": self._steps[session_id], "ts": round(time.time(), 3), **step})
+        with open(path, "a") as f:
+            f.write(line + "\n")
+
+    def forget(self, session_id: str):
+        """Start a new trace file the next time this session records."""
+        self._paths.pop(session_id, None)
+        self._steps.pop(session_id, None)
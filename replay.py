@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""Headless replay of recorded action traces, without the model.
+
+Each trace (a JSONL file written with RECORD_TRACES=1) is replayed in its
+own pooled session, several at a time. Element steps use the selector of
+the element that was resolved at record time, falling back to the selector
+the agent typed. After every step the outcome is compared with the
+recording: the status, the route the page ended up on (IDs collapsed, so a
+newly created record doesn't count), and the DOM fingerprint. Only
+divergent steps are reported; a trace stops at the first step that fails
+when the recording succeeded, since later steps would fail on the wrong page.
+
+Usage (from the repo root):
+    python -m replay recordings/*.jsonl
+    python -m replay recordings/20250101-*.jsonl --concurrency 4 --ignore-dom --output replay.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+from browser import BrowserController
+from config import config
+from crawler import route_template
+from recorder import FINGERPRINT_SCRIPT
+
+
+def load_trace(path: str) -> list[dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+async def run_step(browser: BrowserController, step: dict, session_id: str) -> dict:
+    action = step["action"]
+    if action == "navigate":
+        try:
+            return await browser.navigate(step["url"], session_id=session_id)
+        except Exception as e:
+            return {"status": "error", "message": str(e)}
+    selector = step.get("target", {}).get("selector") or step["selector"]
+    if action == "click":
+        return await browser.click(selector, session_id=session_id)
+    if action == "fill":
+        return await browser.fill(selector, step["value"], session_id=session_id)
+    if action == "select":
+        return await browser.select(selector, step["value"], session_id=session_id)
+    return {"status": "error", "message": f"Unknown action: {action!r}"}
+
+
+def compare(step: dict, result: dict, url: str, fingerprint: str | None, check_dom: bool) -> list[dict]:
+    if result["status"] != step["status"]:
+        # Where the page ends up after a failed action says nothing new
+        return [{
+            "kind": "status",
+            "recorded": step["status"],
+            "replayed": result["status"],
+            "message": result.get("message") or step.get("message"),
+        }]
+    diffs = []
+    if step.get("url_after") and route_template(url) != route_template(step["url_after"]):
+        diffs.append({"kind": "url", "recorded": step["url_after"], "replayed": url})
+    if check_dom and step.get("fingerprint_after") and fingerprint != step["fingerprint_after"]:
+        diffs.append({"kind": "dom", "recorded": step["fingerprint_after"], "replayed": fingerprint})
+    return diffs
+
+
+async def replay_trace(browser: BrowserController, path: str, session_id: str, check_dom: bool) -> dict:
+    steps = load_trace(path)
+    divergences = []
+    replayed = 0
+    start = time.perf_counter()
+    try:
+        # Start where the recording did, unless the trace opens with its own navigation
+        if steps and steps[0]["action"] != "navigate" and steps[0].get("url_before"):
+            await browser.navigate(steps[0]["url_before"], session_id=session_id)
+        for step in steps:
+            result = await run_step(browser, step, session_id)
+            replayed += 1
+            try:
+                url = await browser.evaluate("() => location.href", session_id=session_id)
+                fingerprint = await browser.evaluate(FINGERPRINT_SCRIPT, session_id=session_id)
+            except Exception:
+                url, fingerprint = "", None  # Context destroyed mid-navigation
+            for diff in compare(step, result, url, fingerprint, check_dom):
+                target = step.get("target", {})
+                divergences.append({
+                    "step": step["step"],
+                    "action": step["action"],
+                    "selector": target.get("selector") or step.get("selector") or step.get("url"),
+                    "element": target.get("text"),
+                    **diff,
+                })
+            if result["status"] != "ok" and step["status"] == "ok":
+                break
+    except Exception as e:
+        divergences.append({"step": replayed + 1, "kind": "error", "message": str(e).splitlines()[0]})
+    finally:
+        await browser.release_session(session_id)
+    return {
+        "trace": path,
+        "steps": len(steps),
+        "replayed": replayed,
+        "ms": round((time.perf_counter() - start) * 1000),
+        "divergences": divergences,
+    }
+
+
+async def replay(paths: list[str], concurrency: int, check_dom: bool) -> dict:
+    # One extra context for the login session
+    browser = BrowserController(headless=True, pool_size=concurrency + 1)
+    await browser.start()
+    started = time.perf_counter()
+    try:
+        login = await browser.login()
+        if login["status"] != "ok":
+            raise RuntimeError(f"Login failed: {login.get('message')}")
+        slots = asyncio.Semaphore(concurrency)
+
+        async def bounded(i: int, path: str) -> dict:
+            async with slots:
+                return await replay_trace(browser, path, f"replay-{i}", check_dom)
+
+        results = await asyncio.gather(*(bounded(i, path) for i, path in enumerate(paths)))
+    finally:
+        await browser.stop()
+
+    diverged = [result for result in results if result["divergences"]]
+    return {
+        "traces": len(results),
+        "steps": sum(result["replayed"] for result in results),
+        "diverged": len(diverged),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000),
+        "results": diverged,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("traces", nargs="+", help="Trace files recorded with RECORD_TRACES=1")
+    parser.add_argument("--concurrency", type=int, default=config.BROWSER_POOL_SIZE,
+                        help="Traces replayed at once (default: BROWSER_POOL_SIZE)")
+    parser.add_argument("--ignore-dom", action="store_true",
+                        help="Compare only status and route, not DOM fingerprints")
+    parser.add_argument("--output", help="Also write the JSON report here")
+    args = parser.parse_args()
+
+    missing = [path for path in args.traces if not os.path.exists(path)]
+    if missing:
+        parser.error(f"no such trace: {', '.join(missing)}")
+
+    report = asyncio.run(replay(args.traces, max(args.concurrency, 1), not args.ignore_dom))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    sys.exit(1 if report["diverged"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""On-disk HTTP response cache served through route fulfillment.
+
+Repeated runs against the same deployment fetch the same bundles and API
+responses on every navigation. With the cache attached, a context's
+requests are looked up by method + URL + request body hash. Hits are
+fulfilled from SQLite without touching the network. Misses are fetched,
+handed to the page, and stored if cacheable.
+
+Entries belong to a build ID: the value of a build header on the site's
+start page, or else a hash of the script and stylesheet URLs it references
+(bundlers put content hashes in those). On a new build the old entries are
+dropped. The store is bounded per entry and in total. The least recently
+used entries are evicted first.
+
+GET and HEAD responses of the configured resource types are stored. A
+full capture (no type filter) stores every method, so that in offline mode,
+where misses are aborted instead of fetched, it stands in for the whole site.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from playwright.async_api import APIRequestContext, BrowserContext, Route
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    build TEXT NOT NULL,
+    key TEXT NOT NULL,
+    method TEXT NOT NULL,
+    url TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    used_at REAL NOT NULL,
+    PRIMARY KEY (build, key)
+);
+CREATE INDEX IF NOT EXISTS responses_used_at ON responses (used_at);
+"""
+
+CACHEABLE_METHODS = {"GET", "HEAD"}
+CACHEABLE_STATUSES = {200, 203, 204, 301, 308, 404, 410}
+BUILD_HEADERS = ("x-build-id", "x-app-version", "x-release", "x-git-sha")
+# Not replayed: the stored body is already decoded, and cookies belong to the live session
+DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "set-cookie"}
+ASSET_RE = re.compile(r"""<(?:script|link)\b[^>]*?\b(?:src|href)\s*=\s*["']([^"']+)["']""", re.IGNORECASE)
+EVICT_TO = 0.9  # of max_bytes, so eviction doesn't run on every store
+
+
+def cache_key(method: str, url: str, body: bytes | None) -> str:
+    body_hash = hashlib.sha256(body).hexdigest() if body else ""
+    return hashlib.sha256(f"{method} {url} {body_hash}".encode()).hexdigest()
+
+
+def build_id_of(headers: dict[str, str], html: str) -> str:
+    """Build header if the site sends one, else a hash of the page's script and stylesheet URLs."""
+    for name in BUILD_HEADERS:
+        if headers.get(name):
+            return headers[name]
+    assets = sorted(set(ASSET_RE.findall(html)))
+    return hashlib.sha256("\n".join(assets).encode()).hexdigest()[:16]
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int,
+        max_entry_bytes: int,
+        resource_types: set[str] | None = None,
+        offline: bool = False,
+    ):
+        """`resource_types` limits what is stored (None stores everything); hits are served regardless."""
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.resource_types = resource_types
+        self.offline = offline
+        self.build: str | None = None
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        self.evicted = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(SCHEMA)
+
+    async def open(self, request: APIRequestContext, start_url: str, build: str | None = None) -> str:
+        """Pick the build to serve: `build`, else the newest stored one (offline) or the live site's."""
+        if not build and self.offline:
+            build = self.latest_build()
+        if not build:
+            try:
+                response = await request.get(start_url, timeout=10000)
+                build = build_id_of(response.headers, await response.text())
+                await response.dispose()
+            except Exception:
+                build = "unknown"  # Site unreachable; nothing stored now will be trusted later
+        await asyncio.to_thread(self.use_build, build)
+        return build
+
+    def latest_build(self) -> str | None:
+        with self._lock:
+            row = self._db.execute("SELECT build FROM responses ORDER BY used_at DESC LIMIT 1").fetchone()
+        return row["build"] if row else None
+
+    def use_build(self, build: str) -> int:
+        """Serve `build` from now on and drop entries of every other build; returns how many were dropped."""
+        self.build = build
+        with self._lock, self._db:
+            return self._db.execute("DELETE FROM responses WHERE build != ?", (build,)).rowcount
+
+    async def attach(self, context: BrowserContext):
+        # Register before the resource blocker: later routes run first, so blocked requests never get here
+        await context.route("**/*", self._handle)
+
+    def _get(self, key: str) -> sqlite3.Row | None:
+        with self._lock, self._db:
+            row = self._db.execute(
+                "SELECT status, headers, body FROM responses WHERE build = ? AND key = ?", (self.build, key)
+            ).fetchone()
+            if row:
+                self._db.execute(
+                    "UPDATE responses SET used_at = ? WHERE build = ? AND key = ?", (time.time(), self.build, key)
+                )
+        return row
+
+    def _put(self, key: str, method: str, url: str, status: int, headers: dict[str, str], body: bytes):
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.build, key, method, url, status, json.dumps(headers), body, len(body), time.time()),
+            )
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            excess = total - self.max_bytes * EVICT_TO
+            victims = []
+            for row in self._db.execute("SELECT build, key, size FROM responses ORDER BY used_at"):
+                victims.append((row["build"], row["key"]))
+                excess -= row["size"]
+                if excess <= 0:
+                    break
+            self._db.executemany("DELETE FROM responses WHERE build = ? AND key = ?", victims)
+            self.evicted += len(victims)
+
+    def _cacheable(self, status: int, headers: dict[str, str], body: bytes) -> bool:
+        return (
+            status in CACHEABLE_STATUSES
+            and len(body) <= self.max_entry_bytes
+            and "no-store" not in headers.get("cache-control", "")
+            and "set-cookie" not in headers
+            and not headers.get("content-type", "").startswith("text/event-stream")
+        )
+
+    async def _handle(self, route: Route):
+        request = route.request
+        # Responses to other methods are only kept in a full capture, where everything is replayed
+        storable = request.method in CACHEABLE_METHODS or self.resource_types is None
+        if not storable and not self.offline:
+            await route.fallback()
+            return
+        key = cache_key(request.method, request.url, request.post_data_buffer)
+        try:
+            row = await asyncio.to_thread(self._get, key)
+            if row:
+                self.hits += 1
+                await route.fulfill(status=row["status"], headers=json.loads(row["headers"]), body=row["body"])
+                return
+            self.misses += 1
+            if self.offline:
+                await route.abort("internetdisconnected")
+                return
+            if self.resource_types is not None and request.resource_type not in self.resource_types:
+                await route.fallback()
+                return
+            # Redirects go back to the page, which then requests (and caches) the target itself
+            response = await route.fetch(max_redirects=0)
+            body = await response.body()
+            await route.fulfill(response=response, body=body)
+        except Exception:
+            try:
+                await route.abort("failed")
+            except Exception:
+                pass  # Already handled, or the page closed mid-request
+            return
+        if self._cacheable(response.status, response.headers, body):
+            headers = {name: value for name, value in response.headers.items() if name not in DROPPED_HEADERS}
+            await asyncio.to_thread(self._put, key, request.method, request.url, response.status, headers, body)
+            self.stored += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT COUNT(*) AS entries, COALESCE(SUM(size), 0) AS bytes FROM responses WHERE build = ?",
+                (self.build,),
+            ).fetchone()
+        return {
+            "build": self.build,
+            "offline": self.offline,
+            "entries": row["entries"],
+            "bytes": row["bytes"],
+            "hits": self.hits,
+            "misses": self.misses,
+            "stored": self.stored,
+            "evicted": self.evicted,
+        }
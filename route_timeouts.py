@@ -0,0 +1,180 @@
+"""Per-route action and load timeouts learned from observed latencies.
+
+A single fixed timeout is either too long (a wrong selector stalls the
+session for the full 30 s) or too short for the one slow page. Instead,
+successful action and navigation latencies are recorded per origin and route
+template (https://site/bikes/:id/edit) in SQLite, so a local stand-in never
+shares samples with the real site. The timeout for a route is a high percentile of
+its recent samples times a headroom multiplier, clamped to a floor and a
+ceiling. Routes with too little history get the configured default.
+Timeouts that fire are counted per route for the report. Navigation
+timeouts, and action timeouts where the element existed but never became
+actionable, are also added as samples, so a route that really got slower
+grows its timeout until it fits again. A selector that matched nothing
+says nothing about the route and never grows it.
+
+Samples are loaded per route on first use and kept in memory, so other
+processes' samples are picked up on the next start. The store is shared
+across shards and can be busy, so database work runs on a worker thread.
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+from crawler import route_template
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples (
+    id INTEGER PRIMARY KEY,
+    route TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    ms REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS samples_route ON samples (route, kind, id);
+CREATE TABLE IF NOT EXISTS timeouts_hit (
+    route TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    last_timeout_ms INTEGER NOT NULL,
+    last_at REAL NOT NULL,
+    PRIMARY KEY (route, kind)
+);
+"""
+
+MIN_SAMPLES = 5
+
+
+def route_key(url: str) -> str:
+    """Origin plus route template: the same path on two hosts is two routes."""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}{route_template(url)}"
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+
+class RouteTimeouts:
+    def __init__(
+        self,
+        path: str,
+        default_ms: int,
+        floor_ms: int = 2000,
+        ceiling_ms: int = 30000,
+        quantile: float = 0.95,
+        headroom: float = 3.0,
+        window: int = 100,
+    ):
+        self.default_ms = default_ms
+        self.floor_ms = floor_ms
+        self.ceiling_ms = ceiling_ms
+        self.quantile = quantile
+        self.headroom = headroom
+        self.window = window
+        self._samples: dict[tuple[str, str], deque[float]] = {}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(SCHEMA)
+
+    def _window(self, route: str, kind: str) -> deque[float]:
+        """The route's recent samples, loaded on first use; call with the lock held."""
+        key = (route, kind)
+        if key not in self._samples:
+            rows = self._db.execute(
+                "SELECT ms FROM samples WHERE route = ? AND kind = ? ORDER BY id DESC LIMIT ?",
+                (route, kind, self.window),
+            ).fetchall()
+            self._samples[key] = deque((row["ms"] for row in reversed(rows)), maxlen=self.window)
+        return self._samples[key]
+
+    async def timeout(self, kind: str, url: str) -> int:
+        """Timeout in ms for an action on (or a navigation to) `url`."""
+        return await asyncio.to_thread(self._derive, route_key(url), kind)
+
+    def _derive(self, route: str, kind: str) -> int:
+        with self._lock:
+            samples = list(self._window(route, kind))
+        if len(samples) < MIN_SAMPLES:
+            return self.default_ms
+        derived = percentile(samples, self.quantile) * self.headroom
+        return round(min(max(derived, self.floor_ms), self.ceiling_ms))
+
+    async def record(self, kind: str, url: str, ms: float):
+        """Add the latency of an action or navigation."""
+        await asyncio.to_thread(self._record, route_key(url), kind, ms)
+
+    def _record(self, route: str, kind: str, ms: float):
+        with self._lock, self._db:
+            self._window(route, kind).append(ms)
+            self._db.execute("INSERT INTO samples (route, kind, ms) VALUES (?, ?, ?)", (route, kind, ms))
+            self._db.execute(
+                "DELETE FROM samples WHERE route = ? AND kind = ? AND id <= "
+                "(SELECT id FROM samples WHERE route = ? AND kind = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                (route, kind, route, kind, self.window),
+            )
+
+    async def record_timeout(self, kind: str, url: str, timeout_ms: int, grow: bool):
+        """Count a timeout for the report; with `grow`, also add it as a sample.
+
+        Only grow for timeouts that say the route is slow (a navigation, or an
+        action whose element existed but never became actionable), not for
+        selectors that matched nothing.
+        """
+        await asyncio.to_thread(self._record_timeout, route_key(url), kind, timeout_ms, grow)
+
+    def _record_timeout(self, route: str, kind: str, timeout_ms: int, grow: bool):
+        if grow:
+            self._record(route, kind, timeout_ms)
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT INTO timeouts_hit VALUES (?, ?, 1, ?, ?) ON CONFLICT (route, kind) DO UPDATE SET "
+                "count = count + 1, last_timeout_ms = excluded.last_timeout_ms, last_at = excluded.last_at",
+                (route, kind, timeout_ms, time.time()),
+            )
+
+    async def report(self) -> dict:
+        """Per route and kind: sample count, p50/p95 latency, current timeout and timeouts hit."""
+        return await asyncio.to_thread(self._report)
+
+    def _report(self) -> dict:
+        with self._lock:
+            hits = {
+                (row["route"], row["kind"]): row
+                for row in self._db.execute("SELECT * FROM timeouts_hit")
+            }
+            keys = {
+                (row["route"], row["kind"])
+                for row in self._db.execute("SELECT DISTINCT route, kind FROM samples")
+            }
+        routes = []
+        for route, kind in sorted(keys | set(hits)):
+            with self._lock:
+                samples = list(self._window(route, kind))
+            hit = hits.get((route, kind))
+            entry = {"route": route, "kind": kind, "samples": len(samples), "timeout_ms": self._derive(route, kind)}
+            if samples:
+                entry["p50_ms"] = round(percentile(samples, 0.5), 1)
+                entry["p95_ms"] = round(percentile(samples, 0.95), 1)
+            entry["timeouts_hit"] = hit["count"] if hit else 0
+            if hit:
+                entry["last_timeout_ms"] = hit["last_timeout_ms"]
+                entry["last_timeout_at"] = int(hit["last_at"])
+            routes.append(entry)
+        routes.sort(key=lambda entry: (-entry["timeouts_hit"], entry["route"], entry["kind"]))
+        return {
+            "default_ms": self.default_ms,
+            "floor_ms": self.floor_ms,
+            "ceiling_ms": self.ceiling_ms,
+            "timeouts_hit": sum(entry["timeouts_hit"] for entry in routes),
+            "routes": routes,
+        }
@@ -15,9 +15,16 @@ MAX_TURNS="${1:-20}"
 FOCUS="${2:-}"
 HEADLESS="${HEADLESS:-false}"
 DRY_RUN="${DRY_RUN:-false}"
+# SHARDS > 1 runs that many agents in parallel, each on one of FOCUS_AREAS (';'-separated),
+# sharing the MAX_ISSUES budget, duplicate checks and page coverage
+SHARDS="${SHARDS:-1}"
+FOCUS_AREAS="${FOCUS_AREAS:-navigation and the dashboard;adding, editing and deleting bikes;maintenance logs and service history;components and parts;profile, settings and account;forms, validation and error handling}"
 
-# Build prompt
-PROMPT="You are a thorough QA tester for CrankCase, a bike maintenance tracking application.
+# Build prompt: build_prompt FOCUS [SHARD_NOTE]
+build_prompt() {
+    local focus="$1"
+    local shard_note="$2"
+    echo "You are a thorough QA tester for CrankCase, a bike maintenance tracking application.
 
 Your job is to:
 1. Explore the application like a real user would
@@ -28,6 +35,7 @@ Your job is to:
 Instructions:
 1. First call start_browser to launch the browser and log in
 2. Use get_page_state to see what's on the current page
+   and get_diagnostics (passing the last cursor) to catch JS errors and failed requests
 3. Explore navigation and features systematically
 4. Test happy paths first, then edge cases
 5. Report bugs with report_bug (include exact steps to reproduce)
@@ -37,17 +45,61 @@ Instructions:
 What qualifies as a bug:
 - Errors, crashes, or unexpected behavior
 - Data not saved or displayed correctly
-- Broken links or missing pages
+- Broken links or missing pages (check_links verifies a whole page's links in one call)
 
 What qualifies as a feature request:
 - Missing functionality users would expect
 - UX improvements (better labels, confirmations, feedback)
-${FOCUS:+
-Focus your testing on: $FOCUS}"
+${focus:+
+Focus your testing on: $focus}${shard_note:+
+
+$shard_note}"
+}
 
 # Export for MCP server
 export DRY_RUN
 
+if [ "$SHARDS" -gt 1 ]; then
+    IFS=';' read -ra AREAS <<< "$FOCUS_AREAS"
+    export RUN_ID="${RUN_ID:-qa-$(date +%Y%m%d-%H%M%S)}"
+    # Each shard's server launches its own headless browser at startup
+    export PREWARM_BROWSER=true PREWARM_HEADLESS=true
+    LOG_DIR="logs/$RUN_ID"
+    mkdir -p "$LOG_DIR"
+
+    echo "=================================="
+    echo "CrankCase QA Agent ($SHARDS shards)"
+    echo "=================================="
+    echo "Run ID: $RUN_ID"
+    echo "Max turns: $MAX_TURNS"
+    echo "Dry run: $DRY_RUN"
+    echo "Logs: $LOG_DIR"
+    echo "=================================="
+
+    pids=()
+    for ((i = 0; i < SHARDS; i++)); do
+        area="${AREAS[$((i % ${#AREAS[@]}))]}"
+        [ -n "$FOCUS" ] && area="$FOCUS ($area)"
+        note="You are shard $((i + 1)) of $SHARDS; other testers are covering other areas of the app at the same time.
+If get_page_state returns covered_by_shards, another shard already tested that kind of page: only look at what your focus adds.
+Call get_coverage to see which pages are already covered and how much of the issue budget is left."
+        echo "Shard $i: $area"
+        SHARD_ID="$i" claude --print \
+               --dangerously-skip-permissions \
+               --mcp-config '{"mcpServers":{"crankcase-qa":{"command":"python","args":["'"$(pwd)/browser_mcp.py"'"]}}}' \
+               -p "$(build_prompt "$area" "$note")" > "$LOG_DIR/shard-$i.log" 2>&1 &
+        pids+=($!)
+    done
+
+    failed=0
+    for pid in "${pids[@]}"; do
+        wait "$pid" || failed=1
+    done
+    echo
+    python -m coordination "$RUN_ID"
+    exit $failed
+fi
+
 echo "=================================="
 echo "CrankCase QA Agent"
 echo "=================================="
@@ -60,4 +112,4 @@ echo
 
 claude --print \
        --dangerously-skip-permissions \
-       -p "$PROMPT"
+       -p "$(build_prompt "$FOCUS")"
@@ -0,0 +1,249 @@
+"""Screenshot capture, perceptual dedup and background writing.
+
+`capture()` takes the image straight from CDP's Page.captureScreenshot,
+which encodes PNG, JPEG or WebP (with a quality setting) and clips to an
+element, the viewport or the full page. A small PNG thumbnail of the
+same region is captured alongside and reduced to a 64-bit difference
+hash (dHash) with Pillow.
+
+`ScreenshotStore` numbers files from a locked counter file (safe across
+concurrent servers), writes them on a background task and appends a line
+per screenshot to manifest.jsonl. A capture of the same URL and size as
+an earlier one is not written again if its bytes are identical, and the
+earlier file is returned instead. Fuzzy matching on the perceptual hash
+(`max_distance` > 0) is opt-in. A toast or a changed label moves the hash
+by only a few bits, and returning an older file would hide exactly that
+change.
+"""
+
+import asyncio
+import base64
+import fcntl
+import hashlib
+import io
+import json
+import os
+import re
+import time
+
+from playwright.async_api import CDPSession, Page
+
+FORMATS = ("png", "jpeg", "webp")
+EXTENSIONS = {"png": "png", "jpeg": "jpg", "webp": "webp"}
+THUMBNAIL_WIDTH = 64
+HASH_SIZE = 8  # 8x8 gradient bits
+
+NUMBERED_RE = re.compile(r"^screenshot_(\d+)\.")
+
+
+async def region_clip(client: CDPSession, box: dict | None = None, full_page: bool = False) -> dict:
+    """CDP clip rectangle, in page coordinates, for the viewport, the full page or `box`."""
+    layout = await client.send("Page.getLayoutMetrics")
+    viewport = layout["cssVisualViewport"]
+    if box:
+        # bounding_box() is relative to the viewport; clips are in page coordinates
+        return {
+            "x": box["x"] + viewport["pageX"],
+            "y": box["y"] + viewport["pageY"],
+            "width": box["width"],
+            "height": box["height"],
+        }
+    if full_page:
+        content = layout["cssContentSize"]
+        return {"x": 0, "y": 0, "width": content["width"], "height": content["height"]}
+    return {
+        "x": viewport["pageX"],
+        "y": viewport["pageY"],
+        "width": viewport["clientWidth"],
+        "height": viewport["clientHeight"],
+    }
+
+
+async def capture(
+    page: Page,
+    image_format: str = "png",
+    quality: int | None = None,
+    box: dict | None = None,
+    full_page: bool = False,
+) -> dict:
+    """Capture the viewport, the full page, or `box` (an element's bounding_box()).
+
+    Returns the encoded image bytes, its perceptual hash and the CSS size of the region.
+    """
+    if image_format not in FORMATS:
+        raise ValueError(f"Unknown screenshot format: {image_format} (expected one of {FORMATS})")
+    client = await page.context.new_cdp_session(page)
+    try:
+        clip = await region_clip(client, box, full_page)
+        beyond_viewport = full_page or box is not None
+        params = {"format": image_format, "clip": {**clip, "scale": 1}, "captureBeyondViewport": beyond_viewport}
+        if quality is not None and image_format != "png":
+            params["quality"] = quality
+        shot = await client.send("Page.captureScreenshot", params)
+        scale = min(1.0, THUMBNAIL_WIDTH / max(clip["width"], 1))
+        thumbnail = await client.send("Page.captureScreenshot", {
+            "format": "png",
+            "clip": {**clip, "scale": scale},
+            "captureBeyondViewport": beyond_viewport,
+        })
+    finally:
+        await client.detach()
+
+    return {
+        "data": base64.b64decode(shot["data"]),
+        "format": image_format,
+        "hash": dhash(base64.b64decode(thumbnail["data"])),
+        "width": round(clip["width"]),
+        "height": round(clip["height"]),
+    }
+
+
+# -----------------------------------------------------------------------------
+# Perceptual hash
+# -----------------------------------------------------------------------------
+
+def dhash(image: bytes) -> int:
+    """64-bit difference hash: brightness gradients of a 9x8 box-averaged grayscale image."""
+    from PIL import Image  # Imported on first use; keeps Pillow out of server startup
+
+    with Image.open(io.BytesIO(image)) as decoded:
+        cells = decoded.convert("L").resize((HASH_SIZE + 1, HASH_SIZE), Image.Resampling.BOX)
+        pixels = cells.tobytes()
+    value = 0
+    for y in range(HASH_SIZE):
+        row = pixels[y * (HASH_SIZE + 1):(y + 1) * (HASH_SIZE + 1)]
+        for x in range(HASH_SIZE):
+            value = (value << 1) | (row[x] < row[x + 1])
+    return value
+
+
+# -----------------------------------------------------------------------------
+# Storage
+# -----------------------------------------------------------------------------
+
+class ScreenshotStore:
+    def __init__(self, directory: str = "screenshots", max_distance: int = 0):
+        self.directory = directory
+        # 0: byte-identical only; > 0: perceptual hashes within this Hamming distance; negative disables dedup
+        self.max_distance = max_distance
+        self.manifest_path = os.path.join(directory, "manifest.jsonl")
+        self.written = 0
+        self.duplicates = 0
+        self.failed = 0
+        self._counter_path = os.path.join(directory, ".counter")
+        # (url, width, height) -> [(hash, digest, path)]
+        self._hashes: dict[tuple[str, int, int], list[tuple[int, str | None, str]]] = {}
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+        os.makedirs(directory, exist_ok=True)
+        self._load_manifest()
+
+    def _load_manifest(self):
+        """Remember hashes of screenshots saved by earlier runs so they dedup too."""
+        try:
+            with open(self.manifest_path) as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Torn last line from a killed run
+            if not entry.get("duplicate_of") and os.path.exists(entry["path"]):
+                key = (entry.get("url", ""), entry["width"], entry["height"])
+                self._hashes.setdefault(key, []).append((int(entry["hash"], 16), entry.get("digest"), entry["path"]))
+
+    def _find_duplicate(self, key: tuple[str, int, int], value: int, digest: str) -> str | None:
+        if self.max_distance < 0:
+            return None
+        for existing, existing_digest, path in self._hashes.get(key, ()):
+            if digest == existing_digest:
+                return path
+            if self.max_distance > 0 and (value ^ existing).bit_count() <= self.max_distance:
+                return path
+        return None
+
+    def _reserve_number(self) -> int:
+        """Next screenshot number, incremented under a file lock."""
+        fd = os.open(self._counter_path, os.O_RDWR | os.O_CREAT, 0o644)
+        with os.fdopen(fd, "r+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            current = f.read().strip()
+            if current:
+                number = int(current) + 1
+            else:
+                # First use of this directory: continue after files from older versions
+                numbers = [int(m.group(1)) for m in map(NUMBERED_RE.match, os.listdir(self.directory)) if m]
+                number = max(numbers, default=0) + 1
+            f.seek(0)
+            f.truncate()
+            f.write(str(number))
+        return number
+
+    def save(self, shot: dict, url: str = "") -> dict:
+        """Queue a capture from `capture()` for writing; returns its path (or the duplicate's) immediately."""
+        key = (url, shot["width"], shot["height"])
+        digest = hashlib.sha256(shot["data"]).hexdigest()
+        entry = {
+            "ts": round(time.time(), 3),
+            "url": url,
+            "format": shot["format"],
+            "width": shot["width"],
+            "height": shot["height"],
+            "hash": f"{shot['hash']:016x}",
+            "digest": digest,
+        }
+        duplicate = self._find_duplicate(key, shot["hash"], digest)
+        if duplicate:
+            self.duplicates += 1
+            self._enqueue(None, None, {**entry, "path": duplicate, "duplicate_of": duplicate})
+            return {"path": duplicate, "duplicate": True}
+
+        number = self._reserve_number()
+        path = os.path.join(self.directory, f"screenshot_{number}.{EXTENSIONS[shot['format']]}")
+        self._hashes.setdefault(key, []).append((shot["hash"], digest, path))
+        self._enqueue(path, shot["data"], {**entry, "number": number, "path": path, "bytes": len(shot["data"])})
+        return {"path": path, "duplicate": False, "bytes": len(shot["data"])}
+
+    def _enqueue(self, path: str | None, data: bytes | None, entry: dict):
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+        self._queue.put_nowait((path, data, entry))
+
+    async def _run(self):
+        while True:
+            path, data, entry = await self._queue.get()
+            try:
+                await asyncio.to_thread(self._write, path, data, entry)
+            except OSError:
+                self.failed += 1
+            finally:
+                self._queue.task_done()
+
+    def _write(self, path: str | None, data: bytes | None, entry: dict):
+        if data is not None:
+            tmp = f"{path}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+            self.written += 1
+        # One write() per line on an O_APPEND file, so concurrent writers don't interleave
+        fd = os.open(self.manifest_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            os.write(fd, (json.dumps(entry) + "\n").encode())
+        finally:
+            os.close(fd)
+
+    async def flush(self):
+        """Wait until every queued screenshot is on disk."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def close(self):
+        await self.flush()
+        if self._worker:
+            self._worker.cancel()
+            self._worker = None
+            self._queue = None
@@ -0,0 +1,74 @@
+import asyncio
+import time
+
+from playwright.async_api import Page, Request
+
+# Streaming connections never "finish", so they would block settling forever
+BACKGROUND_RESOURCE_TYPES = {"websocket", "eventsource"}
+
+# Installs a MutationObserver on first call (and again after each navigation)
+# and returns how long the DOM has been unchanged, in ms.
+DOM_QUIET_SCRIPT = """
+() => {
+    if (!window.__qaSettle) {
+        window.__qaSettle = {last: performance.now()};
+        new MutationObserver(() => { window.__qaSettle.last = performance.now(); })
+            .observe(document, {subtree: true, childList: true, attributes: true, characterData: true});
+    }
+    return performance.now() - window.__qaSettle.last;
+}
+"""
+
+
+class SettleTracker:
+    """Detects when a page has gone quiet after an action.
+
+    A page is settled once it has had no in-flight requests and no DOM
+    mutations for `quiet_ms`. Requests whose URL contains any of the
+    `ignore_urls` substrings (analytics beacons, long-polling endpoints)
+    are not waited on.
+    """
+
+    def __init__(self, page: Page, ignore_urls: list[str]):
+        self.page = page
+        self.ignore_urls = ignore_urls
+        self._inflight: set[Request] = set()
+        self._last_network = time.monotonic()
+        page.on("request", self._on_request)
+        page.on("requestfinished", self._on_request_done)
+        page.on("requestfailed", self._on_request_done)
+
+    def _ignored(self, request: Request) -> bool:
+        if request.resource_type in BACKGROUND_RESOURCE_TYPES:
+            return True
+        return any(pattern in request.url for pattern in self.ignore_urls)
+
+    def _on_request(self, request: Request):
+        if not self._ignored(request):
+            self._inflight.add(request)
+            self._last_network = time.monotonic()
+
+    def _on_request_done(self, request: Request):
+        if request in self._inflight:
+            self._inflight.discard(request)
+            self._last_network = time.monotonic()
+
+    async def wait(self, quiet_ms: int, timeout_ms: int, poll_ms: int = 50) -> dict:
+        """Wait until the page is quiescent; returns how long that took."""
+        start = time.monotonic()
+        while True:
+            now = time.monotonic()
+            elapsed_ms = (now - start) * 1000
+            if elapsed_ms >= timeout_ms:
+                return {"settled": False, "settle_ms": round(elapsed_ms)}
+
+            network_quiet = not self._inflight and (now - self._last_network) * 1000 >= quiet_ms
+            if network_quiet:
+                try:
+                    dom_quiet_ms = await self.page.evaluate(DOM_QUIET_SCRIPT)
+                except Exception:
+                    dom_quiet_ms = 0  # Execution context replaced mid-navigation
+                if dom_quiet_ms >= quiet_ms:
+                    return {"settled": True, "settle_ms": round((time.monotonic() - start) * 1000)}
+
+            await asyncio.sleep(poll_ms / 1000)
@@ -0,0 +1,25 @@
+from dedup_index import DedupIndex
+
+BOILERPLATE = "Steps to reproduce: 1. Log in 2. Open the page 3. Click the button. Expected: it works. Actual: nothing happens."
+
+
+def test_shared_boilerplate_body_is_not_a_duplicate():
+    index = DedupIndex(0.6)
+    index.add("Save button on settings page does nothing", BOILERPLATE, key=1)
+    assert index.find("Delete bike button on bike page does nothing", BOILERPLATE) is None
+
+
+def test_body_tips_a_close_title_match():
+    index = DedupIndex(0.6)
+    body = "The odometer total resets to zero after saving the ride log."
+    index.add("Odometer resets after saving ride", body, key=1)
+    title = "Odometer display resets after saving long weekend ride twice"
+    # Titles alone score 5/9, just under the threshold; the matching body tips it
+    assert index.find(title) is None
+    assert index.find(title, body)[0] == 1
+
+
+def test_containing_title_is_a_duplicate():
+    index = DedupIndex(0.6)
+    index.add("Chain wear not saved", key=7)
+    assert index.find("Chain wear not saved on bike page")[0] == 7
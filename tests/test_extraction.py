@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+
+from extraction import elements_from_snapshot, extract_elements
+
+PAGE = """
+<html><body>
+  <nav><a href="/">Home</a><a href="/bikes">Bikes</a></nav>
+  <div id="main">
+    <h1>My bikes</h1>
+    <form><label>Name</label><input name="name" placeholder="Bike name"><button>Save</button></form>
+    <a id="delete" href="/bikes/1/delete">Delete</a>
+  </div>
+</body></html>
+"""
+
+
+def element(tag, attrs=None, *children, box=(0, 0, 100, 20)):
+    return {"tag": tag, "attrs": attrs or {}, "children": list(children), "box": box}
+
+
+def captured(root, base_url="https://bikes.example/") -> dict:
+    """A DOMSnapshot.captureSnapshot result for a tree of element() dicts and text strings."""
+    strings: list[str] = []
+
+    def string(value: str) -> int:
+        if value not in strings:
+            strings.append(value)
+        return strings.index(value)
+
+    nodes = {"parentIndex": [], "nodeType": [], "nodeName": [], "nodeValue": [], "backendNodeId": [], "attributes": []}
+    layout = {"nodeIndex": [], "bounds": []}
+
+    def add(node, parent: int):
+        index = len(nodes["parentIndex"])
+        text = isinstance(node, str)
+        nodes["parentIndex"].append(parent)
+        nodes["nodeType"].append(3 if text else 11 if node["tag"] == "#document-fragment" else 1)
+        nodes["nodeName"].append(string("#text" if text else node["tag"].upper()))
+        nodes["nodeValue"].append(string(node) if text else -1)
+        nodes["backendNodeId"].append(100 + index)
+        flat = [] if text else [string(part) for pair in node["attrs"].items() for part in pair]
+        nodes["attributes"].append(flat)
+        if text or node["box"]:
+            layout["nodeIndex"].append(index)
+            layout["bounds"].append(list(node["box"]) if not text else [0, 0, 10, 10])
+        for child in [] if text else node["children"]:
+            add(child, index)
+
+    add(root, -1)
+    return {"strings": strings, "documents": [{"nodes": nodes, "layout": layout, "baseURL": string(base_url)}]}
+
+
+def test_elements_from_snapshot():
+    root = element(
+        "html", {},
+        element(
+            "body", {},
+            element("nav", {}, element("a", {"href": "/"}, "Home"), element("a", {"href": "/bikes"}, "Bikes")),
+            element(
+                "div", {"id": "main"},
+                element("h1", {}, "My  bikes"),
+                element("input", {"name": "name", "placeholder": "Bike name"}),
+                element("a", {"id": "delete", "href": "/bikes/1/delete"}, "Delete", box=(0, 2000, 100, 20)),
+                element("button", {"class": "hidden"}, "Hidden", box=None),
+            ),
+        ),
+    )
+    records = elements_from_snapshot(captured(root), {"width": 1280, "height": 720})
+
+    assert [r["key"] for r in records] == [
+        "body:1>nav:1>a:1", "body:1>nav:1>a:2", "#main>h1:1", "#main>input:1", "a#delete", "#main>button:1",
+    ]
+    assert records[1]["html"] == '<a href="https://bikes.example/bikes">Bikes</a>'
+    assert records[2]["html"] == "<h1>My bikes</h1>"
+    assert records[3]["html"] == '<input name="name" type="text" placeholder="Bike name"></input>'
+    assert [r["vis"] for r in records] == [2, 2, 2, 2, 1, 0]
+    assert all(r["backend_id"] >= 100 for r in records)
+
+
+def test_shadow_root_content_is_skipped():
+    shadow_root = element("#document-fragment", {}, element("a", {"href": "/inside"}, "Inside"))
+    host = element("div", {"id": "host"}, shadow_root)
+    root = element("html", {}, element("body", {}, host, element("a", {"href": "/outside"}, "Outside")))
+    assert [r["key"] for r in elements_from_snapshot(captured(root))] == ["body:1>a:1"]
+
+
+def test_js_and_cdp_engines_agree_on_keys():
+    async_api = pytest.importorskip("playwright.async_api")
+
+    async def run():
+        async with async_api.async_playwright() as playwright:
+            try:
+                browser = await playwright.chromium.launch()
+            except Exception as e:
+                pytest.skip(f"Chromium is not available: {e}")
+            page = await browser.new_page()
+            await page.set_content(PAGE)
+            js = await extract_elements(page, "js")
+            cdp = await extract_elements(page, "cdp")
+            await browser.close()
+            return js, cdp
+
+    js, cdp = asyncio.run(run())
+    assert [r["key"] for r in js] == [r["key"] for r in cdp]
+    assert [r["vis"] for r in js] == [r["vis"] for r in cdp]
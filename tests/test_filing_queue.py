@@ -0,0 +1,63 @@
+import asyncio
+
+from filing_queue import FilingQueue
+
+
+class FakeReporter:
+    def __init__(self):
+        self.created = []
+
+    def is_known_duplicate(self, title, description):
+        return False
+
+    async def get_index(self):
+        pass
+
+    async def create_bug(self, title, description, details):
+        self.created.append(title)
+        return {"status": "created", "url": f"https://example.test/issues/{len(self.created)}"}
+
+
+class FailingCoordinator:
+    """Reserves fine, then fails to record outcomes (e.g. a locked database)."""
+
+    def __init__(self, reserve_error: Exception | None = None):
+        self.reserve_error = reserve_error
+        self.next_id = 1
+
+    async def reserve(self, kind, title, description):
+        if self.reserve_error:
+            raise self.reserve_error
+        self.next_id += 1
+        return {"status": "reserved", "id": self.next_id}
+
+    async def finish(self, report_id, created, url=None):
+        raise RuntimeError("database is locked")
+
+
+def test_failing_finish_does_not_hang_flush_or_drop_the_batch():
+    async def run():
+        reporter = FakeReporter()
+        queue = FilingQueue(reporter, 5, 0.6, coordinator=FailingCoordinator())
+        await queue.submit("bug", "Save button does nothing", "Clicking save has no effect.", "")
+        await queue.submit("bug", "Odometer shows negative distance", "The total goes below zero.", "")
+        await queue.flush(timeout=5)
+        return reporter, queue
+
+    reporter, queue = asyncio.run(run())
+    assert len(reporter.created) == 2
+    assert queue.created_count == 2
+
+
+
+def test_failed_reservation_releases_the_local_slot():
+    async def run():
+        queue = FilingQueue(FakeReporter(), 1, 0.6, coordinator=FailingCoordinator(RuntimeError("database is locked")))
+        first = await queue.submit("bug", "Save button does nothing", "Clicking save has no effect.", "")
+        queue.coordinator = FailingCoordinator()
+        second = await queue.submit("bug", "Save button does nothing", "Clicking save has no effect.", "")
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first["status"] == "error"
+    assert second["status"] == "pending"
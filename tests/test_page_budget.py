@@ -0,0 +1,16 @@
+from page_budget import serialize
+
+LINKS = [{"html": f'<a href="/bikes/{i}">Bike {i}</a>', "key": f"body>a#{i}", "vis": 2} for i in range(50)]
+
+
+def test_last_page_is_served():
+    pages = serialize(LINKS, 200)["pages"]
+    assert pages > 1
+    assert serialize(LINKS, 200, pages)["page"] == pages
+
+
+def test_page_past_the_end_is_an_error():
+    pages = serialize(LINKS, 200)["pages"]
+    result = serialize(LINKS, 200, pages + 1)
+    assert result["status"] == "error"
+    assert result["pages"] == pages
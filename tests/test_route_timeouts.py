@@ -0,0 +1,74 @@
+import asyncio
+
+from route_timeouts import MIN_SAMPLES, RouteTimeouts, percentile, route_key
+
+URL = "https://bikes.example/bikes/42/edit"
+
+
+def timeouts(tmp_path, **kwargs) -> RouteTimeouts:
+    return RouteTimeouts(str(tmp_path / "timeouts.sqlite3"), default_ms=30000, **kwargs)
+
+
+def learned(store: RouteTimeouts, samples: list[float], url: str = URL) -> int:
+    async def run():
+        for ms in samples:
+            await store.record("action", url, ms)
+        return await store.timeout("action", url)
+
+    return asyncio.run(run())
+
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert percentile(values, 0.5) == 51
+    assert percentile(values, 0.95) == 96
+    assert percentile([7], 0.95) == 7
+
+
+def test_route_key_includes_origin():
+    assert route_key(URL) == "https://bikes.example/bikes/:id/edit"
+    assert route_key("http://127.0.0.1:8000/bikes/7/edit") != route_key(URL)
+
+
+def test_default_until_enough_samples(tmp_path):
+    assert learned(timeouts(tmp_path), [1000] * (MIN_SAMPLES - 1)) == 30000
+
+
+def test_high_percentile_with_headroom(tmp_path):
+    assert learned(timeouts(tmp_path), [1000] * 19 + [1500]) == 4500
+
+
+def test_clamped_to_floor_and_ceiling(tmp_path):
+    assert learned(timeouts(tmp_path / "fast"), [100] * 10) == 2000
+    assert learned(timeouts(tmp_path / "slow"), [20000] * 10) == 30000
+
+
+def test_samples_are_per_origin(tmp_path):
+    store = timeouts(tmp_path)
+    learned(store, [100] * 10, url="http://127.0.0.1:8000/bikes/1/edit")
+    assert asyncio.run(store.timeout("action", URL)) == 30000
+
+
+def test_timeout_without_grow_does_not_grow(tmp_path):
+    store = timeouts(tmp_path)
+    before = learned(store, [1000] * 10)
+
+    async def run():
+        for _ in range(10):
+            await store.record_timeout("action", URL, before, grow=False)
+        return await store.timeout("action", URL), await store.report()
+
+    after, report = asyncio.run(run())
+    assert after == before
+    assert report["timeouts_hit"] == 10
+
+
+def test_timeout_with_grow_grows(tmp_path):
+    store = timeouts(tmp_path)
+    before = learned(store, [1000] * 10)
+
+    async def run():
+        await store.record_timeout("action", URL, before, grow=True)
+        return await store.timeout("action", URL)
+
+    assert asyncio.run(run()) > before
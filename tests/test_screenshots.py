@@ -0,0 +1,35 @@
+import io
+
+from PIL import Image
+
+from screenshots import dhash
+
+
+def png(draw) -> bytes:
+    image = Image.new("RGB", (64, 48), "white")
+    draw(image)
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def left_to_right_gradient(image):
+    for x in range(image.width):
+        for y in range(image.height):
+            image.putpixel((x, y), (x * 4,) * 3)
+
+
+def test_brightening_gradient_sets_every_bit_and_flat_image_none():
+    assert dhash(png(left_to_right_gradient)) == 0xFFFF_FFFF_FFFF_FFFF
+    assert dhash(png(lambda image: None)) == 0
+
+
+def test_small_change_moves_few_bits():
+    def with_toast(image):
+        left_to_right_gradient(image)
+        for x in range(36, 50):
+            for y in range(0, 12):
+                image.putpixel((x, y), (0, 0, 0))
+
+    distance = bin(dhash(png(left_to_right_gradient)) ^ dhash(png(with_toast))).count("1")
+    assert 0 < distance <= 8
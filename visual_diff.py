@@ -0,0 +1,272 @@
+"""Visual regression checks against stored baseline screenshots.
+
+The region (viewport, full page or one element) is captured as lossless
+PNG tiles at most TILE_HEIGHT CSS pixels tall, so a long full-page capture
+is never held in memory at once. Each tile is compared with the baseline
+tile at the same position using NumPy. A pixel counts as changed when any
+channel differs by more than `tolerance`. Pixels under ignore regions
+(timestamps, avatars, ads) are masked out. Changed pixels are binned into
+CELL x CELL cells, and connected cells are merged into bounding boxes.
+The agent gets those boxes back instead of an image.
+
+Baselines are stored in one directory per URL, viewport size and region.
+NumPy and Pillow are imported on the first comparison, not with the module,
+so servers that never diff screenshots don't pay for them at startup.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import time
+from typing import TYPE_CHECKING
+from urllib.parse import urlsplit
+
+from playwright.async_api import Page
+
+from screenshots import region_clip
+
+if TYPE_CHECKING:
+    import numpy as np
+
+TILE_HEIGHT = 1024  # CSS pixels; a multiple of CELL
+CELL = 16
+MIN_REGION_PIXELS = 4  # smaller clusters are anti-aliasing noise
+MAX_REGIONS = 20
+
+
+def baseline_key(url: str, viewport: dict, selector: str = "", full_page: bool = False) -> str:
+    """Directory name for a baseline: readable path prefix plus a hash of everything that identifies it."""
+    parts = urlsplit(url)
+    target = selector or ("full" if full_page else "viewport")
+    identity = f"{parts.netloc}{parts.path}?{parts.query}|{viewport['width']}x{viewport['height']}|{target}"
+    readable = re.sub(r"[^a-zA-Z0-9]+", "_", parts.path).strip("_")[:40] or "root"
+    return f"{readable}-{hashlib.sha1(identity.encode()).hexdigest()[:12]}"
+
+
+def tile_clips(clip: dict, tile_height: int = TILE_HEIGHT) -> list[dict]:
+    tiles = []
+    y = 0
+    while y < clip["height"] or not tiles:
+        height = min(tile_height, clip["height"] - y)
+        tiles.append({"x": clip["x"], "y": clip["y"] + y, "width": clip["width"], "height": max(height, 1)})
+        y += tile_height
+    return tiles
+
+
+def decode(png: bytes | None) -> np.ndarray:
+    import numpy as np
+    from PIL import Image
+
+    if png is None:
+        return np.zeros((0, 0, 3), dtype=np.uint8)
+    with Image.open(io.BytesIO(png)) as image:
+        return np.asarray(image.convert("RGB"))
+
+
+def changed_mask(current: np.ndarray, baseline: np.ndarray, tolerance: int) -> np.ndarray:
+    """Boolean mask over the union of both images; area present in only one counts as changed."""
+    import numpy as np
+
+    height = max(current.shape[0], baseline.shape[0])
+    width = max(current.shape[1], baseline.shape[1])
+    mask = np.ones((height, width), dtype=bool)
+    h = min(current.shape[0], baseline.shape[0])
+    w = min(current.shape[1], baseline.shape[1])
+    if h and w:
+        delta = np.abs(current[:h, :w].astype(np.int16) - baseline[:h, :w].astype(np.int16))
+        mask[:h, :w] = delta.max(axis=2) > tolerance
+    return mask
+
+
+def cell_counts(mask: np.ndarray, cell: int = CELL) -> np.ndarray:
+    """Number of changed pixels per cell x cell block."""
+    import numpy as np
+
+    height, width = mask.shape
+    padded = np.pad(mask, ((0, -height % cell), (0, -width % cell)))
+    rows, cols = padded.shape[0] // cell, padded.shape[1] // cell
+    return padded.reshape(rows, cell, cols, cell).sum(axis=(1, 3))
+
+
+def compare_tile(
+    current_png: bytes | None,
+    baseline_png: bytes | None,
+    tile: dict,
+    tile_index: int,
+    tolerance: int,
+    ignore: list[dict],
+) -> dict:
+    """Diff one tile; changed cells are keyed by (row, col) in the whole region's cell grid."""
+    import numpy as np
+
+    current, baseline = decode(current_png), decode(baseline_png)
+    mask = changed_mask(current, baseline, tolerance)
+    scale = mask.shape[1] / tile["width"] if tile["width"] else 1.0
+    for box in ignore:
+        x0 = int((box["x"] - tile["x"]) * scale)
+        y0 = int((box["y"] - tile["y"]) * scale)
+        x1 = int((box["x"] + box["width"] - tile["x"]) * scale) + 1
+        y1 = int((box["y"] + box["height"] - tile["y"]) * scale) + 1
+        mask[max(y0, 0):max(y1, 0), max(x0, 0):max(x1, 0)] = False
+
+    counts = cell_counts(mask)
+    row_offset = tile_index * int(TILE_HEIGHT * scale) // CELL
+    rows, cols = np.nonzero(counts)
+    return {
+        "pixels": mask.size,
+        "changed": int(mask.sum()),
+        "cells": {(int(r) + row_offset, int(c)): int(counts[r, c]) for r, c in zip(rows, cols)},
+        "scale": scale,
+    }
+
+
+def regions(cells: dict[tuple[int, int], int], origin: dict, scale: float) -> list[dict]:
+    """Bounding boxes, in page CSS pixels, of 8-connected groups of changed cells."""
+    boxes = []
+    unvisited = set(cells)
+    while unvisited:
+        stack = [unvisited.pop()]
+        top, left, bottom, right = stack[0][0], stack[0][1], stack[0][0], stack[0][1]
+        pixels = 0
+        while stack:
+            row, col = stack.pop()
+            pixels += cells[(row, col)]
+            top, bottom = min(top, row), max(bottom, row)
+            left, right = min(left, col), max(right, col)
+            for dr in (-1, 0, 1):
+                for dc in (-1, 0, 1):
+                    neighbour = (row + dr, col + dc)
+                    if neighbour in unvisited:
+                        unvisited.remove(neighbour)
+                        stack.append(neighbour)
+        if pixels < MIN_REGION_PIXELS:
+            continue
+        boxes.append({
+            "x": round(origin["x"] + left * CELL / scale),
+            "y": round(origin["y"] + top * CELL / scale),
+            "width": round((right - left + 1) * CELL / scale),
+            "height": round((bottom - top + 1) * CELL / scale),
+            "changed_pixels": pixels,
+        })
+    boxes.sort(key=lambda box: box["changed_pixels"], reverse=True)
+    return boxes
+
+
+class BaselineStore:
+    def __init__(self, directory: str = "baselines"):
+        self.directory = directory
+
+    def _dir(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def meta(self, key: str) -> dict | None:
+        try:
+            with open(os.path.join(self._dir(key), "meta.json")) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def tile(self, key: str, index: int) -> bytes | None:
+        try:
+            with open(os.path.join(self._dir(key), f"tile_{index}.png"), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def save(self, key: str, tiles: list[bytes], meta: dict):
+        """Replace the baseline; written to a sibling directory and swapped in."""
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = f"{self._dir(key)}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        for i, data in enumerate(tiles):
+            with open(os.path.join(tmp, f"tile_{i}.png"), "wb") as f:
+                f.write(data)
+        with open(os.path.join(tmp, "meta.json"), "w") as f:
+            json.dump({**meta, "tiles": len(tiles), "created": int(time.time())}, f, indent=2)
+        shutil.rmtree(self._dir(key), ignore_errors=True)
+        os.replace(tmp, self._dir(key))
+
+
+async def compare_with_baseline(
+    page: Page,
+    store: BaselineStore,
+    key: str,
+    box: dict | None = None,
+    full_page: bool = False,
+    ignore: list[dict] | None = None,
+    tolerance: int = 16,
+    update: bool = False,
+) -> dict:
+    """Compare the region with its baseline, or record the baseline if there is none (or `update`).
+
+    `box` and `ignore` are viewport-relative bounding boxes, as from ElementHandle.bounding_box().
+    """
+    client = await page.context.new_cdp_session(page)
+    try:
+        clip = await region_clip(client, box, full_page)
+        layout = await client.send("Page.getLayoutMetrics")
+        viewport = layout["cssVisualViewport"]
+        ignore = [{**b, "x": b["x"] + viewport["pageX"], "y": b["y"] + viewport["pageY"]} for b in ignore or []]
+        tiles = tile_clips(clip)
+        meta = store.meta(key)
+
+        async def capture_tile(tile: dict) -> bytes:
+            shot = await client.send("Page.captureScreenshot", {
+                "format": "png",
+                "clip": {**tile, "scale": 1},
+                "captureBeyondViewport": True,
+            })
+            return base64.b64decode(shot["data"])
+
+        if update or meta is None:
+            captured = [await capture_tile(tile) for tile in tiles]
+            info = {"url": page.url, "width": round(clip["width"]), "height": round(clip["height"])}
+            await asyncio.to_thread(store.save, key, captured, info)
+            return {"status": "baseline_saved", "baseline": key, "tiles": len(tiles)}
+
+        # Diff each tile on a worker thread while the next one is captured
+        results = []
+        pending = None
+        for i in range(max(len(tiles), meta["tiles"])):
+            if i < len(tiles):
+                tile, current = tiles[i], await capture_tile(tiles[i])
+            else:
+                # The region got shorter; the baseline's extra tiles count as changed
+                tile, current = {**tiles[-1], "y": clip["y"] + i * TILE_HEIGHT, "height": TILE_HEIGHT}, None
+            if pending:
+                results.append(await pending)
+            pending = asyncio.ensure_future(
+                asyncio.to_thread(compare_tile, current, store.tile(key, i), tile, i, tolerance, ignore)
+            )
+        results.append(await pending)
+    finally:
+        await client.detach()
+
+    cells: dict[tuple[int, int], int] = {}
+    for result in results:
+        cells.update(result["cells"])
+    changed = sum(result["changed"] for result in results)
+    total = sum(result["pixels"] for result in results)
+    found = regions(cells, clip, results[0]["scale"])
+    summary = {
+        "status": "changed" if found else "match",
+        "baseline": key,
+        "tiles": len(results),
+        "changed_pixels": changed,
+        "changed_ratio": round(changed / total, 5) if total else 0.0,
+        "regions": found[:MAX_REGIONS],
+    }
+    if len(found) > MAX_REGIONS:
+        summary["more_regions"] = len(found) - MAX_REGIONS
+    current_size = (round(clip["width"]), round(clip["height"]))
+    if current_size != (meta["width"], meta["height"]):
+        summary["size_changed"] = {"baseline": [meta["width"], meta["height"]], "current": list(current_size)}
+    return summary